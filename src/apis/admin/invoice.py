@@ -1,5 +1,6 @@
 from django.contrib import admin
 from apis.models import Invoice
+from apis.utils.customer_cache import bump_membership_versions
 
 
 @admin.register(Invoice)
@@ -61,7 +62,9 @@ class InvoiceAdmin(admin.ModelAdmin):
     actions = ["mark_as_paid"]
 
     def mark_as_paid(self, request, queryset):
+        membership_ids = list(queryset.values_list("membership_id", flat=True))
         updated = queryset.update(status=Invoice.STATUS.PAID)
+        bump_membership_versions(*set(membership_ids))
         self.message_user(request, f"{updated} invoices marked as paid.")
 
     mark_as_paid.short_description = "Mark selected invoices as paid"
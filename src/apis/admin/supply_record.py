@@ -8,6 +8,7 @@ class SupplyRecordAdmin(admin.ModelAdmin):
         "id",
         "merchant_membership_account",
         "member_name",
+        "day",
         "given",
         "taken",
         "created_at",
@@ -6,4 +6,4 @@ class ApiConfig(AppConfig):
     name = "apis"
 
     def ready(self):
-        from . import signals  # noqa
+        from . import checks, signals  # noqa
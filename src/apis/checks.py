@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from apis.utils.customer_cache import is_shared_cache
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Dashboards, access contexts and permission maps are dropped in the cache of
+    the process that wrote, other workers only see it through a shared cache.
+    Public customer responses are not cached at all without one.
+    """
+    if settings.DEBUG or is_shared_cache():
+        return []
+    return [
+        Warning(
+            "The default cache is local to each process.",
+            hint=(
+                "Set CACHE_URL to a shared cache (e.g. rediscache://...) when "
+                "running several workers, other workers serve stale dashboards "
+                "and access until their cache entries time out."
+            ),
+            id="apis.W001",
+        )
+    ]
@@ -8,6 +8,12 @@ MODEL_CODES = {
     "MerchantMember": "105",
     "TransactionHistory": "106",
     "MerchantMembership": "107",
+    "MembershipBalance": "109",
+    "MerchantDailyRollup": "110",
+    "InvoiceBatch": "111",
+    "SequenceCounter": "112",
+    "OutboundMessage": "113",
+    "ReminderCampaign": "114",
 }
 
 ALLOWED_IMAGE_EXTENSIONS = (
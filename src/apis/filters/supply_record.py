@@ -4,11 +4,10 @@ from apis.models.supply_record import SupplyRecord
 
 
 class SupplyRecordFilter(filters.FilterSet):
-    created_at_year = django_filters.NumberFilter(
-        field_name="created_at", lookup_expr="year"
-    )
+    # Named after created_at for existing clients, records are filed by day
+    created_at_year = django_filters.NumberFilter(field_name="day", lookup_expr="year")
     created_at_month = django_filters.NumberFilter(
-        field_name="created_at", lookup_expr="month"
+        field_name="day", lookup_expr="month"
     )
 
     class Meta:
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apis.models.merchant_daily_rollup import MerchantDailyRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the merchant daily rollup buckets from transactions and invoices"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--merchant", help="Only rebuild the buckets of this merchant id"
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Only rebuild buckets from this date (YYYY-MM-DD) onwards",
+        )
+
+    def handle(self, *args, **options):
+        count = MerchantDailyRollup.rebuild(
+            merchant_id=options["merchant"], since=options["since"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily rollup buckets."))
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+
+from apis.models.merchant import Merchant
+from apis.models.invoice_batch import InvoiceBatch
+from apis.utils.invoice_batch import run_invoice_batch
+
+
+class Command(BaseCommand):
+    help = "Generate the monthly invoices of a merchant in chunks, or resume a failed batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--merchant", help="Merchant id to generate invoices for")
+        parser.add_argument(
+            "--month", type=int, help="Month to invoice, defaults to the current month"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of memberships invoiced per database transaction",
+        )
+        parser.add_argument(
+            "--resume", help="Id of a failed or interrupted batch to resume"
+        )
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            batch = self.claim_batch(options["resume"])
+        elif options["merchant"]:
+            batch = self.create_batch(options)
+        else:
+            raise CommandError("Provide --merchant or --resume.")
+
+        batch = run_invoice_batch(batch)
+        if batch.status == InvoiceBatch.STATUS.FAILED:
+            raise CommandError(
+                f"Batch {batch.id} failed after {batch.processed_memberships} "
+                f"memberships: {batch.error}. Resume it with --resume {batch.id}."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Batch {batch.id}: created {batch.invoices_created} invoices for "
+                f"{batch.processed_memberships} memberships, cancelled {batch.invoices_cancelled}."
+            )
+        )
+
+    @transaction.atomic
+    def claim_batch(self, batch_id):
+        """Mark a batch as running unless another process is still running it."""
+        try:
+            batch = (
+                InvoiceBatch.objects.select_for_update()
+                .select_related("merchant")
+                .get(id=batch_id)
+            )
+        except InvoiceBatch.DoesNotExist:
+            raise CommandError(f"Batch {batch_id} does not exist.")
+        if batch.status == InvoiceBatch.STATUS.COMPLETED:
+            raise CommandError(f"Batch {batch.id} is already completed.")
+        if batch.is_live:
+            raise CommandError(
+                f"Batch {batch.id} is still {batch.status}, last progress at "
+                f"{timezone.localtime(batch.updated_at):%H:%M:%S}. It can be resumed "
+                f"once it has made no progress for "
+                f"{InvoiceBatch.STALE_AFTER.total_seconds() // 60:.0f} minutes."
+            )
+        batch.status = InvoiceBatch.STATUS.RUNNING
+        batch.save(update_fields=["status", "updated_at"])
+        return batch
+
+    @transaction.atomic
+    def create_batch(self, options):
+        try:
+            merchant = Merchant.objects.select_for_update().get(id=options["merchant"])
+        except Merchant.DoesNotExist:
+            raise CommandError(f"Merchant {options['merchant']} does not exist.")
+        if InvoiceBatch.has_live_run(merchant.invoice_batches.all()):
+            raise CommandError(
+                f"Monthly invoices of merchant {merchant.id} are already being generated."
+            )
+        now = timezone.now()
+        # Running already, the process_background_runs worker only takes pending batches
+        return InvoiceBatch.objects.create(
+            merchant=merchant,
+            month=options["month"] or now.month,
+            year=now.year,
+            chunk_size=options["chunk_size"],
+            status=InvoiceBatch.STATUS.RUNNING,
+        )
@@ -0,0 +1,63 @@
+import time
+
+from django.db import close_old_connections
+from django.core.management.base import BaseCommand
+
+from apis.models.invoice_batch import InvoiceBatch
+from apis.models.reminder_campaign import ReminderCampaign
+from apis.utils.invoice_batch import run_invoice_batch
+from apis.utils.reminder_campaign import run_reminder_campaign
+
+# Models of the runs started from the API, with the function running one
+RUNNERS = [
+    (InvoiceBatch, run_invoice_batch),
+    (ReminderCampaign, run_reminder_campaign),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the monthly invoice batches and reminder campaigns started from the "
+        "API, and resume the ones a restart interrupted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling again when no run is waiting",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no run is waiting instead of polling for new ones",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                if self.run_next():
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+    def run_next(self):
+        """Claim and run one waiting run, return whether there was one."""
+        for model, runner in RUNNERS:
+            run = model.claim_next()
+            if run is None:
+                continue
+            try:
+                run = runner(run)
+            except KeyboardInterrupt:
+                # Stopped mid-run by a restart, the next worker resumes it right away
+                run.requeue()
+                raise
+            self.stdout.write(f"{model.__name__} {run.id}: {run.status}")
+            return True
+        return False
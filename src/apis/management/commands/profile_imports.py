@@ -0,0 +1,87 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Line format of `python -X importtime`: "import time: self | cumulative | module"
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+STARTUP_SCRIPT = """
+import django
+from importlib import import_module
+from django.conf import settings
+
+django.setup()
+import_module(settings.ROOT_URLCONF)
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the import time of each module on the Django startup path "
+        "(settings, apps and URLconf), measured in a fresh interpreter"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=25, help="Number of modules to list"
+        )
+        parser.add_argument(
+            "--sort",
+            choices=["self", "cumulative"],
+            default="cumulative",
+            help="Order modules by their own import time or including their imports",
+        )
+        parser.add_argument(
+            "--top-level",
+            action="store_true",
+            help="Sum the times by top-level package instead of listing modules",
+        )
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        modules = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match:
+                own, cumulative, indent, name = match.groups()
+                modules.append((name, int(own), int(cumulative), len(indent)))
+        if not modules:
+            raise CommandError("No import times were reported.")
+
+        # Only outermost imports add up to the total, nested ones are included in them
+        outermost = min(depth for *_, depth in modules)
+        total = sum(
+            cumulative for *_, cumulative, depth in modules if depth == outermost
+        )
+        if options["top_level"]:
+            packages = {}
+            for name, own, _, _ in modules:
+                package = name.split(".")[0]
+                packages[package] = packages.get(package, 0) + own
+            rows = [(name, own, own) for name, own in packages.items()]
+        else:
+            rows = [(name, own, cumulative) for name, own, cumulative, _ in modules]
+        index = 1 if options["sort"] == "self" or options["top_level"] else 2
+        rows.sort(key=lambda row: row[index], reverse=True)
+
+        self.stdout.write(f"{'self (ms)':>10} {'cumulative (ms)':>16}  module")
+        for name, own, cumulative in rows[: options["limit"]]:
+            self.stdout.write(f"{own / 1000:>10.1f} {cumulative / 1000:>16.1f}  {name}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {len(modules)} modules in {total / 1000:.1f} ms on startup."
+            )
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from apis.models.merchant_membership import MerchantMembership
+from apis.models.membership_balance import MembershipBalance
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored membership balances from the transaction ledger and supply records and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--merchant", help="Only reconcile the memberships of this merchant id"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of memberships rebuilt per database transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drift, do not write the rebuilt balances",
+        )
+
+    def handle(self, *args, **options):
+        memberships = MerchantMembership.objects.order_by("id")
+        if options["merchant"]:
+            memberships = memberships.filter(merchant_id=options["merchant"])
+
+        membership_ids = list(memberships.values_list("id", flat=True))
+        chunk_size = options["chunk_size"]
+        commit = not options["dry_run"]
+
+        drifts = []
+        for start in range(0, len(membership_ids), chunk_size):
+            chunk = MerchantMembership.objects.filter(
+                id__in=membership_ids[start : start + chunk_size]
+            )
+            drifts += MembershipBalance.reconcile(chunk, commit=commit)
+
+        for drift in drifts:
+            self.stdout.write(
+                f"{drift['membership']}: stored {drift['stored_balance']} "
+                f"ledger {drift['ledger_balance']}, stored supply "
+                f"{drift['stored_supply_balance']} records {drift['supply_balance']}"
+            )
+
+        action = "rebuilt" if commit else "found"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {len(membership_ids)} memberships, {action} {len(drifts)} drifted balances."
+            )
+        )
@@ -0,0 +1,139 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apis.models.merchant import Merchant
+from apis.models.reminder_campaign import ReminderCampaign
+from apis.utils.reminder_campaign import get_campaign_results, run_reminder_campaign
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue payment reminders for the customers of a merchant with overdue unpaid "
+        "invoices, resume a failed campaign, or report the progress of one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--merchant", help="Merchant id to send reminders for")
+        parser.add_argument(
+            "--channel",
+            choices=ReminderCampaign.CHANNEL.values,
+            default=ReminderCampaign.CHANNEL.SMS,
+            help="Channel the reminders are sent through",
+        )
+        parser.add_argument(
+            "--overdue-days",
+            type=int,
+            default=0,
+            help="Only count invoices due at least this many days ago",
+        )
+        parser.add_argument(
+            "--min-amount",
+            type=Decimal,
+            default=Decimal(0),
+            help="Skip customers owing less than this amount",
+        )
+        parser.add_argument(
+            "--rate",
+            type=int,
+            default=600,
+            help="Reminders sent per minute for the merchant",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of memberships queued per database transaction",
+        )
+        parser.add_argument(
+            "--resume", help="Id of a failed or interrupted campaign to resume"
+        )
+        parser.add_argument("--status", help="Id of a campaign to report on")
+
+    def get_campaign(self, campaign_id, lock=False):
+        campaigns = ReminderCampaign.objects.select_related("merchant")
+        if lock:
+            campaigns = campaigns.select_for_update()
+        try:
+            return campaigns.get(id=campaign_id)
+        except ReminderCampaign.DoesNotExist:
+            raise CommandError(f"Campaign {campaign_id} does not exist.")
+
+    def handle(self, *args, **options):
+        if options["status"]:
+            return self.report(self.get_campaign(options["status"]))
+
+        if options["resume"]:
+            campaign = self.claim_campaign(options["resume"])
+        elif options["merchant"]:
+            if options["rate"] < 1:
+                raise CommandError("--rate must be at least 1.")
+            campaign = self.create_campaign(options)
+        else:
+            raise CommandError("Provide --merchant, --resume or --status.")
+
+        campaign = run_reminder_campaign(campaign)
+        if campaign.status == ReminderCampaign.STATUS.FAILED:
+            raise CommandError(
+                f"Campaign {campaign.id} failed after {campaign.processed_memberships} "
+                f"memberships: {campaign.error}. Resume it with --resume {campaign.id}."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Campaign {campaign.id}: queued {campaign.processed_memberships} "
+                f"reminders, the send_outbound_messages worker delivers them."
+            )
+        )
+
+    @transaction.atomic
+    def claim_campaign(self, campaign_id):
+        """Mark a campaign as running unless another process is still running it."""
+        campaign = self.get_campaign(campaign_id, lock=True)
+        if campaign.status == ReminderCampaign.STATUS.COMPLETED:
+            raise CommandError(f"Campaign {campaign.id} is already completed.")
+        if campaign.is_live:
+            raise CommandError(
+                f"Campaign {campaign.id} is still {campaign.status}, last progress at "
+                f"{timezone.localtime(campaign.updated_at):%H:%M:%S}. It can be "
+                f"resumed once it has made no progress for "
+                f"{ReminderCampaign.STALE_AFTER.total_seconds() // 60:.0f} minutes."
+            )
+        campaign.status = ReminderCampaign.STATUS.RUNNING
+        campaign.save(update_fields=["status", "updated_at"])
+        return campaign
+
+    @transaction.atomic
+    def create_campaign(self, options):
+        try:
+            merchant = Merchant.objects.select_for_update().get(id=options["merchant"])
+        except Merchant.DoesNotExist:
+            raise CommandError(f"Merchant {options['merchant']} does not exist.")
+        if ReminderCampaign.has_live_run(merchant.reminder_campaigns.all()):
+            raise CommandError(
+                f"Reminders of merchant {merchant.id} are already being queued."
+            )
+        # Running already, the process_background_runs worker only takes pending campaigns
+        return ReminderCampaign.objects.create(
+            merchant=merchant,
+            status=ReminderCampaign.STATUS.RUNNING,
+            channel=options["channel"],
+            overdue_days=options["overdue_days"],
+            min_due_amount=options["min_amount"],
+            rate_per_minute=options["rate"],
+            chunk_size=options["chunk_size"],
+        )
+
+    def report(self, campaign):
+        results = get_campaign_results(campaign)
+        self.stdout.write(
+            f"{campaign.status}: {campaign.processed_memberships} of "
+            f"{campaign.total_memberships} memberships queued"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Campaign {campaign.id}: {results['sent']} sent, "
+                f"{results['failed']} failed, {results['queued']} queued."
+            )
+        )
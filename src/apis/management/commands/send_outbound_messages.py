@@ -0,0 +1,127 @@
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+from apis.models.outbound_message import OutboundMessage
+from apis.senders.transports import close_transports
+from apis.utils.outbound import (
+    MERCHANT_CONCURRENCY,
+    get_delivery_stats,
+    process_outbound_messages,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbound messages (OTPs, reminders), or report delivery "
+        "latency and failures per channel with --stats"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Number of messages claimed at a time",
+        )
+        parser.add_argument(
+            "--channel",
+            action="append",
+            choices=OutboundMessage.CHANNEL.values,
+            help="Only deliver messages of this channel, can be repeated",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="Maximum number of messages this worker sends per second",
+        )
+        parser.add_argument(
+            "--merchant-concurrency",
+            type=int,
+            default=MERCHANT_CONCURRENCY,
+            help="Maximum number of messages of one merchant in flight, across workers",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling again when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling for new messages",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Report delivery metrics instead of sending messages",
+        )
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=24,
+            help="Period covered by --stats, in hours",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            return self.report(options["hours"])
+
+        total_sent = total_failed = 0
+        try:
+            while True:
+                close_old_connections()
+                sent, failed = process_outbound_messages(
+                    options["batch_size"],
+                    options["channel"],
+                    rate=options["rate"],
+                    merchant_concurrency=options["merchant_concurrency"],
+                )
+                total_sent += sent
+                total_failed += failed
+                if failed:
+                    self.stderr.write(
+                        f"{failed} deliveries failed, see the messages' error."
+                    )
+                if sent or failed:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close_transports()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {total_sent} messages, {total_failed} deliveries failed."
+            )
+        )
+
+    def report(self, hours):
+        stats = get_delivery_stats(timezone.now() - timedelta(hours=hours))
+        if not stats:
+            self.stdout.write(f"No messages enqueued in the last {hours} hours.")
+            return
+
+        def ms(value):
+            return "-" if value is None else f"{value:.0f}"
+
+        self.stdout.write(
+            f"{'channel':<10} {'kind':<10} {'total':>7} {'sent':>7} {'failed':>7} "
+            f"{'queued':>7} {'retried':>8} {'avg ms':>8} {'p95 ms':>8} {'max ms':>8}"
+        )
+        for (channel, kind), row in stats.items():
+            self.stdout.write(
+                f"{channel:<10} {kind:<10} {row['total']:>7} {row['sent']:>7} "
+                f"{row['failed']:>7} {row['queued']:>7} {row['retried']:>8} "
+                f"{ms(row['avg_latency_ms']):>8} {ms(row['p95_latency_ms']):>8} "
+                f"{ms(row['max_latency_ms']):>8}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Delivery metrics of the last {hours} hours.")
+        )
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import Group, Permission
 from apis.common.contants import MERCHANT_PERMISSIONS, STAFF_PERMISSIONS
+from apis.utils.permission_map import bump_permission_map_version
 
 
 class Command(BaseCommand):
@@ -30,5 +31,8 @@ class Command(BaseCommand):
             filtered_permissions = permissions.filter(codename__in=allowed_perms)
             staff_group.permissions.add(*filtered_permissions)
 
+        # Compiled permission maps of every process are stale now
+        bump_permission_map_version()
+
         # Display the results
         self.stdout.write(self.style.SUCCESS("Permissions successfully assigned!"))
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:03
+
+import apis.models.mixins.uid
+import datetime
+import shortuuid
+from django.db import migrations, models
+from django.db.models import Q, Sum
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def build_membership_balances(apps, schema_editor):
+    MembershipBalance = apps.get_model("apis", "MembershipBalance")
+    MerchantMembership = apps.get_model("apis", "MerchantMembership")
+    TransactionHistory = apps.get_model("apis", "TransactionHistory")
+
+    totals = {
+        row["merchant_membership"]: row
+        for row in TransactionHistory.objects.filter(merchant_membership__isnull=False)
+        .values("merchant_membership")
+        .annotate(
+            credit=Sum("value", filter=Q(transaction_type="credit"), default=0),
+            debit=Sum("value", filter=Q(transaction_type="debit"), default=0),
+            adjustment=Sum("value", filter=Q(transaction_type="adjustment"), default=0),
+        )
+    }
+    now = timezone.now()
+    balances = []
+    for membership_id in MerchantMembership.objects.values_list("id", flat=True):
+        row = totals.get(membership_id, {})
+        credit = row.get("credit", 0)
+        debit = row.get("debit", 0)
+        adjustment = row.get("adjustment", 0)
+        balances.append(
+            MembershipBalance(
+                id="109" + shortuuid.ShortUUID().random(length=12),
+                created_at=now,
+                merchant_membership_id=membership_id,
+                total_credit=credit,
+                total_debit=debit,
+                total_adjustment=adjustment,
+                balance=credit - (debit - adjustment),
+            )
+        )
+    MembershipBalance.objects.bulk_create(balances, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0007_alter_invoice_created_at_alter_invoice_due_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='due_date',
+            field=models.DateField(default=datetime.date(2026, 11, 2)),
+        ),
+        migrations.CreateModel(
+            name='MembershipBalance',
+            fields=[
+                ('id', models.CharField(editable=False, max_length=15, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('total_credit', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_debit', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_adjustment', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('merchant_membership', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ledger', to='apis.merchantmembership')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=(models.Model, apis.models.mixins.uid.UIDMixin),
+        ),
+        migrations.RunPython(build_membership_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:07
+
+import apis.models.mixins.uid
+import shortuuid
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def build_daily_rollups(apps, schema_editor):
+    Invoice = apps.get_model("apis", "Invoice")
+    MerchantDailyRollup = apps.get_model("apis", "MerchantDailyRollup")
+    TransactionHistory = apps.get_model("apis", "TransactionHistory")
+
+    now = timezone.now()
+    buckets = {}
+
+    def get_bucket(merchant_id, day):
+        if (merchant_id, day) not in buckets:
+            buckets[(merchant_id, day)] = MerchantDailyRollup(
+                id="110" + shortuuid.ShortUUID().random(length=12),
+                created_at=now,
+                merchant_id=merchant_id,
+                day=day,
+            )
+        return buckets[(merchant_id, day)]
+
+    billing = Q(type="billing")
+    for row in (
+        TransactionHistory.objects.filter(
+            merchant_membership__isnull=False, created_at__isnull=False
+        )
+        .annotate(day=TruncDate("created_at"))
+        .values("merchant_membership__merchant", "day")
+        .annotate(
+            credit=Sum(
+                "value", filter=billing & Q(transaction_type="credit"), default=0
+            ),
+            debit=Sum("value", filter=billing & Q(transaction_type="debit"), default=0),
+            adjustment=Sum(
+                "value", filter=billing & Q(transaction_type="adjustment"), default=0
+            ),
+            commission=Sum("commission", default=0),
+        )
+    ):
+        bucket = get_bucket(row["merchant_membership__merchant"], row["day"])
+        bucket.credit = row["credit"]
+        bucket.debit = row["debit"]
+        bucket.adjustment = row["adjustment"]
+        bucket.commission = row["commission"]
+
+    for row in (
+        Invoice.objects.filter(membership__isnull=False, created_at__isnull=False)
+        .exclude(status="cancel")
+        .annotate(day=TruncDate("created_at"))
+        .values("membership__merchant", "day")
+        .annotate(
+            issued=Count("id"),
+            amount=Sum("total_amount", default=0),
+            due=Sum("due_amount", default=0),
+        )
+    ):
+        bucket = get_bucket(row["membership__merchant"], row["day"])
+        bucket.invoices_issued = row["issued"]
+        bucket.invoiced_amount = row["amount"]
+        bucket.dues_outstanding = row["due"]
+
+    MerchantDailyRollup.objects.bulk_create(buckets.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0008_membershipbalance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MerchantDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        editable=False, max_length=15, primary_key=True, serialize=False
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("created_at", models.DateTimeField(blank=True, null=True)),
+                ("day", models.DateField()),
+                (
+                    "credit",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "debit",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "adjustment",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "commission",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("invoices_issued", models.PositiveIntegerField(default=0)),
+                (
+                    "invoiced_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "dues_outstanding",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "merchant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="apis.merchant",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-day"],
+                "unique_together": {("merchant", "day")},
+            },
+            bases=(models.Model, apis.models.mixins.uid.UIDMixin),
+        ),
+        migrations.RunPython(build_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:08
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def build_membership_summaries(apps, schema_editor):
+    MembershipBalance = apps.get_model("apis", "MembershipBalance")
+    MerchantMembership = apps.get_model("apis", "MerchantMembership")
+    SupplyRecord = apps.get_model("apis", "SupplyRecord")
+    TransactionHistory = apps.get_model("apis", "TransactionHistory")
+
+    MembershipBalance.objects.update(
+        merchant_id=Subquery(
+            MerchantMembership.objects.filter(
+                id=OuterRef("merchant_membership_id")
+            ).values("merchant_id")[:1]
+        )
+    )
+    supplies = {
+        row["merchant_membership"]: row
+        for row in SupplyRecord.objects.values("merchant_membership").annotate(
+            given=Sum("given"), taken=Sum("taken")
+        )
+    }
+    payments = dict(
+        TransactionHistory.objects.filter(
+            merchant_membership__isnull=False,
+            type="billing",
+            transaction_type="credit",
+        )
+        .values("merchant_membership")
+        .annotate(last=Max("created_at"))
+        .values_list("merchant_membership", "last")
+    )
+    changed = []
+    for ledger in MembershipBalance.objects.filter(
+        Q(merchant_membership_id__in=supplies.keys())
+        | Q(merchant_membership_id__in=payments.keys())
+    ):
+        supply = supplies.get(ledger.merchant_membership_id, {})
+        ledger.supply_given = supply.get("given") or 0
+        ledger.supply_taken = supply.get("taken") or 0
+        ledger.supply_balance = ledger.supply_taken - ledger.supply_given
+        last_payment = payments.get(ledger.merchant_membership_id)
+        ledger.last_payment_date = last_payment and timezone.localdate(last_payment)
+        changed.append(ledger)
+    MembershipBalance.objects.bulk_update(
+        changed,
+        fields=["supply_given", "supply_taken", "supply_balance", "last_payment_date"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0009_merchantdailyrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="membershipbalance",
+            name="last_payment_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="membershipbalance",
+            name="merchant",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="membership_balances",
+                to="apis.merchant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="membershipbalance",
+            name="supply_balance",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="membershipbalance",
+            name="supply_given",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="membershipbalance",
+            name="supply_taken",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="membershipbalance",
+            index=models.Index(
+                fields=["merchant", "balance"], name="apis_member_merchan_ff969e_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="membershipbalance",
+            index=models.Index(
+                fields=["merchant", "supply_balance"],
+                name="apis_member_merchan_ef4251_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="membershipbalance",
+            index=models.Index(
+                fields=["merchant", "last_payment_date"],
+                name="apis_member_merchan_1c026e_idx",
+            ),
+        ),
+        migrations.RunPython(build_membership_summaries, migrations.RunPython.noop),
+    ]
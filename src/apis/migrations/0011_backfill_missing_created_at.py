@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:12
+
+from django.db import migrations
+from django.db.models import F
+
+
+def backfill_created_at(apps, schema_editor):
+    # Rows written with bulk_create() never got a created_at; updated_at holds
+    # their insert time. Cursor pagination orders on created_at.
+    for model_name in ["Invoice", "SupplyRecord", "TransactionHistory"]:
+        model = apps.get_model("apis", model_name)
+        model.objects.filter(created_at__isnull=True).update(
+            created_at=F("updated_at")
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0010_membershipbalance_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:14
+
+import apis.models.mixins.uid
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0011_backfill_missing_created_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InvoiceBatch",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        editable=False, max_length=15, primary_key=True, serialize=False
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("created_at", models.DateTimeField(blank=True, null=True)),
+                ("month", models.PositiveSmallIntegerField()),
+                ("year", models.PositiveSmallIntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("chunk_size", models.PositiveIntegerField(default=500)),
+                ("cursor", models.CharField(blank=True, default="", max_length=15)),
+                ("is_cancellation_done", models.BooleanField(default=False)),
+                ("total_memberships", models.PositiveIntegerField(default=0)),
+                ("processed_memberships", models.PositiveIntegerField(default=0)),
+                ("invoices_created", models.PositiveIntegerField(default=0)),
+                ("invoices_cancelled", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True, null=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="invoice_batches",
+                        to="apis.merchantmember",
+                    ),
+                ),
+                (
+                    "merchant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="invoice_batches",
+                        to="apis.merchant",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["merchant", "status"],
+                        name="apis_invoic_merchan_4ccd33_idx",
+                    )
+                ],
+            },
+            bases=(models.Model, apis.models.mixins.uid.UIDMixin),
+        ),
+    ]
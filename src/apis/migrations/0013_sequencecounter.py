@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:15
+
+import apis.models.mixins.uid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0012_invoicebatch"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SequenceCounter",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        editable=False, max_length=15, primary_key=True, serialize=False
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("created_at", models.DateTimeField(blank=True, null=True)),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "abstract": False,
+            },
+            bases=(models.Model, apis.models.mixins.uid.UIDMixin),
+        ),
+    ]
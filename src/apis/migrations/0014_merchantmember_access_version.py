@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0013_sequencecounter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="merchantmember",
+            name="access_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
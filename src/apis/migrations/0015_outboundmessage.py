@@ -0,0 +1,82 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:30
+
+import apis.models.mixins.uid
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0014_merchantmember_access_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboundMessage",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        editable=False, max_length=15, primary_key=True, serialize=False
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("created_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "channel",
+                    models.CharField(
+                        choices=[
+                            ("email", "Email"),
+                            ("sms", "SMS"),
+                            ("whatsapp", "WhatsApp"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("kind", models.CharField(choices=[("otp", "OTP")], max_length=10)),
+                ("payload", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sending", "Sending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("available_at", models.DateTimeField()),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                ("latency_ms", models.PositiveIntegerField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, null=True)),
+                (
+                    "member",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outbound_messages",
+                        to="apis.merchantmember",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"],
+                        name="apis_outbou_status_7be954_idx",
+                    ),
+                    models.Index(
+                        fields=["channel", "created_at"],
+                        name="apis_outbou_channel_2e4d31_idx",
+                    ),
+                ],
+            },
+            bases=(models.Model, apis.models.mixins.uid.UIDMixin),
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:33
+
+import apis.models.mixins.uid
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0015_outboundmessage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboundmessage",
+            name="merchant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="outbound_messages",
+                to="apis.merchant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="outboundmessage",
+            name="priority",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="outboundmessage",
+            name="kind",
+            field=models.CharField(
+                choices=[("otp", "OTP"), ("reminder", "Reminder")], max_length=10
+            ),
+        ),
+        migrations.CreateModel(
+            name="ReminderCampaign",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        editable=False, max_length=15, primary_key=True, serialize=False
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("created_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "channel",
+                    models.CharField(
+                        choices=[
+                            ("email", "Email"),
+                            ("sms", "SMS"),
+                            ("whatsapp", "WhatsApp"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("overdue_days", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "min_due_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=8),
+                ),
+                ("rate_per_minute", models.PositiveIntegerField(default=600)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("chunk_size", models.PositiveIntegerField(default=1000)),
+                ("cursor", models.CharField(blank=True, default="", max_length=15)),
+                ("total_memberships", models.PositiveIntegerField(default=0)),
+                ("processed_memberships", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True, null=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="reminder_campaigns",
+                        to="apis.merchantmember",
+                    ),
+                ),
+                (
+                    "merchant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reminder_campaigns",
+                        to="apis.merchant",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+            bases=(models.Model, apis.models.mixins.uid.UIDMixin),
+        ),
+        migrations.AddField(
+            model_name="outboundmessage",
+            name="campaign",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="messages",
+                to="apis.remindercampaign",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="remindercampaign",
+            index=models.Index(
+                fields=["merchant", "status"], name="apis_remind_merchan_20fd6e_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:05
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_day(apps, schema_editor):
+    SupplyRecord = apps.get_model("apis", "SupplyRecord")
+    # Local day of the record, as `created_at__date` matched it before
+    SupplyRecord.objects.update(day=TruncDate("created_at"))
+
+    # Racing requests could write two rows for one day, merge them into the
+    # oldest one so the supply totals stay the same.
+    duplicates = (
+        SupplyRecord.objects.values("merchant_membership", "day")
+        .annotate(
+            count=Count("id"),
+            given=Sum("given"),
+            taken=Sum("taken"),
+        )
+        .filter(count__gt=1)
+    )
+    for row in duplicates:
+        records = SupplyRecord.objects.filter(
+            merchant_membership=row["merchant_membership"], day=row["day"]
+        )
+        # Ids are random, the oldest row is the first one created
+        oldest = records.order_by("created_at", "id").first()
+        records.filter(id=oldest.id).update(given=row["given"], taken=row["taken"])
+        records.exclude(id=oldest.id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0016_remindercampaign"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="supplyrecord",
+            name="day",
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(backfill_day, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="supplyrecord",
+            name="day",
+            field=models.DateField(),
+        ),
+        migrations.AlterUniqueTogether(
+            name="supplyrecord",
+            unique_together={("merchant_membership", "day")},
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0017_supplyrecord_day"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="remindercampaign",
+            name="channel",
+            field=models.CharField(
+                choices=[("email", "Email"), ("sms", "SMS")], max_length=10
+            ),
+        ),
+    ]
@@ -2,10 +2,16 @@ from auditlog.registry import auditlog
 from apis.models.otp import OTP
 from apis.models.lookup import Lookup
 from apis.models.invoice import Invoice
+from apis.models.invoice_batch import InvoiceBatch
 from apis.models.merchant import Merchant
 from apis.models.member_role import MemberRole
 from apis.models.supply_record import SupplyRecord
+from apis.models.outbound_message import OutboundMessage
+from apis.models.reminder_campaign import ReminderCampaign
+from apis.models.sequence_counter import SequenceCounter
 from apis.models.merchant_member import MerchantMember
+from apis.models.membership_balance import MembershipBalance
+from apis.models.merchant_daily_rollup import MerchantDailyRollup
 from apis.models.merchant_membership import MerchantMembership
 from apis.models.transaction_history import TransactionHistory
 
@@ -14,10 +20,16 @@ __all__ = [
     "OTP",
     "Lookup",
     "Invoice",
+    "InvoiceBatch",
     "Merchant",
     "MemberRole",
     "SupplyRecord",
+    "OutboundMessage",
+    "ReminderCampaign",
+    "SequenceCounter",
     "MerchantMember",
+    "MembershipBalance",
+    "MerchantDailyRollup",
     "MerchantMembership",
     "TransactionHistory",
 ]
@@ -25,9 +37,11 @@ __all__ = [
 auditlog.register(OTP)
 auditlog.register(Lookup)
 auditlog.register(Invoice)
+auditlog.register(InvoiceBatch)
 auditlog.register(Merchant)
 auditlog.register(MemberRole)
 auditlog.register(SupplyRecord)
+auditlog.register(ReminderCampaign)
 auditlog.register(MerchantMember)
 auditlog.register(MerchantMembership)
 auditlog.register(TransactionHistory)
@@ -25,4 +25,8 @@ class BaseModel(models.Model, UIDMixin):
                 self.updated_at, timezone.get_current_timezone()
             )
         self.set_uid()
+        if self._state.adding and not kwargs.get("update_fields"):
+            # UIDs are not checked for existence, a clash must fail rather
+            # than UPDATE the stored row Django would try first
+            kwargs.setdefault("force_insert", True)
         super().save(**kwargs)
@@ -3,10 +3,11 @@ from django.db.models import Max
 from django.utils import timezone
 
 from apis.models.abstract.base import BaseModel
+from apis.models.sequence_counter import SequenceCounter, get_max_code
 
 
 class Invoice(BaseModel):
-    UID_PREFIX = 101
+    UID_SCHEME = "sortable"
 
     class STATUS(models.TextChoices):
         PAID = "paid", "Paid"
@@ -56,18 +57,25 @@ class Invoice(BaseModel):
     def __str__(self):
         return f"Invoice for {self.member.user.first_name}"
 
+    @classmethod
+    def allocate_codes(cls, merchant, count=1):
+        """
+        Reserve `count` invoice codes of a merchant. Codes continue from the
+        merchant's highest invoice code, the first one is `<merchant code>100000`.
+        """
+        codes = SequenceCounter.allocate(
+            f"invoice:{merchant.id}",
+            count,
+            seed=lambda: get_max_code(
+                cls.objects.filter(membership__merchant=merchant), "code"
+            )
+            or int(f"{merchant.code}100000") - 1,
+        )
+        return [str(code) for code in codes]
+
     def save(self, *args, **kwargs):
         if not self.code:
-            invoice = (
-                Invoice.objects.filter(membership__merchant=self.membership.merchant)
-                .order_by("-code")
-                .first()
-            )
-            self.code = (
-                str(int(invoice.code) + 1)
-                if invoice
-                else f"{self.membership.merchant.code}100000"
-            )
+            (self.code,) = Invoice.allocate_codes(self.membership.merchant)
         if self._state.adding:
             if not (self.status == "paid" or self.due_amount):
                 self.due_amount = self.total_amount
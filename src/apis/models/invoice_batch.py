@@ -0,0 +1,52 @@
+from django.db import models
+
+from apis.models.abstract.base import BaseModel
+from apis.models.mixins.background_run import BackgroundRunMixin
+
+
+class InvoiceBatch(BackgroundRunMixin, BaseModel):
+    """
+    One run of monthly invoice generation for a merchant.
+
+    Memberships are processed in `id` order, `chunk_size` at a time, each chunk in
+    its own database transaction. `cursor` is the last membership id committed, so
+    a failed or interrupted batch resumes right after it.
+    """
+
+    class STATUS(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    merchant = models.ForeignKey(
+        "apis.Merchant", on_delete=models.CASCADE, related_name="invoice_batches"
+    )
+    created_by = models.ForeignKey(
+        "apis.MerchantMember",
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="invoice_batches",
+    )
+    month = models.PositiveSmallIntegerField()
+    year = models.PositiveSmallIntegerField()
+    status = models.CharField(
+        max_length=10, choices=STATUS.choices, default=STATUS.PENDING
+    )
+    chunk_size = models.PositiveIntegerField(default=500)
+    cursor = models.CharField(max_length=15, blank=True, default="")
+    is_cancellation_done = models.BooleanField(default=False)
+    total_memberships = models.PositiveIntegerField(default=0)
+    processed_memberships = models.PositiveIntegerField(default=0)
+    invoices_created = models.PositiveIntegerField(default=0)
+    invoices_cancelled = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["merchant", "status"])]
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.month}/{self.year} ({self.status})"
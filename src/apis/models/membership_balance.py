@@ -0,0 +1,271 @@
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from apis.models.abstract.base import BaseModel
+
+
+class MembershipBalance(BaseModel):
+    """
+    Running ledger and supply totals of a membership.
+
+    Every TransactionHistory and SupplyRecord insert/delete moves these totals under
+    a row lock, so a new ledger row reads one balance row instead of re-summing the
+    history, and customer lists filter and order on indexed columns.
+    """
+
+    LEDGER_FIELDS = [
+        "balance",
+        "updated_at",
+        "total_debit",
+        "total_credit",
+        "total_adjustment",
+        "last_payment_date",
+    ]
+    SUPPLY_FIELDS = ["updated_at", "supply_given", "supply_taken", "supply_balance"]
+
+    merchant_membership = models.OneToOneField(
+        "apis.MerchantMembership",
+        on_delete=models.CASCADE,
+        related_name="ledger",
+    )
+    merchant = models.ForeignKey(
+        "apis.Merchant",
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="membership_balances",
+    )
+    total_credit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_debit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_adjustment = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_payment_date = models.DateField(null=True, blank=True)
+    supply_given = models.IntegerField(default=0)
+    supply_taken = models.IntegerField(default=0)
+    # Bottles/units still with the customer (taken - given)
+    supply_balance = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["merchant", "balance"]),
+            models.Index(fields=["merchant", "supply_balance"]),
+            models.Index(fields=["merchant", "last_payment_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_membership_id}: {self.balance}"
+
+    @classmethod
+    def for_update(cls, membership_id):
+        """
+        Return the ledger row of the membership locked with SELECT ... FOR UPDATE.
+        Must be called inside `transaction.atomic()`.
+        """
+        MerchantMembership = apps.get_model("apis", "MerchantMembership")
+        ledger, _ = cls.objects.select_for_update().get_or_create(
+            merchant_membership_id=membership_id,
+            defaults={
+                "merchant_id": lambda: MerchantMembership.objects.values_list(
+                    "merchant_id", flat=True
+                ).get(id=membership_id)
+            },
+        )
+        return ledger
+
+    def apply(self, credit=0, debit=0, adjustment=0, paid_on=None):
+        """
+        Move the totals of a locked ledger row and return the new balance.
+
+        :param paid_on: Local date of the payment when the transaction is a billing credit.
+        """
+        self.total_credit += credit
+        self.total_debit += debit
+        self.total_adjustment += adjustment
+        self.balance = self.total_credit - (self.total_debit - self.total_adjustment)
+        if paid_on and (not self.last_payment_date or paid_on > self.last_payment_date):
+            self.last_payment_date = paid_on
+        self.save(update_fields=self.LEDGER_FIELDS)
+        return self.balance
+
+    def apply_supply(self, given=0, taken=0):
+        """Move the supply totals of a locked ledger row."""
+        self.supply_given += given
+        self.supply_taken += taken
+        self.supply_balance = self.supply_taken - self.supply_given
+        self.save(update_fields=self.SUPPLY_FIELDS)
+
+    def refresh_last_payment_date(self):
+        """
+        Re-read the latest payment date from the ledger, used when the latest
+        payment is taken back out.
+        """
+        TransactionHistory = apps.get_model("apis", "TransactionHistory")
+        last_payment = TransactionHistory.objects.filter(
+            TransactionHistory.PAYMENT_FILTER,
+            merchant_membership_id=self.merchant_membership_id,
+        ).aggregate(last=Max("created_at"))["last"]
+        self.last_payment_date = last_payment and timezone.localdate(last_payment)
+        self.save(update_fields=["updated_at", "last_payment_date"])
+
+    @classmethod
+    def apply_transactions(cls, transactions):
+        """
+        Apply unsaved TransactionHistory objects (used by bulk_create paths) to their
+        ledgers in one locked read and one bulk write, setting `balance` on each object.
+        Must be called inside `transaction.atomic()` before the objects are inserted.
+        """
+        membership_ids = {
+            obj.merchant_membership_id
+            for obj in transactions
+            if obj.merchant_membership_id
+        }
+        if not membership_ids:
+            return
+
+        ledgers = cls._lock_many(membership_ids)
+        for obj in transactions:
+            ledger = ledgers.get(obj.merchant_membership_id)
+            if ledger is None:
+                continue
+            obj._membership_merchant_id = ledger.merchant_id
+            credit, debit, adjustment = obj.get_ledger_deltas()
+            ledger.total_credit += credit
+            ledger.total_debit += debit
+            ledger.total_adjustment += adjustment
+            ledger.balance = ledger.total_credit - (
+                ledger.total_debit - ledger.total_adjustment
+            )
+            obj.balance = ledger.balance
+            paid_on = obj.get_payment_date()
+            if paid_on and (
+                not ledger.last_payment_date or paid_on > ledger.last_payment_date
+            ):
+                ledger.last_payment_date = paid_on
+
+        now = timezone.now()
+        for ledger in ledgers.values():
+            ledger.updated_at = now
+        cls.objects.bulk_update(ledgers.values(), fields=cls.LEDGER_FIELDS)
+
+    @classmethod
+    def _lock_many(cls, membership_ids):
+        """Lock (creating when missing) the ledger rows of several memberships."""
+        queryset = cls.objects.select_for_update().filter(
+            merchant_membership_id__in=membership_ids
+        )
+        # Lock in a stable order so concurrent bulk writers cannot deadlock.
+        ledgers = {
+            ledger.merchant_membership_id: ledger
+            for ledger in queryset.order_by("merchant_membership_id")
+        }
+        for membership_id in sorted(membership_ids - ledgers.keys()):
+            ledgers[membership_id] = cls.for_update(membership_id)
+        return ledgers
+
+    @classmethod
+    def reconcile(cls, memberships, commit=True):
+        """
+        Rebuild the stored totals of the given memberships from the ledger and
+        the supply records.
+
+        :param memberships: MerchantMembership queryset to reconcile.
+        :param commit: When False only report the drift, nothing is written.
+        :return: A list of dicts describing every membership whose stored totals drifted.
+        """
+        SupplyRecord = apps.get_model("apis", "SupplyRecord")
+        TransactionHistory = apps.get_model("apis", "TransactionHistory")
+
+        TYPE = TransactionHistory.TRANSACTION_TYPE
+        drifts = []
+        with transaction.atomic():
+            merchants = dict(memberships.values_list("id", "merchant_id"))
+            membership_ids = set(merchants)
+            ledgers = (
+                cls._lock_many(membership_ids)
+                if commit
+                else {
+                    ledger.merchant_membership_id: ledger
+                    for ledger in cls.objects.filter(
+                        merchant_membership_id__in=membership_ids
+                    )
+                }
+            )
+            totals = {
+                row["merchant_membership"]: row
+                for row in TransactionHistory.objects.filter(
+                    merchant_membership_id__in=membership_ids
+                )
+                .values("merchant_membership")
+                .annotate(
+                    credit=Sum("value", filter=Q(transaction_type=TYPE.CREDIT)),
+                    debit=Sum("value", filter=Q(transaction_type=TYPE.DEBIT)),
+                    adjustment=Sum("value", filter=Q(transaction_type=TYPE.ADJUSTMENT)),
+                    last_payment=Max(
+                        "created_at", filter=TransactionHistory.PAYMENT_FILTER
+                    ),
+                )
+            }
+            supplies = {
+                row["merchant_membership"]: row
+                for row in SupplyRecord.objects.filter(
+                    merchant_membership_id__in=membership_ids
+                )
+                .values("merchant_membership")
+                .annotate(given=Sum("given"), taken=Sum("taken"))
+            }
+
+            changed = []
+            for membership_id in sorted(membership_ids):
+                row = totals.get(membership_id, {})
+                credit = row.get("credit") or Decimal(0)
+                debit = row.get("debit") or Decimal(0)
+                adjustment = row.get("adjustment") or Decimal(0)
+                last_payment = row.get("last_payment")
+                supply = supplies.get(membership_id, {})
+                given = supply.get("given") or 0
+                taken = supply.get("taken") or 0
+                expected = {
+                    "merchant_id": merchants[membership_id],
+                    "total_credit": credit,
+                    "total_debit": debit,
+                    "total_adjustment": adjustment,
+                    "balance": credit - (debit - adjustment),
+                    "last_payment_date": last_payment
+                    and timezone.localdate(last_payment),
+                    "supply_given": given,
+                    "supply_taken": taken,
+                    "supply_balance": taken - given,
+                }
+
+                ledger = ledgers.get(membership_id)
+                if ledger and all(
+                    getattr(ledger, field) == value for field, value in expected.items()
+                ):
+                    continue
+
+                drifts.append(
+                    {
+                        "membership": membership_id,
+                        "stored_balance": ledger.balance if ledger else None,
+                        "ledger_balance": expected["balance"],
+                        "stored_supply_balance": (
+                            ledger.supply_balance if ledger else None
+                        ),
+                        "supply_balance": expected["supply_balance"],
+                    }
+                )
+                if commit:
+                    for field, value in expected.items():
+                        setattr(ledger, field, value)
+                    ledger.updated_at = timezone.now()
+                    changed.append(ledger)
+
+            if changed:
+                cls.objects.bulk_update(
+                    changed,
+                    fields=["merchant"] + cls.LEDGER_FIELDS + cls.SUPPLY_FIELDS[1:],
+                )
+        return drifts
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from apis.models.abstract.base import BaseModel
+from apis.models.sequence_counter import SequenceCounter, get_max_code
 
 
 def get_default_commission_structure():
@@ -62,10 +63,24 @@ class Merchant(BaseModel):
         owner = getattr(self, "owner", None)
         return f"{self.owner.first_name}-{self.name}" if owner else ""
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what members see of the merchant, so other edits don't
+        # invalidate their cached merchant lists
+        instance._stored_listing = (
+            instance.__dict__.get("name"),
+            instance.__dict__.get("type"),
+        )
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.code:
-            last_code = Merchant.objects.aggregate(models.Max("code"))["code__max"]
-            self.code = str(int(last_code) + 1) if last_code else "1000"
+            (code,) = SequenceCounter.allocate(
+                "merchant",
+                seed=lambda: get_max_code(Merchant.objects.all(), "code") or 999,
+            )
+            self.code = str(code)
         super().save(*args, **kwargs)
 
     @property
@@ -0,0 +1,283 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apis.models.invoice import Invoice
+from apis.models.abstract.base import BaseModel
+from apis.models.mixins.uid import bulk_assign_uids
+
+# (membership_id, day) of single invoice writes waiting for their transaction
+# to commit, per thread like the database connections
+_pending_invoice_days = threading.local()
+
+
+def get_day_start(day):
+    """Return the aware datetime of local midnight for a date."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class MerchantDailyRollup(BaseModel):
+    """
+    Pre-aggregated collections and dues of a merchant for one local day.
+
+    Ledger figures (credit, debit, adjustment, commission) are moved incrementally
+    with every TransactionHistory insert/delete. Invoice figures are recomputed
+    for the touched days: by bulk invoice writers in their transaction, and once
+    per transaction after it commits for single invoice saves.
+    """
+
+    TRANSACTION_FIELDS = ("credit", "debit", "adjustment", "commission")
+    INVOICE_FIELDS = ("invoices_issued", "invoiced_amount", "dues_outstanding")
+
+    merchant = models.ForeignKey(
+        "apis.Merchant", on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    day = models.DateField()
+    credit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    debit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    adjustment = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    commission = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    invoices_issued = models.PositiveIntegerField(default=0)
+    invoiced_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    dues_outstanding = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ["merchant", "day"]
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.merchant_id} - {self.day}"
+
+    @classmethod
+    def _ensure_rows(cls, keys):
+        """Create the missing (merchant_id, day) buckets."""
+        now = timezone.now()
+        rows = [
+            cls(merchant_id=merchant_id, day=day, created_at=now)
+            for merchant_id, day in keys
+        ]
+        cls.objects.bulk_create(bulk_assign_uids(rows), ignore_conflicts=True)
+
+    @classmethod
+    def record_transactions(cls, transactions, sign=1):
+        """
+        Add (sign=1) or remove (sign=-1) saved TransactionHistory rows from their
+        merchant's day buckets. Must run in the same database transaction as the write.
+        """
+        buckets = defaultdict(lambda: dict.fromkeys(cls.TRANSACTION_FIELDS, Decimal(0)))
+        for obj in transactions:
+            merchant_id = obj.get_membership_merchant_id()
+            if not merchant_id or not obj.created_at:
+                continue
+            bucket = buckets[(merchant_id, timezone.localdate(obj.created_at))]
+            bucket["commission"] += Decimal(obj.commission) * sign
+            if obj.type == obj.TYPES.BILLING:
+                credit, debit, adjustment = obj.get_ledger_deltas()
+                bucket["credit"] += credit * sign
+                bucket["debit"] += debit * sign
+                bucket["adjustment"] += adjustment * sign
+
+        now = timezone.now()
+
+        def add(keys):
+            """Move the existing buckets, return the keys of the missing ones."""
+            missing = []
+            for merchant_id, day in keys:
+                updated = cls.objects.filter(merchant_id=merchant_id, day=day).update(
+                    updated_at=now,
+                    **{
+                        field: F(field) + amount
+                        for field, amount in buckets[merchant_id, day].items()
+                    },
+                )
+                if not updated:
+                    missing.append((merchant_id, day))
+            return missing
+
+        # The day's bucket exists but for the first write of the day
+        missing = add(buckets)
+        if missing:
+            cls._ensure_rows(missing)
+            add(missing)
+
+    @classmethod
+    def get_invoice_keys(cls, invoices):
+        """Return the (merchant_id, day) buckets the given invoices belong to."""
+        MerchantMembership = apps.get_model("apis", "MerchantMembership")
+        membership_merchants = dict(
+            MerchantMembership.objects.filter(
+                id__in={invoice.membership_id for invoice in invoices}
+            ).values_list("id", "merchant_id")
+        )
+        return {
+            (
+                membership_merchants[invoice.membership_id],
+                timezone.localdate(invoice.created_at),
+            )
+            for invoice in invoices
+            if invoice.membership_id in membership_merchants and invoice.created_at
+        }
+
+    @classmethod
+    def refresh_invoices(cls, keys):
+        """
+        Recompute the invoice figures of the given (merchant_id, day) buckets from
+        the invoices issued on those days.
+        """
+        days_by_merchant = defaultdict(set)
+        for merchant_id, day in keys:
+            days_by_merchant[merchant_id].add(day)
+        if not days_by_merchant:
+            return
+
+        cls._ensure_rows(keys)
+        now = timezone.now()
+        for merchant_id, days in days_by_merchant.items():
+            totals = {
+                row["day"]: row
+                for row in Invoice.objects.filter(
+                    membership__merchant_id=merchant_id,
+                    created_at__gte=get_day_start(min(days)),
+                    created_at__lt=get_day_start(max(days) + timedelta(days=1)),
+                )
+                .exclude(status=Invoice.STATUS.CANCELLED)
+                .annotate(day=TruncDate("created_at"))
+                .values("day")
+                .annotate(
+                    issued=Count("id"),
+                    amount=Sum("total_amount"),
+                    due=Sum("due_amount"),
+                )
+            }
+            for day in days:
+                row = totals.get(day, {})
+                cls.objects.filter(merchant_id=merchant_id, day=day).update(
+                    updated_at=now,
+                    invoices_issued=row.get("issued") or 0,
+                    invoiced_amount=row.get("amount") or 0,
+                    dues_outstanding=row.get("due") or 0,
+                )
+
+    @classmethod
+    def queue_invoice_refresh(cls, invoice):
+        """
+        Remember the bucket of a saved or deleted invoice, for
+        `flush_invoice_refreshes` to recompute once the transaction commits.
+        """
+        if invoice.membership_id and invoice.created_at:
+            if not hasattr(_pending_invoice_days, "keys"):
+                _pending_invoice_days.keys = set()
+            _pending_invoice_days.keys.add(
+                (invoice.membership_id, timezone.localdate(invoice.created_at))
+            )
+
+    @classmethod
+    def flush_invoice_refreshes(cls):
+        """
+        Recompute the queued buckets, each once however many of its invoices
+        were written. Keys left by a rolled back transaction are recomputed
+        too, which changes nothing.
+
+        :return: The ids of the merchants whose buckets were recomputed.
+        """
+        pending = getattr(_pending_invoice_days, "keys", None)
+        if not pending:
+            return set()
+        _pending_invoice_days.keys = set()
+        MerchantMembership = apps.get_model("apis", "MerchantMembership")
+        membership_merchants = dict(
+            MerchantMembership.objects.filter(
+                id__in={membership_id for membership_id, _ in pending}
+            ).values_list("id", "merchant_id")
+        )
+        keys = {
+            (membership_merchants[membership_id], day)
+            for membership_id, day in pending
+            if membership_id in membership_merchants
+        }
+        with transaction.atomic():
+            cls.refresh_invoices(keys)
+        return {merchant_id for merchant_id, _ in keys}
+
+    @classmethod
+    def rebuild(cls, merchant_id=None, since=None):
+        """
+        Rebuild buckets from the raw ledger and invoices.
+
+        :param merchant_id: Only rebuild this merchant's buckets.
+        :param since: Only rebuild buckets from this date onwards.
+        :return: The number of buckets written.
+        """
+        TransactionHistory = apps.get_model("apis", "TransactionHistory")
+        TYPE = TransactionHistory.TRANSACTION_TYPE
+        BILLING = Q(type=TransactionHistory.TYPES.BILLING)
+
+        rollups = cls.objects.all()
+        transactions = TransactionHistory.objects.filter(
+            merchant_membership__isnull=False, created_at__isnull=False
+        )
+        invoices = Invoice.objects.filter(
+            membership__isnull=False, created_at__isnull=False
+        ).exclude(status=Invoice.STATUS.CANCELLED)
+        if merchant_id:
+            rollups = rollups.filter(merchant_id=merchant_id)
+            transactions = transactions.filter(
+                merchant_membership__merchant_id=merchant_id
+            )
+            invoices = invoices.filter(membership__merchant_id=merchant_id)
+        if since:
+            rollups = rollups.filter(day__gte=since)
+            transactions = transactions.filter(created_at__gte=get_day_start(since))
+            invoices = invoices.filter(created_at__gte=get_day_start(since))
+
+        buckets = {}
+
+        def get_bucket(merchant, day):
+            if (merchant, day) not in buckets:
+                buckets[(merchant, day)] = cls(
+                    merchant_id=merchant, day=day, created_at=timezone.now()
+                )
+            return buckets[(merchant, day)]
+
+        for row in (
+            transactions.annotate(day=TruncDate("created_at"))
+            .values("merchant_membership__merchant", "day")
+            .annotate(
+                credit=Sum("value", filter=BILLING & Q(transaction_type=TYPE.CREDIT)),
+                debit=Sum("value", filter=BILLING & Q(transaction_type=TYPE.DEBIT)),
+                adjustment=Sum(
+                    "value", filter=BILLING & Q(transaction_type=TYPE.ADJUSTMENT)
+                ),
+                commission=Sum("commission"),
+            )
+        ):
+            bucket = get_bucket(row["merchant_membership__merchant"], row["day"])
+            for field in cls.TRANSACTION_FIELDS:
+                setattr(bucket, field, row[field] or 0)
+
+        for row in (
+            invoices.annotate(day=TruncDate("created_at"))
+            .values("membership__merchant", "day")
+            .annotate(
+                invoices_issued=Count("id"),
+                invoiced_amount=Sum("total_amount"),
+                dues_outstanding=Sum("due_amount"),
+            )
+        ):
+            bucket = get_bucket(row["membership__merchant"], row["day"])
+            for field in cls.INVOICE_FIELDS:
+                setattr(bucket, field, row[field] or 0)
+
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create(
+                bulk_assign_uids(list(buckets.values())), batch_size=1000
+            )
+        return len(buckets)
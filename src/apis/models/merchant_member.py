@@ -1,6 +1,7 @@
 from django.db import models
 
 from apis.models.abstract.base import BaseModel
+from apis.models.sequence_counter import SequenceCounter, get_max_code
 
 
 class MerchantMember(BaseModel):
@@ -21,6 +22,9 @@ class MerchantMember(BaseModel):
         max_length=10, verbose_name="Primary Phone", unique=True
     )
     code = models.CharField(max_length=6, unique=True, editable=False)
+    # Bumped when the member's roles or merchant change, so access tokens carrying
+    # older claims stop being trusted
+    access_version = models.PositiveIntegerField(default=0, editable=False)
     merchant_memberships = models.ManyToManyField(
         "apis.Merchant",
         through="MerchantMembership",
@@ -57,10 +61,18 @@ class MerchantMember(BaseModel):
     def __str__(self):
         return f"{self.code}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored merchant so a staff move can revoke the access claims
+        instance._stored_merchant_id = instance.__dict__.get("merchant_id")
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.code:
-            last_code = MerchantMember.objects.aggregate(models.Max("code"))[
-                "code__max"
-            ]
-            self.code = str(int(last_code) + 1) if last_code else "1000"
+            (code,) = SequenceCounter.allocate(
+                "merchant_member",
+                seed=lambda: get_max_code(MerchantMember.objects.all(), "code") or 999,
+            )
+            self.code = str(code)
         super().save(*args, **kwargs)
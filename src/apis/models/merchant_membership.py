@@ -3,7 +3,8 @@ from django.db.models import Sum
 from django.utils import timezone
 from apis.models.merchant import Merchant
 from apis.models.abstract.base import BaseModel
-from apis.models.transaction_history import TransactionHistory
+from apis.models.membership_balance import MembershipBalance
+from apis.models.sequence_counter import SequenceCounter, get_max_code
 
 
 class MerchantMembership(BaseModel):
@@ -44,11 +45,18 @@ class MerchantMembership(BaseModel):
 
     def save(self, *args, **kwargs):
         if not self.account:
-            last_account = MerchantMembership.objects.aggregate(models.Max("account"))[
-                "account__max"
-            ]
-            self.account = str(int(last_account) + 1) if last_account else "10000"
+            (account,) = SequenceCounter.allocate(
+                "merchant_membership",
+                seed=lambda: get_max_code(MerchantMembership.objects.all(), "account")
+                or 9999,
+            )
+            self.account = str(account)
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if adding:
+            MembershipBalance.objects.get_or_create(
+                merchant_membership=self, defaults={"merchant_id": self.merchant_id}
+            )
 
     @property
     def total_supply_given(self):
@@ -60,9 +68,9 @@ class MerchantMembership(BaseModel):
         now = timezone.now()
         month = getattr(self, "_supply_month", now.month)
         year = getattr(self, "_supply_year", now.year)
-        total = self.supply_records.filter(
-            created_at__year=year, created_at__month=month
-        ).aggregate(given=Sum("given"))
+        total = self.supply_records.filter(day__year=year, day__month=month).aggregate(
+            given=Sum("given")
+        )
         return total["given"] or 0
 
     @property
@@ -72,26 +80,18 @@ class MerchantMembership(BaseModel):
 
     @property
     def total_credit(self):
-        return (
-            self.transactions.filter(
-                type=TransactionHistory.TRANSACTION_TYPE.CREDIT
-            ).aggregate(Sum("value"))["value__sum"]
-            or 0
-        )
+        ledger = getattr(self, "ledger", None)
+        return ledger.total_credit if ledger else 0
 
     @property
     def total_debit(self):
-        total_debit = (
-            self.transactions.filter(
-                type=TransactionHistory.TRANSACTION_TYPE.DEBIT
-            ).aggregate(Sum("value"))["value__sum"]
-            or 0
-        )
-        return total_debit
+        ledger = getattr(self, "ledger", None)
+        return ledger.total_debit if ledger else 0
 
     @property
     def total_balance(self):
-        return self.total_credit - self.total_debit
+        ledger = getattr(self, "ledger", None)
+        return ledger.balance if ledger else 0
 
     def calculate_invoice(self):
         if self.merchant.is_fixed_fee_merchant or self.is_monthly:
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+class BackgroundRunMixin:
+    """
+    For models of runs executed in a background thread or a command, with a
+    `STATUS` of pending/running/completed/failed.
+
+    Every chunk a run commits saves it, so `updated_at` is its heartbeat. A
+    pending or running row not saved for `STALE_AFTER` belongs to a process
+    that died or was redeployed mid-run: it no longer blocks new runs and the
+    `process_background_runs` worker resumes it.
+    """
+
+    STALE_AFTER = timedelta(minutes=10)
+
+    @classmethod
+    def get_stale_before(cls):
+        return timezone.now() - cls.STALE_AFTER
+
+    @classmethod
+    def filter_active(cls, queryset):
+        return queryset.filter(status__in=[cls.STATUS.PENDING, cls.STATUS.RUNNING])
+
+    @classmethod
+    def filter_live(cls, queryset):
+        """Active runs that made progress recently, a process still works on them."""
+        return cls.filter_active(queryset).filter(
+            updated_at__gte=cls.get_stale_before()
+        )
+
+    @classmethod
+    def fail_interrupted(cls, queryset):
+        """
+        Mark the active runs that stopped making progress as failed, so they
+        show as resumable.
+        """
+        now = timezone.now()
+        return (
+            cls.filter_active(queryset)
+            .filter(updated_at__lt=now - cls.STALE_AFTER)
+            .update(
+                status=cls.STATUS.FAILED,
+                error="Interrupted, the run stopped making progress.",
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+
+    @classmethod
+    def has_live_run(cls, queryset):
+        """
+        Whether one of the runs is live, once the interrupted ones are failed.
+        Call it with the row owning the runs locked, e.g. the merchant, before
+        creating a run, so concurrent starts are serialized.
+        """
+        cls.fail_interrupted(queryset)
+        return cls.filter_live(queryset).exists()
+
+    @classmethod
+    def claim_next(cls):
+        """
+        Mark the oldest run waiting for a worker as running and return it: a
+        pending one, or an active one that stopped making progress. None when
+        no run waits, runs locked by another worker are skipped.
+        """
+        with transaction.atomic():
+            run = (
+                cls.filter_active(cls.objects.all())
+                .filter(
+                    Q(status=cls.STATUS.PENDING)
+                    | Q(updated_at__lt=cls.get_stale_before())
+                )
+                .select_related("merchant")
+                .select_for_update(skip_locked=True, of=("self",))
+                .order_by("created_at")
+                .first()
+            )
+            if run is not None:
+                run.status = cls.STATUS.RUNNING
+                run.save(update_fields=["status", "updated_at"])
+        return run
+
+    def requeue(self):
+        """Hand a run its worker stopped in the middle of back to the next worker."""
+        type(self).objects.filter(id=self.id, status=self.STATUS.RUNNING).update(
+            status=self.STATUS.PENDING, updated_at=timezone.now()
+        )
+
+    @property
+    def is_live(self):
+        return (
+            self.status in (self.STATUS.PENDING, self.STATUS.RUNNING)
+            and self.updated_at >= self.get_stale_before()
+        )
@@ -1,53 +1,188 @@
-import shortuuid
+import time
+import string
+import secrets
+import threading
 from collections import Counter
+
+from django.db import IntegrityError, transaction
+
 from apis.common.contants import MODEL_CODES
 
+BASE62_ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase
+# Digits and one letter case sort the same under the "C" collation and the
+# linguistic ones (en_US.UTF-8, ICU) Postgres databases are usually created with.
+BASE36_ALPHABET = string.digits + string.ascii_uppercase
+# 2024-01-01T00:00:00Z, start of the timestamps of sortable UIDs
+SORTABLE_UID_EPOCH_MS = 1_704_067_200_000
+# Tries of a bulk insert whose fresh UIDs collide with stored rows
+BULK_UID_ATTEMPTS = 3
+
+
+def validate_model_codes(model_codes):
+    """
+    Ensure every model code is a unique 3 digit string, so prefixed UIDs of
+    different models can never collide.
+    """
+    repeated = [
+        item for item, count in Counter(model_codes.values()).items() if count > 1
+    ]
+    if repeated:
+        raise ValueError(
+            f"Model codes must be unique. The following code(s) are repeated: {', '.join(repeated)}."
+        )
+    invalid = [
+        name
+        for name, code in model_codes.items()
+        if not (isinstance(code, str) and len(code) == 3 and code.isdigit())
+    ]
+    if invalid:
+        raise ValueError(
+            f"Model codes must be 3 digit strings. Invalid code(s) for: {', '.join(invalid)}."
+        )
+
+
+validate_model_codes(MODEL_CODES)
+
+
+class UIDGenerator:
+    """
+    Generates `<prefix><timestamp><random>` UIDs that sort by creation time.
+
+    The timestamp is the current time in milliseconds and the random part is
+    drawn fresh every millisecond. Within one millisecond the random part is
+    incremented instead, so UIDs of a process are strictly increasing and never
+    repeat.
+
+    Across processes nothing is checked up front. A clash needs the same
+    millisecond and overlapping random runs: rare for single saves, which
+    insert without a prior UPDATE so a clash raises instead of overwriting the
+    stored row, but a real risk for two large bulk inserts, which go through
+    `bulk_create_with_uids` and retry with fresh UIDs.
+    """
+
+    def __init__(self, alphabet, time_length, random_length, epoch_ms=0):
+        self.alphabet = alphabet
+        self.time_length = time_length
+        self.random_length = random_length
+        self.epoch_ms = epoch_ms
+        self.random_limit = len(alphabet) ** random_length
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._last_random = 0
+
+    def encode(self, number, length):
+        base = len(self.alphabet)
+        chars = []
+        for _ in range(length):
+            number, remainder = divmod(number, base)
+            chars.append(self.alphabet[remainder])
+        return "".join(reversed(chars))
+
+    def _next(self):
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000 - self.epoch_ms
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._last_random = secrets.randbelow(self.random_limit)
+            else:
+                self._last_random += 1
+                if self._last_random >= self.random_limit:
+                    # Random space of this millisecond exhausted, borrow the next one
+                    self._last_ms += 1
+                    self._last_random = secrets.randbelow(self.random_limit)
+            return self._last_ms, self._last_random
+
+    def generate(self, prefix):
+        timestamp, random = self._next()
+        return (
+            prefix
+            + self.encode(timestamp, self.time_length)
+            + self.encode(random, self.random_length)
+        )
+
+
+# 7 base62 characters hold millisecond timestamps until the year 2081
+uid_generator = UIDGenerator(BASE62_ALPHABET, time_length=7, random_length=5)
+# 8 base36 characters hold millisecond timestamps from 2024 until the year 2113
+sortable_uid_generator = UIDGenerator(
+    BASE36_ALPHABET,
+    time_length=8,
+    random_length=4,
+    epoch_ms=SORTABLE_UID_EPOCH_MS,
+)
+
+UID_GENERATORS = {
+    "default": uid_generator,
+    "sortable": sortable_uid_generator,
+}
+
 
 class UIDMixin:
-    UID_PREFIX = None  # This should be defined in the model inheriting from UIDMixin.
+    # "sortable" opts a model into upper case base36 UIDs, whose byte order and
+    # collation order are both creation order, so inserts append to the PK index.
+    # Existing rows keep their ids, only new rows use the model's scheme.
+    UID_SCHEME = "default"
+    _uid_prefixes = {}
+
+    @classmethod
+    def get_uid_prefix(cls):
+        """Return the model's code from MODEL_CODES, resolved once per class."""
+        prefix = cls._uid_prefixes.get(cls)
+        if prefix is None:
+            prefix = MODEL_CODES.get(cls.__name__)
+            if prefix is None:
+                raise ValueError(f"{cls.__name__} has no code in MODEL_CODES.")
+            if cls.UID_SCHEME not in UID_GENERATORS:
+                raise ValueError(
+                    f"{cls.__name__} has an unknown UID_SCHEME {cls.UID_SCHEME!r}."
+                )
+            cls._uid_prefixes[cls] = prefix
+        return prefix
+
+    @classmethod
+    def generate_uid(cls):
+        return UID_GENERATORS[cls.UID_SCHEME].generate(cls.get_uid_prefix())
 
     def set_uid(self):
         """
-        Generates and assigns a unique ID (UID) to the object if it doesn't already have one.
-        The UID consists of a prefix and a randomly generated short UUID.
+        Assigns a UID to the object if it doesn't already have one.
+        The UID consists of the model code followed by a time-ordered suffix.
 
         :return: The generated or existing UID of the object.
         """
+        if not self.id:
+            self.id = self.generate_uid()
+        return self.id
 
-        # Find the items that are repeated
-        repeated = [
-            item for item, count in Counter(MODEL_CODES.values()).items() if count > 1
-        ]
-        if repeated:
-            raise ValueError(
-                f"Model codes must be unique. The following code(s) are repeated: {', '.join(repeated)}."
-            )
-
-        self.UID_PREFIX = MODEL_CODES.get(self.__class__.__name__)
 
-        # Ensure that the model has a valid UID_PREFIX
-        if not isinstance(self.UID_PREFIX, str) or not self.UID_PREFIX:
-            raise ValueError("UID_PREFIX is required and must be a non-empty string.")
+def bulk_assign_uids(objs):
+    """
+    Assign UIDs to unsaved objects before `bulk_create()`, which does not call save().
 
-        # Ensure the prefix has a minimum length of 4 characters
-        if len(self.UID_PREFIX) < 3:
-            raise ValueError("UID_PREFIX must be at least 4 characters long.")
+    :return: The same objects.
+    """
+    for obj in objs:
+        obj.set_uid()
+    return objs
 
-        # Only set the UID if it doesn't exist
-        if not self.id:
-            self.id = self._generate_unique_uid()
 
-        return self.id
+def bulk_create_with_uids(model, objs, **kwargs):
+    """
+    `bulk_create()` objects, assigning UIDs to the ones without. When a UID
+    collides with a row another process just inserted, the statement is rolled
+    back to a savepoint and retried with fresh UIDs.
 
-    def _generate_unique_uid(self):
-        """
-        Generates a unique UID by combining the UID_PREFIX and a random short UUID.
-        Ensures the UID is unique in the database.
-
-        :return: A unique UID.
-        """
-        uid = self.UID_PREFIX + shortuuid.ShortUUID().random(length=12)
-        # Ensure the generated UID is unique in the model's database
-        while self.__class__.objects.filter(id=uid).exists():
-            uid = self.UID_PREFIX + shortuuid.ShortUUID().random(length=12)
-        return uid
+    :param kwargs: Keyword arguments of `bulk_create()`.
+    :return: The created objects.
+    """
+    assigned = [obj for obj in objs if not obj.id]
+    for attempt in range(BULK_UID_ATTEMPTS):
+        for obj in assigned:
+            obj.id = obj.generate_uid()
+        try:
+            with transaction.atomic():
+                return model.objects.bulk_create(objs, **kwargs)
+        except IntegrityError:
+            collided = model.objects.filter(id__in=[obj.id for obj in assigned])
+            if attempt + 1 == BULK_UID_ATTEMPTS or not collided.exists():
+                raise
@@ -0,0 +1,74 @@
+from django.db import models
+
+from apis.models.abstract.base import BaseModel
+
+
+class OutboundMessage(BaseModel):
+    """
+    A notification waiting to be delivered, or delivered, by the
+    `send_outbound_messages` worker.
+
+    Requests only insert rows, the worker claims `pending` messages whose
+    `available_at` has passed, higher `priority` first, and retries failed
+    deliveries with a backoff. Messages sent for a merchant count against its
+    concurrency cap. `latency_ms` is the time from enqueueing to a successful
+    delivery.
+    """
+
+    class CHANNEL(models.TextChoices):
+        EMAIL = "email", "Email"
+        SMS = "sms", "SMS"
+        WHATSAPP = "whatsapp", "WhatsApp"
+
+    class KIND(models.TextChoices):
+        OTP = "otp", "OTP"
+        REMINDER = "reminder", "Reminder"
+
+    class STATUS(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    member = models.ForeignKey(
+        "apis.MerchantMember",
+        on_delete=models.CASCADE,
+        related_name="outbound_messages",
+    )
+    merchant = models.ForeignKey(
+        "apis.Merchant",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="outbound_messages",
+    )
+    campaign = models.ForeignKey(
+        "apis.ReminderCampaign",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="messages",
+    )
+    channel = models.CharField(max_length=10, choices=CHANNEL.choices)
+    kind = models.CharField(max_length=10, choices=KIND.choices)
+    priority = models.PositiveSmallIntegerField(default=0)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS.choices, default=STATUS.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField()
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+            models.Index(fields=["channel", "created_at"]),
+        ]
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.kind} via {self.channel} to {self.member_id} ({self.status})"
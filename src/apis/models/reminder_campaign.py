@@ -0,0 +1,59 @@
+from django.db import models
+
+from apis.models.abstract.base import BaseModel
+from apis.models.mixins.background_run import BackgroundRunMixin
+from apis.models.outbound_message import OutboundMessage
+
+
+class ReminderCampaign(BackgroundRunMixin, BaseModel):
+    """
+    One run of payment reminders to the customers of a merchant with unpaid
+    invoices due at least `overdue_days` ago.
+
+    Memberships are selected in `id` order, `chunk_size` at a time, and their
+    reminders are queued as outbound messages spread `rate_per_minute` apart.
+    `cursor` is the last membership id queued, so a failed or interrupted
+    campaign resumes right after it. Delivery results are read from the campaign's messages.
+    """
+
+    class CHANNEL(models.TextChoices):
+        # Outbound channels able to send a rendered text, WhatsApp has no transport yet
+        EMAIL = OutboundMessage.CHANNEL.EMAIL.value, "Email"
+        SMS = OutboundMessage.CHANNEL.SMS.value, "SMS"
+
+    class STATUS(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    merchant = models.ForeignKey(
+        "apis.Merchant", on_delete=models.CASCADE, related_name="reminder_campaigns"
+    )
+    created_by = models.ForeignKey(
+        "apis.MerchantMember",
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="reminder_campaigns",
+    )
+    channel = models.CharField(max_length=10, choices=CHANNEL.choices)
+    overdue_days = models.PositiveSmallIntegerField(default=0)
+    min_due_amount = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    rate_per_minute = models.PositiveIntegerField(default=600)
+    status = models.CharField(
+        max_length=10, choices=STATUS.choices, default=STATUS.PENDING
+    )
+    chunk_size = models.PositiveIntegerField(default=1000)
+    cursor = models.CharField(max_length=15, blank=True, default="")
+    total_memberships = models.PositiveIntegerField(default=0)
+    processed_memberships = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["merchant", "status"])]
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.merchant_id} reminders via {self.channel} ({self.status})"
@@ -0,0 +1,57 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast
+
+from apis.models.abstract.base import BaseModel
+
+
+def get_max_code(queryset, field):
+    """Return the largest numeric value of a code column, or None when empty."""
+    return queryset.aggregate(
+        max_code=Max(Cast(field, output_field=BigIntegerField()))
+    )["max_code"]
+
+
+class SequenceCounter(BaseModel):
+    """
+    Last value handed out for a named code sequence (merchant codes, member
+    codes, membership accounts and per-merchant invoice codes).
+
+    Values are allocated under a row lock, so concurrent writers never read the
+    same "last code", and a whole block is reserved with one locked update.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
+    @classmethod
+    def allocate(cls, key, count=1, seed=None):
+        """
+        Reserve `count` consecutive values of a sequence.
+
+        :param key: Name of the sequence.
+        :param count: Number of values to reserve.
+        :param seed: Callable returning the last value already in use, only called
+            the first time the sequence is used.
+        :return: The reserved values as a range.
+        """
+        with transaction.atomic():
+            counter = cls.objects.select_for_update().filter(key=key).first()
+            if counter is None:
+                counter = cls._create(key, seed() if seed else 0)
+            first = counter.value + 1
+            counter.value += count
+            counter.save(update_fields=["value", "updated_at"])
+        return range(first, first + count)
+
+    @classmethod
+    def _create(cls, key, value):
+        """Create a sequence row, or lock the one a concurrent writer just created."""
+        try:
+            with transaction.atomic():
+                return cls.objects.create(key=key, value=value)
+        except IntegrityError:
+            return cls.objects.select_for_update().get(key=key)
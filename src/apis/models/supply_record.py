@@ -1,21 +1,196 @@
-from django.db import models
+from auditlog.cid import get_cid
+from auditlog.context import auditlog_disabled
+from auditlog.diff import model_instance_diff
+from auditlog.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.utils import timezone
 
 from apis.models.abstract.base import BaseModel
+from apis.models.mixins.uid import bulk_create_with_uids
+from apis.models.membership_balance import MembershipBalance
 
 
 class SupplyRecord(BaseModel):
+    """Units given to and taken from a customer on one local day, one row per day."""
+
+    UID_SCHEME = "sortable"
+
     merchant_membership = models.ForeignKey(
         "apis.MerchantMembership",
         on_delete=models.CASCADE,
         related_name="supply_records",
     )
+    day = models.DateField()
     given = models.SmallIntegerField(default=0)
     taken = models.SmallIntegerField(default=0)
 
     def __str__(self):
         return f"Supply for {self.merchant_membership.member.user.first_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored quantities so save() only moves the difference
+        instance._stored_supply = (
+            instance.__dict__.get("given", 0),
+            instance.__dict__.get("taken", 0),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        stored_given, stored_taken = getattr(self, "_stored_supply", (0, 0))
+        if self._state.adding:
+            stored_given = stored_taken = 0
+        if self.day is None:
+            self.day = timezone.localdate(self.created_at or timezone.now())
+        with transaction.atomic():
+            ledger = MembershipBalance.for_update(self.merchant_membership_id)
+            ledger.apply_supply(self.given - stored_given, self.taken - stored_taken)
+            super().save(*args, **kwargs)
+        self._stored_supply = (self.given, self.taken)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ledger = MembershipBalance.for_update(self.merchant_membership_id)
+            stored_given, stored_taken = getattr(
+                self, "_stored_supply", (self.given, self.taken)
+            )
+            ledger.apply_supply(-stored_given, -stored_taken)
+            return super().delete(*args, **kwargs)
+
+    @classmethod
+    def upsert(cls, records, fields=("given", "taken")):
+        """
+        Insert or overwrite the records of each (membership, day) in one
+        `INSERT ... ON CONFLICT DO UPDATE` statement, and move the supply totals
+        of the memberships by the difference with the stored quantities.
+
+        Like other bulk writes this skips the model signals, callers bump the
+        cached versions of the memberships. The audit log entries the signals
+        would have written are written here, in one more statement.
+
+        :param records: Unsaved records with `merchant_membership_id`, `day`,
+            `given` and `taken` set, at most one per (membership, day).
+        :param fields: The quantities the records set, the others keep the
+            stored value of an overwritten row.
+        :return: The records, with the `id` and `created_at` of the rows they
+            overwrote.
+        """
+        if not records:
+            return records
+        now = timezone.now()
+        membership_ids = {record.merchant_membership_id for record in records}
+        with transaction.atomic():
+            # Every supply writer locks the ledgers first, so the stored rows
+            # cannot change between this read and the upsert.
+            ledgers = MembershipBalance._lock_many(membership_ids)
+            keys = {(record.merchant_membership_id, record.day) for record in records}
+            stored = {
+                (membership_id, day): row
+                for membership_id, day, *row in cls.objects.filter(
+                    merchant_membership_id__in=membership_ids,
+                    day__in={day for _, day in keys},
+                ).values_list(
+                    "merchant_membership_id",
+                    "day",
+                    "id",
+                    "created_at",
+                    "given",
+                    "taken",
+                )
+                if (membership_id, day) in keys
+            }
+
+            for record in records:
+                ledger = ledgers[record.merchant_membership_id]
+                _, created_at, stored_given, stored_taken = stored.get(
+                    (record.merchant_membership_id, record.day), (None, now, 0, 0)
+                )
+                record.created_at = created_at
+                if "given" not in fields:
+                    record.given = stored_given
+                if "taken" not in fields:
+                    record.taken = stored_taken
+                record.updated_at = now
+                ledger.supply_given += record.given - stored_given
+                ledger.supply_taken += record.taken - stored_taken
+                ledger.supply_balance = ledger.supply_taken - ledger.supply_given
+                ledger.updated_at = now
+
+            bulk_create_with_uids(
+                cls,
+                records,
+                update_conflicts=True,
+                unique_fields=["merchant_membership", "day"],
+                update_fields=["given", "taken", "updated_at"],
+            )
+            MembershipBalance.objects.bulk_update(
+                ledgers.values(), fields=MembershipBalance.SUPPLY_FIELDS
+            )
+            for record in records:
+                # Overwritten rows keep their id, the UID assigned above went unused
+                stored_row = stored.get((record.merchant_membership_id, record.day))
+                if stored_row:
+                    record.id = stored_row[0]
+                record._state.adding = False
+                record._stored_supply = (record.given, record.taken)
+            cls.log_upserts(records, stored)
+        return records
+
+    @classmethod
+    def log_upserts(cls, records, stored):
+        """
+        Write the audit log entries of upserted records: a creation, or the
+        stored to new `given`/`taken` of an overwritten row.
+
+        :param stored: (id, created_at, given, taken) of the overwritten rows
+            by (membership id, day).
+        """
+        if auditlog_disabled.get():
+            return
+        names = dict(
+            cls.merchant_membership.field.related_model.objects.filter(
+                id__in={record.merchant_membership_id for record in records}
+            ).values_list("id", "member__user__first_name")
+        )
+        content_type = ContentType.objects.get_for_model(cls)
+        cid = get_cid()
+        entries = []
+        for record in records:
+            stored_row = stored.get((record.merchant_membership_id, record.day))
+            if stored_row is None:
+                action = LogEntry.Action.CREATE
+                changes = model_instance_diff(None, record)
+            else:
+                _, created_at, given, taken = stored_row
+                stored_record = cls(
+                    id=record.id,
+                    merchant_membership_id=record.merchant_membership_id,
+                    day=record.day,
+                    given=given,
+                    taken=taken,
+                )
+                action = LogEntry.Action.UPDATE
+                changes = model_instance_diff(
+                    stored_record, record, fields_to_check=["given", "taken"]
+                )
+                if not changes:
+                    continue
+            entries.append(
+                LogEntry(
+                    content_type=content_type,
+                    object_pk=record.id,
+                    object_repr=f"Supply for {names[record.merchant_membership_id]}",
+                    action=action,
+                    changes=changes,
+                    cid=cid,
+                )
+            )
+        LogEntry.objects.bulk_create(entries)
+
     class Meta:
+        unique_together = ["merchant_membership", "day"]
         indexes = [
             models.Index(fields=["merchant_membership", "created_at"]),
             models.Index(fields=["-created_at"]),
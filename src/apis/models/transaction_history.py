@@ -1,14 +1,19 @@
 from decimal import Decimal
 
-from django.db import models
-from django.db.models import Sum
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 
 from apis.models.invoice import Invoice
 from apis.models.abstract.base import BaseModel
+from apis.models.mixins.uid import bulk_create_with_uids
+from apis.models.membership_balance import MembershipBalance
+from apis.models.merchant_daily_rollup import MerchantDailyRollup
 
 
 class TransactionHistory(BaseModel):
-    UID_PREFIX = 106
+    UID_SCHEME = "sortable"
 
     class TYPES(models.TextChoices):
         COMMISSION = "commission", "Commission"
@@ -20,6 +25,9 @@ class TransactionHistory(BaseModel):
         REFUND = "refund", "Refund"
         ADJUSTMENT = "adjustment", "Adjustment"
 
+    # Billing credits are the payments received from a customer
+    PAYMENT_FILTER = Q(type=TYPES.BILLING, transaction_type=TRANSACTION_TYPE.CREDIT)
+
     merchant_membership = models.ForeignKey(
         "apis.MerchantMembership",
         null=True,
@@ -52,49 +60,72 @@ class TransactionHistory(BaseModel):
     def __str__(self):
         return f"{self.id}"
 
-    def adjust_credit_debit_balance(self):
+    def get_ledger_deltas(self):
         """
-        Calculate the balance for this membership by summing all previous debits and credits.
-        The balance is calculated by subtracting total debit from total credit.
+        Return the (credit, debit, adjustment) amounts this transaction adds to
+        its membership ledger.
         """
-        # Calculate total debit and credit for this merchant_membership
-        total_debit = (
-            self.merchant_membership.membership_transactions.filter(
-                transaction_type=self.TRANSACTION_TYPE.DEBIT
-            ).aggregate(total_debit=Sum("value", default=0))["total_debit"]
-            or 0
-        )
-
-        # Calculate total credit for this merchant_membership
-        total_credit = (
-            self.merchant_membership.membership_transactions.filter(
-                transaction_type=self.TRANSACTION_TYPE.CREDIT
-            ).aggregate(total_credit=Sum("value", default=0))["total_credit"]
-            or 0
-        )
-
-        total_adjustment = (
-            self.merchant_membership.membership_transactions.filter(
-                transaction_type=self.TRANSACTION_TYPE.ADJUSTMENT
-            ).aggregate(total_adjustmnet=Sum("value", default=0))["total_adjustmnet"]
-            or 0
-        )
-
-        # Include the current transaction's debit or credit
-        credit = debit = adjustment = 0
+        credit = debit = adjustment = Decimal(0)
         if self.transaction_type == self.TRANSACTION_TYPE.CREDIT:
-            credit = self.value
+            credit = Decimal(self.value)
         if self.transaction_type == self.TRANSACTION_TYPE.DEBIT:
-            debit = self.value
+            debit = Decimal(self.value)
         if self.transaction_type == self.TRANSACTION_TYPE.ADJUSTMENT:
-            adjustment = self.value
+            adjustment = Decimal(self.value)
+        return credit, debit, adjustment
+
+    def get_payment_date(self):
+        """Return the local date of this transaction when it is a customer payment."""
+        is_payment = (
+            self.type == self.TYPES.BILLING
+            and self.transaction_type == self.TRANSACTION_TYPE.CREDIT
+        )
+        if is_payment and self.created_at:
+            return timezone.localdate(self.created_at)
+        return None
+
+    def get_membership_merchant_id(self):
+        """
+        Merchant of the transaction's membership, known from the ledger row
+        locked by the write, or read without loading the membership.
+        """
+        merchant_id = getattr(self, "_membership_merchant_id", None)
+        if merchant_id is None and self.merchant_membership_id:
+            MerchantMembership = apps.get_model("apis", "MerchantMembership")
+            merchant_id = self._membership_merchant_id = (
+                MerchantMembership.objects.filter(id=self.merchant_membership_id)
+                .values_list("merchant_id", flat=True)
+                .first()
+            )
+        return merchant_id
 
-        total_debit += debit
-        total_credit += credit
-        total_adjustment += adjustment
+    def adjust_credit_debit_balance(self):
+        """
+        Add this transaction to the membership's running ledger and store the
+        resulting balance (credit - (debit - adjustment)).
+        Must run inside the same database transaction as the insert.
+        """
+        self.created_at = self.created_at or timezone.now()
+        ledger = MembershipBalance.for_update(self.merchant_membership_id)
+        self._membership_merchant_id = ledger.merchant_id
+        self.balance = ledger.apply(
+            *self.get_ledger_deltas(), paid_on=self.get_payment_date()
+        )
 
-        # Update the balance
-        self.balance = total_credit - (total_debit - total_adjustment)
+    @classmethod
+    def bulk_record(cls, transactions):
+        """
+        Insert unsaved transactions in one statement, moving the membership ledgers
+        and the merchant daily rollups in the same database transaction.
+        """
+        now = timezone.now()
+        for obj in transactions:
+            obj.created_at = obj.created_at or now
+        with transaction.atomic():
+            MembershipBalance.apply_transactions(transactions)
+            created = bulk_create_with_uids(cls, transactions)
+            MerchantDailyRollup.record_transactions(created)
+        return created
 
     def calculate_commission(self):
         """
@@ -131,18 +162,21 @@ class TransactionHistory(BaseModel):
                 return tier["commission"]
         return 0
 
-    def apply_payment(self):
-        # Get all unpaid invoices, ordered by created at date (oldest first)
+    def allocate_payment(self, invoices, created_by=None, handled_by=None):
+        """
+        Settle unpaid invoices oldest first with this payment, in memory.
 
-        merchant_membership = self.merchant_membership
-        invoices = merchant_membership.member.invoices.filter(status="unpaid").order_by(
-            "created_at"
-        )
+        :param invoices: Unpaid invoices ordered by creation (oldest first).
+        :return: A tuple (changed invoices, metadata of the payment).
+        """
+        now = timezone.now()
         remaining_payment = self.value
+        changed = []
         paid_invoices = []
         previous_invoice_state = []
-        # Save the previous state of the invoices
         for invoice in invoices:
+            if remaining_payment <= 0:
+                break
             previous_invoice_state.append(
                 {
                     "id": invoice.id,
@@ -150,81 +184,106 @@ class TransactionHistory(BaseModel):
                     "due_amount": str(invoice.due_amount),
                 }
             )
-
-        for invoice in invoices:
             if remaining_payment >= invoice.due_amount:
                 remaining_payment -= invoice.due_amount
                 invoice.due_amount = 0
                 invoice.status = Invoice.STATUS.PAID
-                invoice.handled_by=self._merchant_member
-                invoice.metadata['mark_as_paid_by'] = self._created_by
-                invoice.save()
-                paid_invoices.append(
-                    {
-                        "code": invoice.code,
-                        "status": invoice.status,
-                        "due_amount": str(invoice.due_amount),
-                        "total_amount": str(invoice.total_amount),
-                        "created_at": invoice.created_at.isoformat(),
-                        "updated_at": invoice.updated_at.isoformat(),
-                        "metadata": invoice.metadata
-                    }
-                )
             else:
                 invoice.due_amount -= remaining_payment
                 invoice.status = Invoice.STATUS.UNPAID
-                invoice.handled_by=self._merchant_member
-                invoice.metadata = invoice.metadata or {}
-                invoice.metadata['mark_as_paid_by'] = self._created_by
-                invoice.save()
-                paid_invoices.append(
-                    {
-                        "code": invoice.code,
-                        "status": invoice.status,
-                        "due_amount": str(invoice.due_amount),
-                        "total_amount": str(invoice.total_amount),
-                        "created_at": invoice.created_at.isoformat(),
-                        "updated_at": invoice.updated_at.isoformat(),
-                        "metadata": invoice.metadata
-                    }
-                )
-                break
-        self.metadata = {
-            "created_by": self._created_by,
+                remaining_payment = 0
+            invoice.handled_by = handled_by
+            invoice.metadata = invoice.metadata or {}
+            invoice.metadata["mark_as_paid_by"] = created_by
+            invoice.updated_at = now
+            changed.append(invoice)
+            paid_invoices.append(
+                {
+                    "code": invoice.code,
+                    "status": invoice.status,
+                    "due_amount": str(invoice.due_amount),
+                    "total_amount": str(invoice.total_amount),
+                    "created_at": invoice.created_at.isoformat(),
+                    "updated_at": invoice.updated_at.isoformat(),
+                    "metadata": invoice.metadata,
+                }
+            )
+        metadata = {
+            "created_by": created_by,
             "invoices": paid_invoices,
             "previous_invoice_state": previous_invoice_state,
         }
-        self.save()
-
-    def revert_transaction(self):
-        # Retrieve the previous state from metadata
-        previous_invoice_state = self.metadata.get("previous_invoice_state", [])
+        return changed, metadata
 
-        # Prepare a list to hold the invoices that need to be updated
-        invoices_to_update = []
-
-        # Collect the invoices based on their ids
-        invoice_ids = [invoice["id"] for invoice in previous_invoice_state]
-        invoices = (
-            Invoice.objects.filter(id__in=invoice_ids)
-            .exclude(status=Invoice.STATUS.CANCELLED)
-            .order_by("created_at")
-        )
+    def apply_payment(self, created_by=None, handled_by=None):
+        """
+        Insert this unsaved payment and settle the membership's unpaid invoices
+        with it (FIFO), under the membership's ledger lock.
 
-        # Iterate through the invoices and update the status and due_amount
-        for invoice, invoice_data in zip(invoices, previous_invoice_state):
-            invoice.status = invoice_data["status"]
-            invoice.due_amount = invoice_data["due_amount"]
-            invoices_to_update.append(invoice)
+        The allocation is computed in memory, the touched invoices are written with
+        one bulk_update and the payment is inserted once, metadata included.
+        """
+        with transaction.atomic():
+            # Serializes payments of the membership so two can't settle the same invoice
+            MembershipBalance.for_update(self.merchant_membership_id)
+            invoices = Invoice.objects.filter(
+                membership_id=self.merchant_membership_id,
+                status=Invoice.STATUS.UNPAID,
+            ).order_by("created_at")
+            changed, self.metadata = self.allocate_payment(
+                invoices, created_by=created_by, handled_by=handled_by
+            )
+            if changed:
+                Invoice.objects.bulk_update(
+                    changed,
+                    fields=[
+                        "status",
+                        "metadata",
+                        "due_amount",
+                        "updated_at",
+                        "handled_by",
+                    ],
+                )
+                MerchantDailyRollup.refresh_invoices(
+                    MerchantDailyRollup.get_invoice_keys(changed)
+                )
+            self.save()
+        return self
 
-        # Perform a bulk update on the invoices
-        if invoices_to_update:
-            Invoice.objects.bulk_update(
-                invoices_to_update, fields=["status", "due_amount"]
+    def revert_transaction(self):
+        """
+        Restore the invoices this payment settled to their previous state and
+        delete the payment.
+        """
+        metadata = self.metadata or {}
+        previous_invoice_state = {
+            invoice["id"]: invoice
+            for invoice in metadata.get("previous_invoice_state", [])
+        }
+        with transaction.atomic():
+            MembershipBalance.for_update(self.merchant_membership_id)
+            invoices_to_update = list(
+                Invoice.objects.filter(id__in=previous_invoice_state).exclude(
+                    status=Invoice.STATUS.CANCELLED
+                )
             )
+            now = timezone.now()
+            for invoice in invoices_to_update:
+                invoice_data = previous_invoice_state[invoice.id]
+                invoice.status = invoice_data["status"]
+                invoice.due_amount = invoice_data["due_amount"]
+                invoice.updated_at = now
+
+            if invoices_to_update:
+                Invoice.objects.bulk_update(
+                    invoices_to_update, fields=["status", "due_amount", "updated_at"]
+                )
+                MerchantDailyRollup.refresh_invoices(
+                    MerchantDailyRollup.get_invoice_keys(invoices_to_update)
+                )
 
-        # Delete the current transaction object
-        self.delete()  # This will delete the current transaction history record
+            # Delete the current transaction object
+            self.delete()
 
     def save(self, *args, **kwargs):
         billing = self.type == self.TYPES.BILLING
@@ -233,9 +292,30 @@ class TransactionHistory(BaseModel):
         if self._state.adding:
             if billing and is_credit:
                 self.commission = self.calculate_commission()
-            self.adjust_credit_debit_balance()
+            if self.merchant_membership_id:
+                with transaction.atomic():
+                    self.adjust_credit_debit_balance()
+                    super().save(*args, **kwargs)
+                    MerchantDailyRollup.record_transactions([self])
+                return
         super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        # Take this transaction back out of the membership's running ledger
+        with transaction.atomic():
+            if self.merchant_membership_id:
+                credit, debit, adjustment = self.get_ledger_deltas()
+                ledger = MembershipBalance.for_update(self.merchant_membership_id)
+                self._membership_merchant_id = ledger.merchant_id
+                ledger.apply(-credit, -debit, -adjustment)
+                MerchantDailyRollup.record_transactions([self], sign=-1)
+                paid_on = self.get_payment_date()
+                deleted = super().delete(*args, **kwargs)
+                if paid_on and paid_on == ledger.last_payment_date:
+                    ledger.refresh_last_payment_date()
+                return deleted
+            return super().delete(*args, **kwargs)
+
     class Meta:
         get_latest_by = "created_at"
         indexes = [
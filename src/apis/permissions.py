@@ -1,11 +1,14 @@
 from django.apps import apps
 from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
 from rest_framework import exceptions
 from rest_framework import permissions
 
 from apis.models.member_role import RoleChoices
 from apis.models.merchant_member import MerchantMember
 from apis.models.merchant_membership import MerchantMembership
+from apis.utils.customer_cache import get_public_customer
+from apis.utils.request_context import get_request_access
 
 
 class IsAllowedToLogin(permissions.BasePermission):
@@ -44,14 +47,19 @@ class IsMerchantOrStaff(permissions.BasePermission):
             raise exceptions.NotFound({"detail": ["Matching id not found."]})
         return instance
 
+    def get_request_merchant_id(self, request):
+        """Id of the merchant the user owns or is staff of, from the cached access."""
+        access = get_request_access(request)
+        if not access["merchant_id"] and access["is_staff"]:
+            raise exceptions.NotFound({"detail": ["Merchant not found."]})
+        return access["merchant_id"]
+
     def get_request_merchant(self, request):
-        merchant = getattr(request.user, "merchant", None)
-        if not merchant:
-            if request.user.profile.roles.filter(role=RoleChoices.STAFF).exists():
-                merchant = request.user.profile.merchant
-                if not merchant:
-                    raise exceptions.NotFound({"detail": ["Merchant not found."]})
-        return merchant
+        merchant_id = self.get_request_merchant_id(request)
+        if not merchant_id:
+            return None
+        Merchant = apps.get_model("apis", "Merchant")
+        return Merchant.objects.filter(id=merchant_id).first()
 
     def get_merchant(self, request, view):
         match request.path:
@@ -68,53 +76,72 @@ class IsMerchantOrStaff(permissions.BasePermission):
             case str(s) if s.startswith("/api/members/"):
                 if not hasattr(request, "merchant"):
                     member_id = view.kwargs.get("pk") or view.kwargs.get("member_id")
-                    merchant = self.get_request_merchant(request)
+                    merchant_id = self.get_request_merchant_id(request)
                     if request.query_params.get("role") == RoleChoices.STAFF:
-                        queryset = merchant.staff_members.all()
+                        queryset = MerchantMember.objects.select_related(
+                            "merchant"
+                        ).filter(merchant_id=merchant_id)
                         member = self.get_instance(queryset, member_id)
-                        if member:
-                            request.member = member
-                            request.merchant = merchant
+                        request.member = member
+                        request.merchant = member.merchant
                     else:
-                        queryset = merchant.members.all()
+                        queryset = MerchantMembership.objects.select_related(
+                            "merchant", "member"
+                        ).filter(merchant_id=merchant_id)
                         membership = self.get_instance(queryset, member_id, "member_id")
-                        if membership:
-                            request.merchant = merchant
-                            request.membership = membership
-                            request.member = membership.member
+                        request.merchant = membership.merchant
+                        request.membership = membership
+                        request.member = membership.member
                 merchant = request.merchant
 
             case str(s) if s.startswith("/api/invoices/"):
                 if not hasattr(request, "invoice"):
                     Invoice = apps.get_model("apis", "Invoice")
                     invoice_id = view.kwargs.get("pk") or view.kwargs.get("invoice_id")
-                    merchant = self.get_request_merchant(request)
-                    queryset = Invoice.objects.all()
-                    invoice = self.get_instance(queryset, invoice_id)
-                    queryset = merchant.members.all()
-                    membership = self.get_instance(
-                        queryset, invoice.member.id, "member_id"
+                    merchant_id = self.get_request_merchant_id(request)
+                    # The invoice, its membership and merchant in one query
+                    queryset = Invoice.objects.select_related(
+                        "membership__merchant", "membership__member"
                     )
-                    if membership:
-                        request.membership = membership
-                        request.merchant = merchant
+                    invoice = self.get_instance(queryset, invoice_id)
+                    membership = invoice.membership
+                    if membership is None:
+                        # Older invoices only point at the member
+                        queryset = MerchantMembership.objects.select_related(
+                            "merchant", "member"
+                        ).filter(merchant_id=merchant_id)
+                        membership = self.get_instance(
+                            queryset, invoice.member_id, "member_id"
+                        )
+                    elif membership.merchant_id != merchant_id:
+                        raise exceptions.NotFound(
+                            {"detail": ["Matching id not found."]}
+                        )
+                    request.invoice = invoice
+                    request.membership = membership
+                    request.merchant = membership.merchant
                 merchant = request.merchant
 
             case str(s) if s.startswith("/api/transaction-history/"):
-                if not hasattr(request, "transaction-history"):
+                if not hasattr(request, "transaction"):
                     TransactionHistory = apps.get_model("apis", "TransactionHistory")
                     transaction_id = view.kwargs.get("pk") or view.kwargs.get(
                         "transaction_id"
                     )
-                    merchant = self.get_request_merchant(request)
-                    queryset = TransactionHistory.objects.all()
+                    merchant_id = self.get_request_merchant_id(request)
+                    # The transaction, its membership and merchant in one query
+                    queryset = TransactionHistory.objects.select_related(
+                        "merchant_membership__merchant", "merchant_membership__member"
+                    )
                     transaction = self.get_instance(queryset, transaction_id)
-                    member_id = transaction.merchant_membership.member.id
-                    queryset = merchant.members.all()
-                    membership = self.get_instance(queryset, member_id, "member_id")
-                    if membership:
-                        request.membership = membership
-                        request.merchant = merchant
+                    membership = transaction.merchant_membership
+                    if membership is None or membership.merchant_id != merchant_id:
+                        raise exceptions.NotFound(
+                            {"detail": ["Matching id not found."]}
+                        )
+                    request.transaction = transaction
+                    request.membership = membership
+                    request.merchant = membership.merchant
                 merchant = request.merchant
 
             case str(s) if s.startswith("/api/auth/"):
@@ -137,15 +164,12 @@ class IsMerchantOrStaff(permissions.BasePermission):
             return False
 
         # Check if the user is a merchant
-        if merchant.owner == request.user:
+        if merchant.owner_id == request.user.id:
             return merchant
 
         # Check if the user is a staff member for the merchant
-        # Assuming `request.user.profile.roles` contains the user's roles,
-        # and the role is of type 'Staff' and associated with the merchant
-        if request.user.profile.roles.filter(
-            role=RoleChoices.STAFF, member__merchant=merchant
-        ).exists():
+        access = get_request_access(request)
+        if access["is_staff"] and access["staff_merchant_id"] == merchant.id:
             return merchant
 
     def has_permission(self, request, view):
@@ -188,18 +212,28 @@ class IsCustomer(permissions.BasePermission):
         merchant_id = view.kwargs.get("merchant_id")
         customer_code = view.kwargs.get("customer_code")
 
-        # Retrieve the MerchantMember based on the provided customer code
-        member = MerchantMember.objects.filter(code=customer_code).first()
+        # Resolve the customer code from the cache, it is dropped when roles change
+        customer = get_public_customer(customer_code, merchant_id)
 
-        if not member:
+        if not customer:
             raise exceptions.NotFound({"detail": ["Customer not found."]})
 
-        if not member.roles.filter(role=RoleChoices.CUSTOMER).exists():
+        if not customer["is_customer"]:
             raise exceptions.NotFound({"detail": ["Member is not a Customer."]})
 
-        membership = MerchantMembership.objects.filter(
-            member=member, merchant__id=merchant_id
-        ).first()
-        request.member = member
-        request.membership = membership
+        # Only loaded when the response is not served from the cache
+        membership_id = customer["membership_id"]
+        request.customer = customer
+        request.member = SimpleLazyObject(
+            lambda: MerchantMember.objects.get(id=customer["member_id"])
+        )
+        request.membership = (
+            SimpleLazyObject(
+                lambda: MerchantMembership.objects.select_related("merchant").get(
+                    id=membership_id
+                )
+            )
+            if membership_id
+            else None
+        )
         return True
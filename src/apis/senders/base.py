@@ -5,3 +5,8 @@ class OTPSender(ABC):
     @abstractmethod
     def send_otp(self, recipient: str, otp: str) -> None:
         pass
+
+    @abstractmethod
+    def send_message(self, recipient: str, subject: str, body: str) -> None:
+        """Send an already rendered message, `subject` is only used by email."""
+        pass
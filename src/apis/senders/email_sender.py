@@ -1,44 +1,49 @@
 from django.conf import settings
 from django.template.loader import render_to_string
-from django.core.mail import EmailMessage, get_connection
+from django.core.mail import EmailMessage
 
 from apis.senders.base import OTPSender
+from apis.senders.transports import get_smtp_transport
 from apis.models.merchant_member import MerchantMember
 
 
 class EmailOTPSender(OTPSender):
     def send_otp(self, member: MerchantMember, otp: str) -> None:
         merchant = member.merchant
+        subject = f"Your OTP code from {merchant.name}"
+        html_message = render_to_string(
+            "emails/otp_email.html",
+            {
+                "merchant_name": merchant.name,
+                "otp": otp,
+                "recipient_name": member.user.first_name,
+            },
+        )
+        self.send_message(member, subject, html_message)
+
+    def send_message(self, member: MerchantMember, subject: str, body: str) -> None:
         # email_configs = merchant.configs.filter(config_type="email")
         # email_settings = {config.key: config.value for config in email_configs}
         email_settings = {}
 
         from_email = email_settings.get("USER", settings.DEFAULT_EMAIL_USER)
 
-        connection = get_connection(
+        # Config values are strings, the default setting a boolean
+        use_tls = email_settings.get("EMAIL_USE_TLS", settings.DEFAULT_EMAIL_TLS)
+        # Shared by every send of this process, the connection stays open
+        transport = get_smtp_transport(
             username=from_email,
-            use_tls=email_settings.get("EMAIL_USE_TLS", "True") == "True",
+            use_tls=str(use_tls) == "True",
             host=email_settings.get("EMAIL_HOST", settings.DEFAULT_EMAIL_HOST),
             port=int(email_settings.get("EMAIL_PORT", settings.DEFAULT_EMAIL_PORT)),
             password=email_settings.get("PASSWORD", settings.DEFAULT_EMAIL_PASSWORD),
         )
 
-        subject = f"Your OTP code from {merchant.name}"
-        html_message = render_to_string(
-            "emails/otp_email.html",
-            {
-                "merchant_name": merchant.name,
-                "otp": otp,
-                "recipient_name": member.user.first_name,
-            },
-        )
-
         email = EmailMessage(
             subject=subject,
-            body=html_message,
+            body=body,
             from_email=f"Wasooli.Online <{from_email}>",
             to=[member.user.email],
-            connection=connection,
         )
         email.content_subtype = "html"
-        email.send(fail_silently=False)
+        transport.send_messages([email])
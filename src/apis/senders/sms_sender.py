@@ -1,11 +1,12 @@
 import os
 import json
-import requests
 
 from apis.senders.base import OTPSender
+from apis.senders.transports import HTTP_TIMEOUT, get_http_session
 from apis.models.merchant_member import MerchantMember
 
 SMS_OTP_API_KEY = os.getenv("SMS_OTP_API_KEY")
+SMS_OTP_API_URL = os.getenv("SMS_OTP_API_URL", "https://sendpk.com/api/sms.php")
 
 
 class SmsOTPSender(OTPSender):
@@ -13,14 +14,28 @@ class SmsOTPSender(OTPSender):
         phone_number = member.primary_phone
         name = member.user.first_name
         message = json.dumps({"name": name, "pin": otp})
-        api_url = (
-            f"https://sendpk.com/api/sms.php?"
-            f"api_key={SMS_OTP_API_KEY}&sender=BrandName&mobile=92{phone_number}"
-            f"&template_id=10052&message={message}&format=json"
-        )
-        response = requests.get(api_url)
+        response = self.send_request(phone_number, message, template_id=10052)
 
         return {
             "message": "OTP sent successfully!",
             "api_response": response.text,
         }
+
+    def send_message(self, member: MerchantMember, subject: str, body: str) -> None:
+        self.send_request(member.primary_phone, body)
+
+    def send_request(self, phone_number, message, **params):
+        params = {
+            "api_key": SMS_OTP_API_KEY,
+            "sender": "BrandName",
+            "mobile": f"92{phone_number}",
+            "message": message,
+            "format": "json",
+            **params,
+        }
+        # Pooled keep-alive connection, raises so the outbound worker retries
+        response = get_http_session().get(
+            SMS_OTP_API_URL, params=params, timeout=HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        return response
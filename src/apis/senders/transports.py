@@ -0,0 +1,110 @@
+import smtplib
+import threading
+
+import requests
+from django.core.mail import get_connection
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds
+HTTP_TIMEOUT = (3.05, 10)
+SMTP_TIMEOUT = 10
+
+_lock = threading.Lock()
+_smtp_transports = {}
+_http_session = None
+
+
+class SMTPTransport:
+    """
+    An SMTP connection kept open across sends, so only the first message pays
+    for the TCP/TLS handshake and login. A connection dropped by the server
+    (idle timeout, restart) is reopened and the send retried once.
+
+    :param options: Keyword arguments of `django.core.mail.get_connection`.
+    """
+
+    RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+    def __init__(self, **options):
+        self.backend = get_connection(
+            fail_silently=False, timeout=SMTP_TIMEOUT, **options
+        )
+        self.lock = threading.Lock()
+        self.is_open = False
+
+    def send_messages(self, messages):
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    if not self.is_open:
+                        # Opened outside send_messages(), which would close it
+                        self.backend.open()
+                        self.is_open = True
+                    return self.backend.send_messages(messages)
+                except self.RECONNECT_ERRORS:
+                    self.close_connection()
+                    if attempt:
+                        raise
+
+    def close_connection(self):
+        self.is_open = False
+        self.backend.close()
+
+    def close(self):
+        with self.lock:
+            self.close_connection()
+
+
+def get_smtp_transport(**options):
+    """Return this process's shared SMTP transport for the given connection options."""
+    key = tuple(sorted(options.items()))
+    with _lock:
+        transport = _smtp_transports.get(key)
+        if transport is None:
+            transport = _smtp_transports[key] = SMTPTransport(**options)
+        return transport
+
+
+def get_http_session():
+    """
+    Return this process's shared HTTP session. Connections are pooled and kept
+    alive per host; failed connects and 429/503 answers, which the provider
+    sends before doing anything, are retried a few times with a backoff. Reads
+    and gateway errors (502/504) are never retried since the provider may
+    already have sent the message.
+    """
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            retry = Retry(
+                total=3,
+                connect=3,
+                read=0,
+                status=2,
+                status_forcelist=(429, 503),
+                allowed_methods=None,
+                backoff_factor=0.5,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=4, pool_maxsize=10, max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def close_transports():
+    """Close the shared SMTP connections and HTTP session, e.g. when a worker exits."""
+    global _http_session
+    with _lock:
+        transports = list(_smtp_transports.values())
+        _smtp_transports.clear()
+        session, _http_session = _http_session, None
+    for transport in transports:
+        transport.close()
+    if session is not None:
+        session.close()
@@ -5,3 +5,7 @@ class WhatsAppOTPSender(OTPSender):
     def send_otp(self, recipient: str, otp: str) -> None:
         # WhatsApp API integration logic
         print(f"WhatsApp OTP sent to {recipient}: {otp}")
+
+    def send_message(self, recipient: str, subject: str, body: str) -> None:
+        # No WhatsApp transport yet, the message is retried and then marked failed
+        raise RuntimeError("WhatsApp messages can not be sent yet.")
@@ -4,7 +4,10 @@ from apis.serializers.invoice import InvoiceSerializer
 from apis.serializers.access_info import AccessInfoSerializer
 from apis.serializers.member_role import MemberRoleSerializer
 from apis.serializers.refresh_token import RefreshTokenSerializer
-from apis.serializers.supply_record import SupplyRecordSerializer
+from apis.serializers.supply_record import (
+    BulkSupplyRecordSerializer,
+    SupplyRecordSerializer,
+)
 from apis.serializers.presigned_url import PreSignedUrlSerializer
 from apis.serializers.member_profile import MemberProfileSerializer
 from apis.serializers.merchant_member import MerchantMemberSerializer
@@ -18,6 +21,7 @@ from apis.serializers.membership_status_change import MembershipStatusChangeSeri
 from apis.serializers.monthly_membership_invoice import (
     MonthlyMembershipInvoiceSerializer,
 )
+from apis.serializers.reminder_campaign import ReminderCampaignSerializer
 
 __all__ = [
     "UserSerializer",
@@ -27,6 +31,7 @@ __all__ = [
     "MemberRoleSerializer",
     "FakeInvoiceSerializer",
     "SupplyRecordSerializer",
+    "BulkSupplyRecordSerializer",
     "RefreshTokenSerializer",
     "PreSignedUrlSerializer",
     "MemberProfileSerializer",
@@ -38,4 +43,5 @@ __all__ = [
     "MerchantMembershipSerializer",
     "MembershipStatusChangeSerializer",
     "MonthlyMembershipInvoiceSerializer",
+    "ReminderCampaignSerializer",
 ]
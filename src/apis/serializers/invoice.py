@@ -79,11 +79,8 @@ class InvoiceSerializer(serializers.ModelSerializer):
         merchant_membership = request.merchant.members.filter(
             member=request.member
         ).first()
-        try:
-            latest_transaction = merchant_membership.membership_transactions.latest()
-            latest_transaction_balance = latest_transaction.balance
-        except TransactionHistory.DoesNotExist:
-            latest_transaction_balance = 0
+        ledger = getattr(merchant_membership, "ledger", None)
+        latest_transaction_balance = ledger.balance if ledger else 0
 
         if latest_transaction_balance > 0:
             if validated_data.get("total_amount") <= latest_transaction_balance:
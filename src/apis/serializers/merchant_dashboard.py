@@ -17,3 +17,4 @@ class MerchantDashboardSerializer(serializers.Serializer):
     total_customers = DashboardMetricSerializer()
     active_customers = DashboardMetricSerializer()
     non_active_customers = DashboardMetricSerializer()
+    generated_at = serializers.DateTimeField()
@@ -1,6 +1,7 @@
 import re
 import secrets
 from rest_framework import serializers
+from django.db.models import Prefetch
 from django.contrib.auth.models import User
 
 from apis.models.otp import OTP
@@ -84,11 +85,33 @@ class MerchantMemberSerializer(serializers.ModelSerializer):
     def get_otp(self, obj):
         return getattr(obj.otp, "code", None) if hasattr(obj, "otp") else None
 
+    @staticmethod
+    def get_membership_prefetch(merchant):
+        """
+        Prefetch the member's membership of `merchant` (with the merchant) into
+        `current_memberships`, read by `get_merchant_memberships`.
+        """
+        return Prefetch(
+            "memberships",
+            queryset=MerchantMembership.objects.filter(
+                merchant=merchant
+            ).select_related("merchant"),
+            to_attr="current_memberships",
+        )
+
     def get_merchant_memberships(self, obj) -> dict:
         request = self.context.get("request")
         role = request.query_params.get("role", None)
         if role != RoleChoices.STAFF:
-            membership = request.merchant.members.filter(member=obj).first()
+            memberships = getattr(obj, "current_memberships", None)
+            if memberships is None:
+                membership = (
+                    request.merchant.members.select_related("merchant")
+                    .filter(member=obj)
+                    .first()
+                )
+            else:
+                membership = memberships[0] if memberships else None
             return MerchantMembershipSerializer(membership).data
         return {}
 
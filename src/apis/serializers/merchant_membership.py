@@ -2,8 +2,8 @@ import re
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer, ValidationError
 
-from apis.models.lookup import Lookup
 from apis.models.merchant_membership import MerchantMembership
+from apis.utils.lookup_index import get_or_create_city_area
 
 from services.s3 import S3Service
 from drf_spectacular.utils import extend_schema_field
@@ -64,16 +64,8 @@ class MerchantMembershipSerializer(ModelSerializer):
         if area.replace(" ", "").isdigit():
             raise ValidationError({"area": "Area cannot be a number."})
 
-        # 'city' is the type name for cities
-        type = Lookup.objects.get(name="city")  # Ensure this exists as a city type
-        city_type = None
-        if not Lookup.objects.filter(name=city, type=type).exists():
-            city_type = Lookup.objects.create(name=city, type=type)
-        else:
-            city_type = Lookup.objects.filter(name=city, type=type).first()
-
-        if not Lookup.objects.filter(name=area, type_id=city_type.id).exists():
-            Lookup.objects.create(name=area, type=city_type)
+        # Creates the city/area lookups when new, known ones cost no queries
+        get_or_create_city_area(city, area)
         return data
 
     def validate_actual_price(self, value):
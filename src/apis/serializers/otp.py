@@ -8,7 +8,9 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from apis.models.otp import OTP
 from django.conf import settings
-from apis.factories import OTPSenderFactory
+from apis.models.outbound_message import OutboundMessage
+from apis.utils.outbound import enqueue_otp
+from apis.utils.request_context import set_access_claims
 
 
 
@@ -19,7 +21,9 @@ class OTPSerializer(serializers.Serializer):
     message = serializers.CharField(read_only=True)
     remaining_time = serializers.CharField(read_only=True)
 
-    platform = serializers.CharField(default="email", write_only=True)
+    platform = serializers.ChoiceField(
+        choices=OutboundMessage.CHANNEL.choices, default="email", write_only=True
+    )
     otp = serializers.CharField(
         max_length=6, required=False, write_only=True, allow_null=True
     )
@@ -45,7 +49,8 @@ class OTPSerializer(serializers.Serializer):
             if not otp_record.is_valid():
                 raise ValidationError({"otp": ["OTP expired"]})
 
-            refresh = RefreshToken.for_user(request.member.user)
+            user = request.member.user
+            refresh = set_access_claims(RefreshToken.for_user(user), user.id)
             # otp_record.is_used = True
             # otp_record.save()
             return {
@@ -60,7 +65,7 @@ class OTPSerializer(serializers.Serializer):
                 return {"message": "Please wait 2 minutes before trying again.", "remaining_time": remaining_time}
 
             otp = otp_record.generate_otp()
-            sender = OTPSenderFactory.get_sender(platform)
-            sender.send_otp(request.member, otp)
+            # Delivered by the `send_outbound_messages` worker, off the request path
+            enqueue_otp(request.member, otp, platform)
 
             return {"message": "OTP sent successfully!"}
@@ -0,0 +1,68 @@
+from django.db import transaction
+from rest_framework import serializers
+
+from apis.models.merchant import Merchant
+from apis.models.reminder_campaign import ReminderCampaign
+from apis.utils.reminder_campaign import get_campaign_results
+
+
+class ReminderCampaignResultsSerializer(serializers.Serializer):
+    sent = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    queued = serializers.IntegerField()
+
+
+class ReminderCampaignSerializer(serializers.ModelSerializer):
+    rate_per_minute = serializers.IntegerField(
+        min_value=1, max_value=6000, required=False, default=600
+    )
+    chunk_size = serializers.IntegerField(
+        min_value=1, max_value=5000, required=False, default=1000
+    )
+    results = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReminderCampaign
+        fields = [
+            "id",
+            "channel",
+            "overdue_days",
+            "min_due_amount",
+            "rate_per_minute",
+            "status",
+            "chunk_size",
+            "total_memberships",
+            "processed_memberships",
+            "results",
+            "error",
+            "started_at",
+            "finished_at",
+            "created_at",
+        ]
+        read_only_fields = [
+            "status",
+            "total_memberships",
+            "processed_memberships",
+            "error",
+            "started_at",
+            "finished_at",
+            "created_at",
+        ]
+
+    def get_results(self, campaign) -> ReminderCampaignResultsSerializer:
+        return get_campaign_results(campaign)
+
+    def create(self, validated_data):
+        request = self.context["request"]
+        with transaction.atomic():
+            # Serializes concurrent requests, only one of them starts a campaign
+            merchant = Merchant.objects.select_for_update().get(id=request.merchant.id)
+            if ReminderCampaign.has_live_run(merchant.reminder_campaigns.all()):
+                raise serializers.ValidationError(
+                    {"detail": ["Reminders are already being queued."]}
+                )
+            return ReminderCampaign.objects.create(
+                merchant=merchant,
+                created_by=request.user.profile,
+                **validated_data,
+            )
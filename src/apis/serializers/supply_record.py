@@ -1,44 +1,134 @@
 from django.utils import timezone
 from rest_framework import serializers
 from apis.models.supply_record import SupplyRecord
+from apis.utils.customer_cache import bump_membership_versions
+
+
+def validate_supply_day(day):
+    if day > timezone.localdate():
+        raise serializers.ValidationError("Supply can't be recorded for a future day.")
+    return day
 
 
 class SupplyRecordSerializer(serializers.ModelSerializer):
+    day = serializers.DateField(required=False)
+
     class Meta:
         model = SupplyRecord
         fields = [
             "id",
+            "day",
             "given",
             "taken",
             "created_at",
             "updated_at",
         ]
 
+    def validate_day(self, day):
+        return validate_supply_day(day)
+
     def create(self, validated_data):
         request = self.context["request"]
         member_ship = request.membership
 
-        # Get today's date
-        today = timezone.now().date()
+        # One record per day: a new one, or the quantities sent overwritten in
+        # the day's record
+        validated_data.setdefault("day", timezone.localdate())
+        (supply_record,) = SupplyRecord.upsert(
+            [SupplyRecord(merchant_membership_id=member_ship.id, **validated_data)],
+            fields=[field for field in ("given", "taken") if field in validated_data],
+        )
+        bump_membership_versions(member_ship.id)
+        return supply_record
+
+
+class SupplyEntrySerializer(serializers.Serializer):
+    account = serializers.CharField(max_length=6)
+    given = serializers.IntegerField(min_value=0, max_value=32767, default=0)
+    taken = serializers.IntegerField(min_value=0, max_value=32767, default=0)
+    day = serializers.DateField(required=False)
+
+    def validate_day(self, day):
+        return validate_supply_day(day)
+
+
+class SupplyEntryResultSerializer(serializers.Serializer):
+    account = serializers.CharField()
+    day = serializers.DateField()
+    status = serializers.ChoiceField(choices=["saved", "rejected"])
+    error = serializers.CharField(allow_null=True)
+    record = SupplyRecordSerializer(allow_null=True)
 
-        # Try to retrieve an existing supply record for today
-        supply_record, created = SupplyRecord.objects.get_or_create(
-            merchant_membership=member_ship,
-            created_at__date=today,  # Filter to get record for the current day
-            defaults=validated_data,  # Defaults used only if a new object is created
+
+class BulkSupplyRecordSerializer(serializers.Serializer):
+    MAX_ENTRIES = 500
+
+    entries = SupplyEntrySerializer(
+        many=True, min_length=1, max_length=MAX_ENTRIES, write_only=True
+    )
+    saved = serializers.IntegerField(read_only=True)
+    rejected = serializers.IntegerField(read_only=True)
+    results = SupplyEntryResultSerializer(many=True, read_only=True)
+
+    def validate(self, attrs):
+        if self.context["request"].merchant.is_fixed_fee_merchant:
+            raise serializers.ValidationError(
+                {"detail": ["Supply is only recorded for milk and water merchants."]}
+            )
+        return attrs
+
+    def create(self, validated_data):
+        merchant = self.context["request"].merchant
+        today = timezone.localdate()
+        entries = validated_data["entries"]
+        for entry in entries:
+            entry.setdefault("day", today)
+
+        # Every account of the route checked against the merchant in one query
+        memberships = dict(
+            merchant.members.filter(
+                account__in={entry["account"] for entry in entries}
+            ).values_list("account", "id")
         )
+        # The last entry of an account and day wins, like repeated single posts
+        last_entries = {
+            (entry["account"], entry["day"]): index
+            for index, entry in enumerate(entries)
+        }
 
-        if not created:
-            # Check if the date of the existing record is different from today
-            if supply_record.created_at.date() != today:
-                # If the date is different, create a new record
-                supply_record = SupplyRecord.objects.create(
-                    merchant_membership=member_ship, **validated_data
-                )
+        results, records = [], {}
+        for index, entry in enumerate(entries):
+            result = {
+                "account": entry["account"],
+                "day": entry["day"],
+                "status": "rejected",
+                "error": None,
+                "record": None,
+            }
+            membership_id = memberships.get(entry["account"])
+            if membership_id is None:
+                result["error"] = "No customer of the merchant has this account."
+            elif last_entries[entry["account"], entry["day"]] != index:
+                result["error"] = "Replaced by a later entry for the same day."
             else:
-                # If the record is from today, update it
-                for key, value in validated_data.items():
-                    setattr(supply_record, key, value)
-                supply_record.save()
+                result["status"] = "saved"
+                records[index] = SupplyRecord(
+                    merchant_membership_id=membership_id,
+                    day=entry["day"],
+                    given=entry["given"],
+                    taken=entry["taken"],
+                )
+            results.append(result)
 
-        return supply_record
+        SupplyRecord.upsert(list(records.values()))
+        # upsert() skips the model signals that bump the cached versions
+        bump_membership_versions(
+            *{record.merchant_membership_id for record in records.values()}
+        )
+        for index, record in records.items():
+            results[index]["record"] = record
+        return {
+            "saved": len(records),
+            "rejected": len(results) - len(records),
+            "results": results,
+        }
@@ -43,11 +43,10 @@ class TransactionHistorySerializer(serializers.ModelSerializer):
         validated_data["merchant_membership"] = request.membership
         validated_data["type"] = TransactionHistory.TYPES.BILLING
         validated_data["transaction_type"] = TransactionHistory.TRANSACTION_TYPE.CREDIT
-        transaction = super().create(validated_data)
-        transaction._created_by = request.user.first_name
-        transaction._merchant_member = request.user.profile
-        transaction.apply_payment()
-        return transaction
+        transaction = TransactionHistory(**validated_data)
+        return transaction.apply_payment(
+            created_by=request.user.first_name, handled_by=request.user.profile
+        )
 
     def update(self, instance, validated_data):
         instance.revert_transaction()  # This deletes the instance as well
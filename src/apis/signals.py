@@ -1,12 +1,123 @@
 import os
 
 from django.apps import apps
+from django.db import transaction
 from django.dispatch import receiver
 from django.core.management import call_command
-from django.db.models.signals import post_migrate
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_migrate, post_save, post_delete
+
+from apis.models.invoice import Invoice
+from apis.models.lookup import Lookup
+from apis.models.merchant import Merchant
+from apis.models.member_role import MemberRole
+from apis.models.merchant_member import MerchantMember
+from apis.models.merchant_membership import MerchantMembership
+from apis.models.supply_record import SupplyRecord
+from apis.models.merchant_daily_rollup import MerchantDailyRollup
+from apis.models.transaction_history import TransactionHistory
+from apis.utils.customer_cache import (
+    bump_member_versions,
+    bump_membership_versions,
+)
+from apis.utils.dashboard import invalidate_merchant_dashboard
+from apis.utils.lookup_index import invalidate_lookups
+from apis.utils.permission_map import (
+    bump_permission_map_version,
+    invalidate_user_permission_signature,
+)
+from apis.utils.request_context import bump_access_version, invalidate_user_access
 
 
 @receiver(post_migrate, sender=apps.get_app_config("apis"))
 def load_data_from_fixture(sender, **kwargs):
     lookups_data = os.path.join("apis", "fixtures", "lookups.json")
     call_command("loaddata", lookups_data, app_label="api")
+
+
+@receiver([post_save, post_delete], sender=TransactionHistory)
+def transaction_history_changed(sender, instance, **kwargs):
+    if instance.merchant_membership_id:
+        invalidate_merchant_dashboard(instance.get_membership_merchant_id())
+        bump_membership_versions(instance.merchant_membership_id)
+
+
+def refresh_invoice_rollups():
+    invalidate_merchant_dashboard(*MerchantDailyRollup.flush_invoice_refreshes())
+
+
+@receiver([post_save, post_delete], sender=Invoice)
+def invoice_changed(sender, instance, **kwargs):
+    if instance.membership_id:
+        # Recomputed after the writer's transaction commits, once per day
+        # however many invoices it saved
+        MerchantDailyRollup.queue_invoice_refresh(instance)
+        transaction.on_commit(refresh_invoice_rollups)
+        bump_membership_versions(instance.membership_id)
+
+
+@receiver([post_save, post_delete], sender=MerchantMembership)
+def merchant_membership_changed(sender, instance, **kwargs):
+    invalidate_merchant_dashboard(instance.merchant_id)
+    bump_membership_versions(instance.id)
+    bump_member_versions(instance.member_id)
+
+
+@receiver([post_save, post_delete], sender=SupplyRecord)
+def supply_record_changed(sender, instance, **kwargs):
+    bump_membership_versions(instance.merchant_membership_id)
+
+
+@receiver([post_save, post_delete], sender=Merchant)
+def merchant_changed(sender, instance, created=False, **kwargs):
+    if created or kwargs["signal"] is post_delete:
+        bump_access_version(instance.owner_id)
+    elif getattr(instance, "_stored_listing", None) != (instance.name, instance.type):
+        # Members see the merchant's name and fee type in their merchant list
+        bump_member_versions(*instance.members.values_list("member_id", flat=True))
+    instance._stored_listing = (instance.name, instance.type)
+
+
+@receiver([post_save, post_delete], sender=MerchantMember)
+def merchant_member_changed(sender, instance, created=False, **kwargs):
+    stored_merchant_id = getattr(instance, "_stored_merchant_id", None)
+    if not created and instance.merchant_id != stored_merchant_id:
+        bump_access_version(instance.user_id)
+    else:
+        invalidate_user_access(instance.user_id)
+    instance._stored_merchant_id = instance.merchant_id
+
+
+@receiver([post_save, post_delete], sender=MemberRole)
+def member_role_changed(sender, instance, **kwargs):
+    bump_member_versions(instance.member_id)
+    bump_access_version(
+        *MerchantMember.objects.filter(id=instance.member_id).values_list(
+            "user_id", flat=True
+        )
+    )
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate_user_permission_signature(instance.pk)
+    elif pk_set:
+        invalidate_user_permission_signature(*pk_set)
+    else:
+        # A group or permission was cleared from users we don't know
+        bump_permission_map_version()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_permission_map_version()
+
+
+@receiver([post_save, post_delete], sender=Lookup)
+def lookup_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_lookups)
@@ -1,3 +1,937 @@
-from django.test import TestCase
+import io
+import socket
+import socketserver
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import requests
+from auditlog.models import LogEntry
+from django.contrib.auth.models import Group, Permission, User
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apis.models import (
+    Invoice,
+    InvoiceBatch,
+    MemberRole,
+    Merchant,
+    MerchantMember,
+    MembershipBalance,
+    MerchantDailyRollup,
+    MerchantMembership,
+    OutboundMessage,
+    ReminderCampaign,
+    SequenceCounter,
+    SupplyRecord,
+    TransactionHistory,
+)
+from apis.models.member_role import RoleChoices
+from apis.models.mixins.uid import bulk_create_with_uids, sortable_uid_generator
+from apis.senders.email_sender import EmailOTPSender
+from apis.senders.sms_sender import SmsOTPSender
+from apis.senders.transports import close_transports
+from apis.serializers.supply_record import SupplyRecordSerializer
+from apis.utils import get_customer_stats
+from apis.utils.customer_cache import get_versions
+from apis.utils.invoice_batch import run_invoice_batch
+from apis.utils.outbound import claim_messages, deliver_message, enqueue_otp
+from apis.utils.permission_map import get_permission_map_version, get_user_signature
+from apis.utils.reminder_campaign import run_reminder_campaign
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class CustomerListQueryBudgetTest(TestCase):
+    # Merchant, count, page of members, prefetched memberships
+    QUERY_BUDGET = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        cls.merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.MILK, owner=owner, area="a"
+        )
+        member = MerchantMember.objects.create(
+            user=owner, merchant=cls.merchant, primary_phone="3000000000"
+        )
+        MemberRole.objects.create(member=member, role=RoleChoices.MERCHANT)
+        cls.owner = owner
+
+    def create_customers(self, count):
+        start = MerchantMember.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(username=f"customer{i}", first_name="C")
+            member = MerchantMember.objects.create(
+                user=user, primary_phone=str(3100000000 + i)
+            )
+            MemberRole.objects.create(member=member, role=RoleChoices.CUSTOMER)
+            MerchantMembership.objects.create(
+                member=member,
+                merchant=self.merchant,
+                area="area",
+                city="city",
+                actual_price=100,
+                discounted_price=100,
+            )
+
+    def get_customers(self):
+        client = APIClient()
+        client.force_authenticate(user=self.owner)
+        return client.get(f"/api/merchants/{self.merchant.id}/members/")
+
+    def test_customer_list_queries_do_not_grow_with_rows(self):
+        self.create_customers(2)
+        self.get_customers()  # Warm the access cache
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.get_customers()
+        self.assertEqual(response.status_code, 200)
+
+        self.create_customers(8)
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.get_customers()
+        self.assertEqual(response.status_code, 200)
+        rows = response.data["results"]
+        self.assertEqual(len(rows), 10)
+        for row in rows:
+            self.assertEqual(row["merchant_memberships"]["merchant"], self.merchant.id)
+            self.assertEqual(row["merchant_memberships"]["unit"], self.merchant.unit)
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Accepts any login and message, keeping the messages on the server."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections.append(self.request)
+        self.reply("220 stub ESMTP")
+        while line := self.rfile.readline():
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN")
+            elif command.startswith("AUTH"):
+                self.reply("235 Authenticated")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = b"".join(iter(self.rfile.readline, b".\r\n"))
+                self.server.messages.append(data)
+                self.reply("250 Queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.connections = []
+        self.messages = []
+
+    def drop_connections(self):
+        for connection in self.connections:
+            connection.shutdown(socket.SHUT_RDWR)
+
+
+class StubSMSHandler(BaseHTTPRequestHandler):
+    """Answers with the next queued status (200 when none), over keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.client_address, self.path))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = b'{"status": "ok"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(
+            username="owner", first_name="Owner", email="owner@example.com"
+        )
+        merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.MILK, owner=owner, area="a"
+        )
+        cls.member = MerchantMember.objects.create(
+            user=owner, merchant=merchant, primary_phone="3000000000"
+        )
+
+    def start_server(self, server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        # Transports are per process, start every test with fresh connections
+        self.addCleanup(close_transports)
+        close_transports()
+        return server
+
+
+class SMTPTransportTest(StubServerTestCase):
+    def setUp(self):
+        self.server = self.start_server(StubSMTPServer())
+        settings = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            DEFAULT_EMAIL_HOST="127.0.0.1",
+            DEFAULT_EMAIL_PORT=self.server.server_address[1],
+            DEFAULT_EMAIL_TLS=False,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_sends_share_one_connection(self):
+        for otp in ("111111", "222222", "333333"):
+            EmailOTPSender().send_otp(self.member, otp)
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertIn(b"333333", self.server.messages[-1])
+
+    def test_reconnects_when_server_drops_connection(self):
+        EmailOTPSender().send_otp(self.member, "111111")
+        self.server.drop_connections()
+        EmailOTPSender().send_otp(self.member, "222222")
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_string_config_disables_tls(self):
+        # The stub server has no STARTTLS, a truthy "False" would fail the send
+        with override_settings(DEFAULT_EMAIL_TLS="False"):
+            EmailOTPSender().send_otp(self.member, "111111")
+        self.assertEqual(len(self.server.messages), 1)
+
+
+class HTTPTransportTest(StubServerTestCase):
+    def setUp(self):
+        self.server = self.start_server(
+            ThreadingHTTPServer(("127.0.0.1", 0), StubSMSHandler)
+        )
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.statuses = []
+        url = f"http://127.0.0.1:{self.server.server_address[1]}/api/sms.php"
+        patcher = mock.patch("apis.senders.sms_sender.SMS_OTP_API_URL", url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sends_reuse_pooled_connection(self):
+        for otp in ("111111", "222222", "333333"):
+            SmsOTPSender().send_otp(self.member, otp)
+        self.assertEqual(len(self.server.requests), 3)
+        clients = {client for client, _ in self.server.requests}
+        self.assertEqual(len(clients), 1)
+        self.assertIn("mobile=923000000000", self.server.requests[0][1])
+
+    def test_retries_unavailable_provider(self):
+        self.server.statuses = [503]
+        SmsOTPSender().send_otp(self.member, "111111")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_provider_errors_are_not_retried(self):
+        for status in (500, 502, 504):
+            self.server.requests.clear()
+            self.server.statuses = [status]
+            with self.assertRaises(requests.HTTPError):
+                SmsOTPSender().send_otp(self.member, "111111")
+            self.assertEqual(len(self.server.requests), 1)
+
+
+class ReminderCampaignTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        cls.merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.MILK, owner=owner, area="a"
+        )
+        today = timezone.localdate()
+        # Days overdue of the unpaid invoices of each customer
+        cls.overdue = {"late": [30, 20], "recent": [2], "paid_up": []}
+        cls.memberships = {}
+        for i, (name, days) in enumerate(cls.overdue.items()):
+            user = User.objects.create_user(username=name, first_name=name)
+            member = MerchantMember.objects.create(
+                user=user, primary_phone=str(3100000000 + i)
+            )
+            membership = MerchantMembership.objects.create(
+                member=member,
+                merchant=cls.merchant,
+                area="area",
+                city="city",
+                actual_price=100,
+                discounted_price=100,
+            )
+            for day in days:
+                Invoice.objects.create(
+                    membership=membership,
+                    member=member,
+                    total_amount=100,
+                    due_date=today - timedelta(days=day),
+                )
+            cls.memberships[name] = membership
+
+    def run_campaign(self, **options):
+        campaign = ReminderCampaign.objects.create(
+            merchant=self.merchant, channel="sms", **options
+        )
+        return run_reminder_campaign(campaign)
+
+    def test_reminds_memberships_with_overdue_invoices(self):
+        campaign = self.run_campaign(overdue_days=7, chunk_size=1)
+        self.assertEqual(campaign.status, ReminderCampaign.STATUS.COMPLETED)
+        self.assertEqual(campaign.processed_memberships, 1)
+        message = campaign.messages.get()
+        self.assertEqual(message.member_id, self.memberships["late"].member_id)
+        self.assertIn("Rs. 200 of 2 invoices", message.payload["body"])
+
+        campaign = self.run_campaign(chunk_size=1)
+        self.assertEqual(campaign.processed_memberships, 2)
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def test_worker_runs_campaigns_created_from_the_api(self):
+        owner = MerchantMember.objects.create(
+            user=self.merchant.owner, merchant=self.merchant, primary_phone="3000000000"
+        )
+        MemberRole.objects.create(member=owner, role=RoleChoices.MERCHANT)
+        client = APIClient()
+        client.force_authenticate(user=self.merchant.owner)
+        response = client.post(
+            f"/api/merchants/{self.merchant.id}/reminder-campaigns/",
+            {"channel": "sms", "overdue_days": 7},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], ReminderCampaign.STATUS.PENDING)
+
+        call_command("process_background_runs", once=True, stdout=io.StringIO())
+        campaign = ReminderCampaign.objects.get(id=response.data["id"])
+        self.assertEqual(campaign.status, ReminderCampaign.STATUS.COMPLETED)
+        self.assertEqual(campaign.messages.count(), 1)
+
+    def test_sms_reminders_skip_customers_without_a_phone(self):
+        MerchantMember.objects.filter(id=self.memberships["late"].member_id).update(
+            primary_phone=""
+        )
+        campaign = self.run_campaign(overdue_days=7)
+        self.assertEqual(campaign.processed_memberships, 0)
+
+    def test_worker_caps_messages_in_flight_per_merchant(self):
+        self.run_campaign(rate_per_minute=6000)
+        otp = OutboundMessage.objects.create(
+            member=self.memberships["paid_up"].member,
+            channel="sms",
+            kind=OutboundMessage.KIND.OTP,
+            priority=10,
+            available_at=timezone.now(),
+        )
+        OutboundMessage.objects.update(available_at=timezone.now())
+        claimed = claim_messages(10, merchant_concurrency=1)
+        self.assertEqual([message.id for message in claimed][0], otp.id)
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(claim_messages(10, merchant_concurrency=1), [])
+
+    def test_merchant_at_its_cap_does_not_hold_back_others(self):
+        owner = User.objects.create_user(username="other", first_name="Other")
+        other = Merchant.objects.create(
+            name="Other", type=Merchant.MerchantType.MILK, owner=owner, area="a"
+        )
+        member = self.memberships["late"].member
+        for merchant, count in ((self.merchant, 6), (other, 1)):
+            for _ in range(count):
+                OutboundMessage.objects.create(
+                    member=member,
+                    merchant=merchant,
+                    channel="sms",
+                    kind=OutboundMessage.KIND.REMINDER,
+                    available_at=timezone.now(),
+                )
+        for merchant in (self.merchant, other):
+            (message,) = claim_messages(1, merchant_concurrency=1)
+            self.assertEqual(message.merchant_id, merchant.id)
+
+
+class MembershipLedgerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.GYM, owner=owner, area="a"
+        )
+        user = User.objects.create_user(username="customer", first_name="C")
+        member = MerchantMember.objects.create(user=user, primary_phone="3100000000")
+        cls.membership = MerchantMembership.objects.create(
+            member=member,
+            merchant=merchant,
+            area="area",
+            city="city",
+            actual_price=100,
+            discounted_price=100,
+        )
+
+    def record(self, value, transaction_type):
+        return TransactionHistory.objects.create(
+            merchant_membership=self.membership,
+            value=value,
+            type=TransactionHistory.TYPES.BILLING,
+            transaction_type=transaction_type,
+        )
+
+    def create_invoice(self, created_at):
+        invoice = Invoice.objects.create(
+            membership=self.membership,
+            member=self.membership.member,
+            total_amount=100,
+            created_at=created_at,
+        )
+        self.record(100, TransactionHistory.TRANSACTION_TYPE.DEBIT)
+        return invoice
+
+    def get_ledger(self):
+        return MembershipBalance.objects.get(merchant_membership=self.membership)
+
+    def test_payment_settles_oldest_invoices_and_revert_restores_them(self):
+        now = timezone.now()
+        older = self.create_invoice(now - timedelta(days=2))
+        newer = self.create_invoice(now - timedelta(days=1))
+        self.assertEqual(self.get_ledger().balance, -200)
+
+        payment = TransactionHistory(
+            merchant_membership=self.membership,
+            value=150,
+            type=TransactionHistory.TYPES.BILLING,
+            transaction_type=TransactionHistory.TRANSACTION_TYPE.CREDIT,
+        ).apply_payment()
+        older.refresh_from_db()
+        newer.refresh_from_db()
+        self.assertEqual((older.status, older.due_amount), (Invoice.STATUS.PAID, 0))
+        self.assertEqual((newer.status, newer.due_amount), (Invoice.STATUS.UNPAID, 50))
+        self.assertEqual(payment.balance, -50)
+        self.assertEqual(self.get_ledger().balance, -50)
+
+        payment.revert_transaction()
+        for invoice in (older, newer):
+            invoice.refresh_from_db()
+            self.assertEqual(invoice.status, Invoice.STATUS.UNPAID)
+            self.assertEqual(invoice.due_amount, 100)
+        ledger = self.get_ledger()
+        self.assertEqual((ledger.balance, ledger.total_credit), (-200, 0))
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self.record(100, TransactionHistory.TRANSACTION_TYPE.DEBIT)
+        self.record(30, TransactionHistory.TRANSACTION_TYPE.CREDIT)
+        memberships = MerchantMembership.objects.filter(id=self.membership.id)
+        self.assertEqual(MembershipBalance.reconcile(memberships), [])
+
+        MembershipBalance.objects.filter(merchant_membership=self.membership).update(
+            balance=0, total_debit=0
+        )
+        (drift,) = MembershipBalance.reconcile(memberships, commit=False)
+        self.assertEqual((drift["stored_balance"], drift["ledger_balance"]), (0, -70))
+        self.assertEqual(self.get_ledger().balance, 0)
+
+        self.assertEqual(len(MembershipBalance.reconcile(memberships)), 1)
+        ledger = self.get_ledger()
+        self.assertEqual((ledger.balance, ledger.total_debit), (-70, 100))
+        self.assertEqual(MembershipBalance.reconcile(memberships), [])
+
+
+class InvoiceCodeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        cls.merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.GYM, owner=owner, area="a"
+        )
+
+    def test_allocations_continue_the_sequence(self):
+        first = Invoice.allocate_codes(self.merchant, 2)
+        second = Invoice.allocate_codes(self.merchant, 3)
+
+        codes = [int(code) for code in first + second]
+        start = int(f"{self.merchant.code}100000")
+        self.assertEqual(codes, list(range(start, start + 5)))
+
+    def test_seed_is_read_only_once(self):
+        seed = mock.Mock(return_value=41)
+        self.assertEqual(SequenceCounter.allocate("test", 2, seed=seed), range(42, 44))
+        self.assertEqual(SequenceCounter.allocate("test", seed=seed), range(44, 45))
+        seed.assert_called_once_with()
+
+
+class PermissionSignatureTest(TestCase):
+    def test_signature_is_dropped_only_after_commit(self):
+        user = User.objects.create_user(username="staff", first_name="S")
+        group = Group.objects.create(name="Staff")
+        version = get_permission_map_version()
+        self.assertEqual(get_user_signature(user.id, version), ((), ()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.groups.add(group)
+            group.permissions.add(Permission.objects.first())
+            # A concurrent read before commit still caches under this version
+            self.assertEqual(get_permission_map_version(), version)
+            self.assertEqual(get_user_signature(user.id, version), ((), ()))
+
+        version = get_permission_map_version()
+        self.assertEqual(get_user_signature(user.id, version), ((group.id,), ()))
+
+
+class MerchantChangedTest(TestCase):
+    def test_only_listed_fields_bump_member_versions(self):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.GYM, owner=owner, area="a"
+        )
+        user = User.objects.create_user(username="customer", first_name="C")
+        member = MerchantMember.objects.create(user=user, primary_phone="3100000000")
+        MerchantMembership.objects.create(
+            member=member,
+            merchant=merchant,
+            area="area",
+            city="city",
+            actual_price=100,
+            discounted_price=100,
+        )
+        merchant = Merchant.objects.get(id=merchant.id)
+        (version,) = get_versions("member", member.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            merchant.area = "b"
+            merchant.save()
+        self.assertEqual(get_versions("member", member.id), [version])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            merchant.name = "Renamed"
+            merchant.save()
+        self.assertNotEqual(get_versions("member", member.id), [version])
+
+
+class SupplyRecordUpsertTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.WATER, owner=owner, area="a"
+        )
+        user = User.objects.create_user(username="customer", first_name="C")
+        member = MerchantMember.objects.create(user=user, primary_phone="3100000000")
+        cls.membership = MerchantMembership.objects.create(
+            member=member,
+            merchant=merchant,
+            area="area",
+            city="city",
+            actual_price=100,
+            discounted_price=100,
+        )
+
+    def upsert(self, day, given, taken):
+        (record,) = SupplyRecord.upsert(
+            [
+                SupplyRecord(
+                    merchant_membership_id=self.membership.id,
+                    day=day,
+                    given=given,
+                    taken=taken,
+                )
+            ]
+        )
+        return record
+
+    def test_overwrites_the_day_and_moves_totals_by_the_difference(self):
+        today = timezone.localdate()
+        first = self.upsert(today, 2, 1)
+        second = self.upsert(today, 5, 3)
+        self.upsert(today - timedelta(days=1), 1, 0)
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(SupplyRecord.objects.get(id=first.id).given, second.given)
+        self.assertEqual(self.membership.supply_records.count(), 2)
+        ledger = MembershipBalance.objects.get(merchant_membership=self.membership)
+        self.assertEqual((ledger.supply_given, ledger.supply_taken), (6, 3))
+        self.assertEqual(ledger.supply_balance, -3)
+
+    def test_profile_stats_read_the_stored_ledger(self):
+        self.upsert(timezone.localdate(), 2, 5)
+        MerchantMembership.objects.filter(id=self.membership.id).update(
+            is_monthly=False
+        )
+        with self.assertNumQueries(1):
+            stats = get_customer_stats(self.membership)
+        self.assertEqual(
+            stats["supply_balance"], {"value": 3, "name": "Bottles Balance"}
+        )
+        self.assertEqual(stats["user_amounts_balance"]["value"], 0)
+
+    def test_partial_post_keeps_the_other_quantity(self):
+        request = SimpleNamespace(membership=self.membership)
+        for data in ({"given": 5, "taken": 2}, {"taken": 3}):
+            serializer = SupplyRecordSerializer(data=data, context={"request": request})
+            serializer.is_valid(raise_exception=True)
+            record = serializer.save()
+
+        record.refresh_from_db()
+        self.assertEqual((record.given, record.taken), (5, 3))
+        ledger = MembershipBalance.objects.get(merchant_membership=self.membership)
+        self.assertEqual((ledger.supply_given, ledger.supply_taken), (5, 3))
+
+    def test_writes_audit_log_entries(self):
+        today = timezone.localdate()
+        record = self.upsert(today, 2, 1)
+        self.upsert(today, 5, 1)
+        self.upsert(today, 5, 1)
+
+        created, updated = LogEntry.objects.get_for_object(record).order_by("id")
+        self.assertEqual(created.action, LogEntry.Action.CREATE)
+        self.assertEqual(updated.action, LogEntry.Action.UPDATE)
+        self.assertEqual(updated.changes, {"given": ["2", "5"]})
+
+    def test_membership_version_changes_only_after_commit(self):
+        (version,) = get_versions("membership", self.membership.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            SupplyRecord.objects.create(merchant_membership=self.membership, given=1)
+            self.assertEqual(get_versions("membership", self.membership.id), [version])
+        self.assertNotEqual(get_versions("membership", self.membership.id), [version])
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class BulkSupplyRecordTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        cls.merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.MILK, owner=owner, area="a"
+        )
+        member = MerchantMember.objects.create(
+            user=owner, merchant=cls.merchant, primary_phone="3000000000"
+        )
+        MemberRole.objects.create(member=member, role=RoleChoices.MERCHANT)
+        cls.owner = owner
+        cls.memberships = []
+        for i in range(2):
+            user = User.objects.create_user(username=f"customer{i}", first_name="C")
+            member = MerchantMember.objects.create(
+                user=user, primary_phone=str(3100000000 + i)
+            )
+            cls.memberships.append(
+                MerchantMembership.objects.create(
+                    member=member,
+                    merchant=cls.merchant,
+                    area="area",
+                    city="city",
+                    actual_price=100,
+                    discounted_price=100,
+                )
+            )
+
+    def post(self, entries):
+        client = APIClient()
+        client.force_authenticate(user=self.owner)
+        return client.post(
+            f"/api/merchants/{self.merchant.id}/supply-records/",
+            {"entries": entries},
+            format="json",
+        )
+
+    def test_saves_the_route_and_reports_rejected_entries(self):
+        first, second = (membership.account for membership in self.memberships)
+        response = self.post(
+            [
+                {"account": first, "given": 1, "taken": 0},
+                {"account": "999999", "given": 2},
+                {"account": first, "given": 3, "taken": 1},
+                {"account": second, "given": 2},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["saved"], response.data["rejected"]), (2, 2))
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["rejected", "rejected", "saved", "saved"])
+        self.assertEqual(response.data["results"][2]["record"]["given"], 3)
+        ledger = MembershipBalance.objects.get(merchant_membership=self.memberships[0])
+        self.assertEqual((ledger.supply_given, ledger.supply_taken), (3, 1))
+        self.assertEqual(SupplyRecord.objects.count(), 2)
+
+
+class UIDTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        cls.merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.MILK, owner=owner, area="a"
+        )
+        cls.member = MerchantMember.objects.create(
+            user=owner, merchant=cls.merchant, primary_phone="3000000000"
+        )
+
+    def make_message(self, **fields):
+        return OutboundMessage(
+            member=self.member,
+            channel="sms",
+            kind=OutboundMessage.KIND.OTP,
+            available_at=timezone.now(),
+            **fields,
+        )
+
+    def test_sortable_uids_sort_in_generation_order(self):
+        uids = [sortable_uid_generator.generate("111") for _ in range(5000)]
+        self.assertEqual(sorted(uids), uids)
+        self.assertEqual(len(set(uids)), len(uids))
+        self.assertEqual({len(uid) for uid in uids}, {15})
+
+    def test_save_does_not_overwrite_a_row_with_the_same_uid(self):
+        stored = self.make_message(payload={"otp": "1"})
+        stored.save()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.make_message(id=stored.id, payload={"otp": "2"}).save()
+        stored.refresh_from_db()
+        self.assertEqual(stored.payload, {"otp": "1"})
+
+    def test_bulk_create_retries_colliding_uids(self):
+        stored = self.make_message()
+        stored.save()
+        fresh_uid = OutboundMessage.generate_uid()
+        messages = [self.make_message()]
+        with mock.patch.object(
+            OutboundMessage, "generate_uid", side_effect=[stored.id, fresh_uid]
+        ):
+            bulk_create_with_uids(OutboundMessage, messages)
+        self.assertEqual(messages[0].id, fresh_uid)
+        self.assertEqual(OutboundMessage.objects.count(), 2)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class InvoiceBatchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        cls.merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.GYM, owner=owner, area="a"
+        )
+        member = MerchantMember.objects.create(
+            user=owner, merchant=cls.merchant, primary_phone="3000000000"
+        )
+        MemberRole.objects.create(member=member, role=RoleChoices.MERCHANT)
+        cls.owner = owner
+        cls.memberships = []
+        for i in range(3):
+            user = User.objects.create_user(username=f"customer{i}", first_name="C")
+            member = MerchantMember.objects.create(
+                user=user, primary_phone=str(3100000000 + i)
+            )
+            cls.memberships.append(
+                MerchantMembership.objects.create(
+                    member=member,
+                    merchant=cls.merchant,
+                    area="area",
+                    city="city",
+                    actual_price=100,
+                    discounted_price=100,
+                )
+            )
+
+    def create_batch(self, **fields):
+        now = timezone.now()
+        return InvoiceBatch.objects.create(
+            merchant=self.merchant, month=now.month, year=now.year, **fields
+        )
+
+    def post_batch(self):
+        client = APIClient()
+        client.force_authenticate(user=self.owner)
+        return client.post(
+            f"/api/merchants/{self.merchant.id}/monthly-invoices/", format="json"
+        )
+
+    def run_worker(self):
+        call_command("process_background_runs", once=True, stdout=io.StringIO())
+
+    def test_live_batch_blocks_new_batches_and_resumes(self):
+        batch = self.create_batch(status=InvoiceBatch.STATUS.RUNNING)
+        self.assertEqual(self.post_batch().status_code, 400)
+        with self.assertRaises(CommandError):
+            call_command("generate_monthly_invoices", resume=batch.id)
+        with self.assertRaises(CommandError):
+            call_command("generate_monthly_invoices", merchant=self.merchant.id)
+
+    def test_interrupted_batch_is_failed_and_resumable(self):
+        batch = self.create_batch(status=InvoiceBatch.STATUS.RUNNING)
+        InvoiceBatch.objects.filter(id=batch.id).update(
+            updated_at=timezone.now() - InvoiceBatch.STALE_AFTER * 2
+        )
+        self.assertEqual(self.post_batch().status_code, 202)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, InvoiceBatch.STATUS.FAILED)
+
+        call_command("generate_monthly_invoices", resume=batch.id, stdout=io.StringIO())
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, InvoiceBatch.STATUS.COMPLETED)
+        self.assertEqual(batch.invoices_created, 3)
+
+    def test_worker_runs_pending_and_stale_batches(self):
+        self.assertEqual(self.post_batch().status_code, 202)
+        stale = self.create_batch(status=InvoiceBatch.STATUS.RUNNING)
+        InvoiceBatch.objects.filter(id=stale.id).update(
+            updated_at=timezone.now() - InvoiceBatch.STALE_AFTER * 2
+        )
+        live = self.create_batch(status=InvoiceBatch.STATUS.RUNNING)
+
+        self.run_worker()
+        statuses = dict(InvoiceBatch.objects.values_list("id", "status"))
+        self.assertEqual(statuses.pop(live.id), InvoiceBatch.STATUS.RUNNING)
+        self.assertEqual(set(statuses.values()), {InvoiceBatch.STATUS.COMPLETED})
+        # The second batch of the month regenerates the unpaid invoices
+        unpaid = Invoice.objects.filter(status=Invoice.STATUS.UNPAID)
+        self.assertEqual(unpaid.count(), 3)
+
+    def test_worker_requeues_the_batch_it_was_stopped_in(self):
+        batch = self.create_batch()
+        runners = [(InvoiceBatch, mock.Mock(side_effect=KeyboardInterrupt))]
+        with mock.patch(
+            "apis.management.commands.process_background_runs.RUNNERS", runners
+        ):
+            self.run_worker()
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, InvoiceBatch.STATUS.PENDING)
+
+    def test_batch_resumes_after_a_failed_chunk_without_duplicates(self):
+        batch = self.create_batch(chunk_size=1)
+        calls = []
+
+        def fail_second_chunk(model, objs, **kwargs):
+            created = bulk_create_with_uids(model, objs, **kwargs)
+            calls.append(model)
+            if len(calls) == 2:
+                raise RuntimeError("Connection lost")
+            return created
+
+        with mock.patch(
+            "apis.utils.invoice_batch.bulk_create_with_uids", fail_second_chunk
+        ), self.assertLogs("apis.utils.invoice_batch", "ERROR"):
+            run_invoice_batch(batch)
+        self.assertEqual(batch.status, InvoiceBatch.STATUS.FAILED)
+        self.assertEqual(batch.invoices_created, 1)
+        self.assertEqual(Invoice.objects.count(), 1)
+
+        batch.refresh_from_db()
+        run_invoice_batch(batch)
+        self.assertEqual(batch.status, InvoiceBatch.STATUS.COMPLETED)
+        self.assertEqual(batch.invoices_created, 3)
+        for membership in self.memberships:
+            self.assertEqual(membership.invoices.count(), 1)
+            self.assertEqual(
+                MembershipBalance.objects.get(merchant_membership=membership).balance,
+                -100,
+            )
+
+
+class OutboundOTPTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="customer", first_name="C")
+        cls.member = MerchantMember.objects.create(
+            user=user, primary_phone="3100000000"
+        )
+
+    def test_newer_otp_supersedes_queued_ones(self):
+        first = enqueue_otp(self.member, "111111", "sms")
+        second = enqueue_otp(self.member, "222222", "sms")
+        first.refresh_from_db()
+        self.assertEqual(first.status, OutboundMessage.STATUS.FAILED)
+        self.assertEqual(first.payload, {})
+
+        (claimed,) = claim_messages(10)
+        self.assertEqual(claimed.id, second.id)
+        with mock.patch("apis.utils.outbound.OTPSenderFactory") as factory:
+            self.assertTrue(deliver_message(claimed))
+        factory.get_sender().send_otp.assert_called_once_with(self.member, "222222")
+        second.refresh_from_db()
+        self.assertEqual(second.status, OutboundMessage.STATUS.SENT)
+        self.assertNotIn("otp", second.payload)
+
+    def test_retried_otp_is_dropped_once_superseded(self):
+        first = enqueue_otp(self.member, "111111", "sms")
+        (claimed,) = claim_messages(10)
+        enqueue_otp(self.member, "222222", "sms")
+        claimed.attempts = 2
+        with mock.patch("apis.utils.outbound.OTPSenderFactory") as factory:
+            self.assertFalse(deliver_message(claimed))
+        factory.get_sender().send_otp.assert_not_called()
+        first.refresh_from_db()
+        self.assertEqual(first.status, OutboundMessage.STATUS.FAILED)
+        self.assertEqual(first.payload, {})
+
+
+class MerchantDailyRollupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username="owner", first_name="Owner")
+        cls.merchant = Merchant.objects.create(
+            name="Merchant", type=Merchant.MerchantType.GYM, owner=owner, area="a"
+        )
+        user = User.objects.create_user(username="customer", first_name="C")
+        cls.member = MerchantMember.objects.create(
+            user=user, primary_phone="3100000000"
+        )
+        cls.membership = MerchantMembership.objects.create(
+            member=cls.member,
+            merchant=cls.merchant,
+            area="area",
+            city="city",
+            actual_price=100,
+            discounted_price=100,
+        )
+
+    def test_invoice_saves_refresh_their_day_once_after_commit(self):
+        refresh = mock.patch.object(
+            MerchantDailyRollup,
+            "refresh_invoices",
+            wraps=MerchantDailyRollup.refresh_invoices,
+        )
+        with refresh as refresh_invoices, self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for amount in (100, 200):
+                    Invoice.objects.create(
+                        membership=self.membership,
+                        member=self.member,
+                        total_amount=amount,
+                    )
+            refresh_invoices.assert_not_called()
+        refresh_invoices.assert_called_once()
+
+        rollup = MerchantDailyRollup.objects.get(merchant=self.merchant)
+        self.assertEqual(rollup.invoices_issued, 2)
+        self.assertEqual(rollup.invoiced_amount, 300)
+        self.assertEqual(rollup.dues_outstanding, 300)
+
+    def test_ledger_writes_move_the_day_without_loading_the_membership(self):
+        payments = [
+            TransactionHistory.objects.create(
+                merchant_membership_id=self.membership.id,
+                value=value,
+                transaction_type=TransactionHistory.TRANSACTION_TYPE.CREDIT,
+            )
+            for value in (40, 10)
+        ]
+        payment = TransactionHistory.objects.get(id=payments[0].id)
+        payment.delete()
+
+        self.assertFalse(TransactionHistory.merchant_membership.is_cached(payment))
+        rollup = MerchantDailyRollup.objects.get(merchant=self.merchant)
+        self.assertEqual(rollup.credit, 10)
@@ -23,6 +23,10 @@ from apis.views import (
     PublicCustomerProfileRetrieveAPIView,
     MemberTransactionHistoryListCreateAPIView,
     MerchantMonthlyMembershipInvoiceCreateAPIView,
+    MerchantMonthlyMembershipInvoiceRetrieveAPIView,
+    MerchantReminderCampaignCreateAPIView,
+    MerchantReminderCampaignRetrieveAPIView,
+    MerchantSupplyRecordBulkCreateAPIView,
 )
 
 
@@ -52,6 +56,26 @@ urlpatterns = [
         MerchantMonthlyMembershipInvoiceCreateAPIView.as_view(),
         name="merchant-monthly-invoices",
     ),
+    path(
+        "merchants/<str:merchant_id>/monthly-invoices/<str:batch_id>/",
+        MerchantMonthlyMembershipInvoiceRetrieveAPIView.as_view(),
+        name="merchant-monthly-invoices-retrieve",
+    ),
+    path(
+        "merchants/<str:merchant_id>/reminder-campaigns/",
+        MerchantReminderCampaignCreateAPIView.as_view(),
+        name="merchant-reminder-campaigns",
+    ),
+    path(
+        "merchants/<str:merchant_id>/reminder-campaigns/<str:campaign_id>/",
+        MerchantReminderCampaignRetrieveAPIView.as_view(),
+        name="merchant-reminder-campaigns-retrieve",
+    ),
+    path(
+        "merchants/<str:merchant_id>/supply-records/",
+        MerchantSupplyRecordBulkCreateAPIView.as_view(),
+        name="merchant-supply-records-bulk-create",
+    ),
     path(
         "merchants/<str:merchant_id>/members/",
         MerchantMemberListCreateAPIView.as_view(),
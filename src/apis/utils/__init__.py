@@ -1,5 +1,13 @@
-from apis.utils.views import get_customer_stats
+from apis.utils.views import (
+    get_content_etag,
+    get_customer_stats,
+    get_customers_stats,
+    get_etag_response,
+)
 
 __all__ = [
+    "get_content_etag",
     "get_customer_stats",
+    "get_customers_stats",
+    "get_etag_response",
 ]
@@ -0,0 +1,133 @@
+import hashlib
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+
+from apis.models.member_role import MemberRole, RoleChoices
+from apis.models.merchant_member import MerchantMember
+from apis.models.merchant_membership import MerchantMembership
+
+# Entries are keyed by versions bumped on every write, the timeout only bounds
+# staleness of writes that skip the bumps (raw SQL). Other workers never see a
+# bump in the per-process locmem cache, so nothing is cached there.
+PUBLIC_CACHE_TIMEOUT = 60 * 10
+
+
+def is_shared_cache():
+    """Whether every worker sees the writes to the default cache."""
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def get_version_cache_key(scope, object_id):
+    return f"{scope}-version:{object_id}"
+
+
+def get_versions(scope, *object_ids):
+    """
+    Return the current versions of objects, creating the missing ones.
+    Versions are timestamps so a flushed cache never brings an old one back.
+    """
+    keys = {
+        get_version_cache_key(scope, object_id): object_id for object_id in object_ids
+    }
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, None)
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+def bump_versions(scope, *object_ids):
+    """
+    Make every cached entry keyed on these objects' versions unreachable, once
+    the current transaction commits. Bumping earlier would let a read of the
+    uncommitted state cache the old rows under the new version.
+    """
+    keys = [
+        get_version_cache_key(scope, object_id) for object_id in object_ids if object_id
+    ]
+    if keys:
+        transaction.on_commit(
+            lambda: cache.set_many(dict.fromkeys(keys, time.time_ns()), None)
+        )
+
+
+def bump_membership_versions(*membership_ids):
+    """Ledger, invoice, supply or membership writes of these memberships."""
+    bump_versions("membership", *membership_ids)
+
+
+def bump_merchant_versions(*merchant_ids):
+    """Bulk writes touching many memberships of these merchants."""
+    bump_versions("merchant", *merchant_ids)
+
+
+def bump_member_versions(*member_ids):
+    """Role, membership or merchant changes seen by these members."""
+    bump_versions("member", *member_ids)
+
+
+def get_public_customer(customer_code, merchant_id=None):
+    """
+    Resolve a customer code (and merchant) the way `IsCustomer` does, from the
+    cache when possible.
+
+    :return: A dict with `member_id`, `is_customer` and `membership_id` (None
+        without a membership of the merchant), or None for an unknown code.
+    """
+    code_key = f"public-customer-code:{customer_code}"
+    member_id = cache.get(code_key)
+    if member_id is None:
+        member_id = (
+            MerchantMember.objects.filter(code=customer_code)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if member_id is None:
+            return None
+        # Member codes never change
+        cache.set(code_key, member_id, PUBLIC_CACHE_TIMEOUT)
+
+    customer = key = None
+    if is_shared_cache():
+        (member_version,) = get_versions("member", member_id)
+        key = f"public-customer:{member_id}:{member_version}:{merchant_id}"
+        customer = cache.get(key)
+    if customer is None:
+        customer = (
+            MerchantMember.objects.filter(id=member_id)
+            .values("id")
+            .annotate(
+                is_customer=Exists(
+                    MemberRole.objects.filter(
+                        member=OuterRef("id"), role=RoleChoices.CUSTOMER
+                    )
+                ),
+                membership_id=Subquery(
+                    MerchantMembership.objects.filter(
+                        member=OuterRef("id"), merchant_id=merchant_id
+                    ).values("id")[:1]
+                ),
+            )
+            .first()
+        )
+        if customer is None:
+            cache.delete(code_key)
+            return None
+        customer["member_id"] = customer.pop("id")
+        if key:
+            cache.set(key, customer, PUBLIC_CACHE_TIMEOUT)
+    return customer
+
+
+def get_query_digest(request):
+    """Digest of the request's query parameters, independent of their order."""
+    params = sorted(
+        (key, sorted(values)) for key, values in request.query_params.lists()
+    )
+    return hashlib.sha1(repr(params).encode()).hexdigest()
@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apis.models.merchant_daily_rollup import MerchantDailyRollup
+
+# Snapshots are dropped on every ledger/invoice/membership write, the timeout only
+# bounds staleness when several workers keep their own in-memory cache.
+DASHBOARD_CACHE_TIMEOUT = 60 * 5
+
+
+def get_dashboard_cache_key(merchant_id):
+    return f"merchant-dashboard:{merchant_id}"
+
+
+def invalidate_merchant_dashboard(*merchant_ids):
+    """
+    Drop the cached dashboard snapshot of the given merchants once the current
+    transaction commits, so a snapshot of the uncommitted state is dropped too.
+    """
+    keys = [
+        get_dashboard_cache_key(merchant_id)
+        for merchant_id in merchant_ids
+        if merchant_id
+    ]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def build_merchant_dashboard(merchant):
+    """
+    Compute the dashboard figures of a merchant by summing its daily rollup
+    buckets, plus one aggregate over its memberships.
+    """
+    today = timezone.localdate()
+    this_month = Q(day__gte=today.replace(day=1))
+
+    totals = MerchantDailyRollup.objects.filter(merchant=merchant).aggregate(
+        total_credit=Sum("credit", default=0),
+        credit_this_month=Sum("credit", filter=this_month, default=0),
+        credit_today=Sum("credit", filter=Q(day=today), default=0),
+        total_due=Sum("dues_outstanding", default=0),
+        total_due_this_month=Sum("dues_outstanding", filter=this_month, default=0),
+    )
+
+    membership_totals = merchant.members.aggregate(
+        total_customers=Count("id"),
+        active_customers=Count("id", filter=Q(is_active=True)),
+        non_active_customers=Count("id", filter=Q(is_active=False)),
+    )
+
+    return {
+        "total_collections_today": {
+            "value": totals["credit_today"],
+            "name": "Collection today",
+        },
+        "total_collections_this_month": {
+            "value": totals["credit_this_month"],
+            "name": "Collection this month",
+        },
+        "total_remaining_collections_this_month": {
+            "value": totals["total_due_this_month"],
+            "name": "Remaining collection this month",
+        },
+        "total_collections": {
+            "value": totals["total_credit"],
+            "name": "Collection this year",
+        },
+        "total_remaining_collections": {
+            "value": totals["total_due"],
+            "name": "Total Remaining collection",
+        },
+        "total_customers": {
+            "value": membership_totals["total_customers"],
+            "name": "Total Customers",
+        },
+        "active_customers": {
+            "value": membership_totals["active_customers"],
+            "name": "Active Customers",
+        },
+        "non_active_customers": {
+            "value": membership_totals["non_active_customers"],
+            "name": "Non Active Customers",
+        },
+        "generated_at": timezone.now(),
+    }
+
+
+def get_merchant_dashboard(merchant):
+    """Return the cached dashboard snapshot of a merchant, building it on a miss."""
+    key = get_dashboard_cache_key(merchant.id)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        dashboard = build_merchant_dashboard(merchant)
+        cache.set(key, dashboard, DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
@@ -0,0 +1,218 @@
+import logging
+from calendar import monthrange
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Sum
+from django.utils import timezone
+
+from apis.models.invoice import Invoice
+from apis.models.invoice_batch import InvoiceBatch
+from apis.models.mixins.uid import bulk_create_with_uids
+from apis.models.supply_record import SupplyRecord
+from apis.models.transaction_history import TransactionHistory
+from apis.models.merchant_daily_rollup import MerchantDailyRollup
+from apis.utils.customer_cache import bump_merchant_versions
+from apis.utils.dashboard import invalidate_merchant_dashboard
+
+logger = logging.getLogger(__name__)
+
+
+def get_safe_date(month: int, year: int = None) -> datetime:
+    now = timezone.now()
+    year = year or now.year
+
+    # Get the max valid day in the given month
+    _, last_day = monthrange(year, month)
+
+    # Ensure current day fits in the target month
+    safe_day = min(now.day, last_day)
+
+    # Return datetime with same time but updated month and safe day
+    return now.replace(year=year, month=month, day=safe_day)
+
+
+def get_month_range(month, year):
+    """Return the aware [start, end) datetimes of a local calendar month."""
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(
+        datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    )
+    return start, end
+
+
+def get_pending_memberships(batch):
+    """Memberships of the batch's merchant still without a monthly invoice for its month."""
+    start, end = get_month_range(batch.month, batch.year)
+    invoice_exists = Invoice.objects.filter(
+        membership=OuterRef("id"),
+        type=Invoice.Type.MONTHLY,
+        created_at__gte=start,
+        created_at__lt=end,
+    ).exclude(status=Invoice.STATUS.CANCELLED)
+    return batch.merchant.members.filter(~Exists(invoice_exists)).order_by("id")
+
+
+def get_supply_given(batch):
+    """Units given to every membership during the batch's month, in one grouped query."""
+    start, end = get_month_range(batch.month, batch.year)
+    return dict(
+        SupplyRecord.objects.filter(
+            merchant_membership__merchant=batch.merchant,
+            day__gte=start.date(),
+            day__lt=end.date(),
+        )
+        .values("merchant_membership")
+        .annotate(given=Sum("given"))
+        .values_list("merchant_membership", "given")
+    )
+
+
+def cancel_unpaid_invoices(batch):
+    """
+    Cancel the month's unpaid monthly invoices and credit their amount back with
+    adjustments, so they are generated again with current prices.
+    """
+    start, end = get_month_range(batch.month, batch.year)
+    unpaid_invoices = list(
+        Invoice.objects.filter(
+            type=Invoice.Type.MONTHLY,
+            status=Invoice.STATUS.UNPAID,
+            membership__merchant=batch.merchant,
+            created_at__gte=start,
+            created_at__lt=end,
+        )
+    )
+    adjustments = []
+    for invoice in unpaid_invoices:
+        adjustments.append(
+            TransactionHistory(
+                invoice=invoice,
+                is_online=False,
+                value=invoice.total_amount,
+                type=TransactionHistory.TYPES.BILLING,
+                metadata={"invoices": [invoice.code]},
+                merchant_membership_id=invoice.membership_id,
+                transaction_type=TransactionHistory.TRANSACTION_TYPE.ADJUSTMENT,
+            )
+        )
+    with transaction.atomic():
+        TransactionHistory.bulk_record(adjustments)
+        Invoice.objects.filter(
+            id__in=[invoice.id for invoice in unpaid_invoices]
+        ).update(status=Invoice.STATUS.CANCELLED)
+        MerchantDailyRollup.refresh_invoices(
+            MerchantDailyRollup.get_invoice_keys(unpaid_invoices)
+        )
+        batch.is_cancellation_done = True
+        batch.invoices_cancelled = len(unpaid_invoices)
+        batch.save(
+            update_fields=["is_cancellation_done", "invoices_cancelled", "updated_at"]
+        )
+
+
+def create_chunk_invoices(batch, memberships, supply_given):
+    """Create the invoices and ledger debits of one chunk and move the batch cursor."""
+    merchant = batch.merchant
+    created_by = batch.created_by
+    created_at = get_safe_date(batch.month, batch.year)
+    invoices = []
+    transactions = []
+    with transaction.atomic():
+        for membership in memberships:
+            if merchant.is_fixed_fee_merchant or membership.is_monthly:
+                amount_to_pay = membership.discounted_price
+            else:
+                amount_to_pay = (
+                    supply_given.get(membership.id, 0) * membership.discounted_price
+                )
+            if amount_to_pay <= 0:
+                continue
+            invoice = Invoice(
+                metadata={
+                    "created_by": created_by.user.first_name if created_by else None
+                },
+                membership=membership,
+                member_id=membership.member_id,
+                due_amount=amount_to_pay,
+                total_amount=amount_to_pay,
+                status=Invoice.STATUS.UNPAID,
+                handled_by=created_by,
+                created_at=created_at,
+            )
+            invoices.append(invoice)
+            transactions.append(
+                TransactionHistory(
+                    invoice=invoice,
+                    value=invoice.total_amount,
+                    merchant_membership=membership,
+                    type=TransactionHistory.TYPES.BILLING,
+                    transaction_type=TransactionHistory.TRANSACTION_TYPE.DEBIT,
+                )
+            )
+
+        # One locked counter update reserves the codes of the whole chunk
+        codes = Invoice.allocate_codes(merchant, len(invoices)) if invoices else []
+        for invoice, code in zip(invoices, codes):
+            invoice.code = code
+        bulk_create_with_uids(Invoice, invoices)
+        TransactionHistory.bulk_record(transactions)
+        MerchantDailyRollup.refresh_invoices(
+            MerchantDailyRollup.get_invoice_keys(invoices)
+        )
+
+        batch.cursor = memberships[-1].id
+        batch.processed_memberships += len(memberships)
+        batch.invoices_created += len(invoices)
+        batch.save(
+            update_fields=[
+                "cursor",
+                "processed_memberships",
+                "invoices_created",
+                "updated_at",
+            ]
+        )
+
+
+def run_invoice_batch(batch):
+    """
+    Run a batch, or resume a failed one from its cursor, until every membership
+    of the merchant has its monthly invoice.
+    """
+    batch.status = InvoiceBatch.STATUS.RUNNING
+    batch.started_at = batch.started_at or timezone.now()
+    batch.error = None
+    batch.save(update_fields=["status", "started_at", "error", "updated_at"])
+    try:
+        if not batch.is_cancellation_done:
+            cancel_unpaid_invoices(batch)
+
+        supply_given = {}
+        if not batch.merchant.is_fixed_fee_merchant:
+            supply_given = get_supply_given(batch)
+
+        pending = get_pending_memberships(batch)
+        batch.total_memberships = (
+            batch.processed_memberships + pending.filter(id__gt=batch.cursor).count()
+        )
+        batch.save(update_fields=["total_memberships", "updated_at"])
+        while True:
+            memberships = list(pending.filter(id__gt=batch.cursor)[: batch.chunk_size])
+            if not memberships:
+                break
+            create_chunk_invoices(batch, memberships, supply_given)
+    except Exception as e:
+        logger.exception("Invoice batch %s failed", batch.id)
+        batch.status = InvoiceBatch.STATUS.FAILED
+        batch.error = str(e)
+    else:
+        batch.status = InvoiceBatch.STATUS.COMPLETED
+    finally:
+        # bulk_create/update() skip the model signals that refresh the dashboard
+        # and bump the versions of the public customer responses
+        invalidate_merchant_dashboard(batch.merchant_id)
+        bump_merchant_versions(batch.merchant_id)
+    batch.finished_at = timezone.now()
+    batch.save(update_fields=["status", "error", "finished_at", "updated_at"])
+    return batch
+
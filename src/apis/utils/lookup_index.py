@@ -0,0 +1,150 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from apis.models.lookup import Lookup
+from apis.models.mixins.uid import bulk_assign_uids
+from apis.utils.views import get_content_etag
+
+LOOKUP_VERSION_KEY = "lookup-version"
+CITY_TYPE_NAME = "city"
+
+# Rendered lookup lists are replaced by bumping the version
+LOOKUP_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+_index = None
+_index_lock = threading.Lock()
+# Rendered lookup list and ETag by flag, with the version they were rendered at
+_responses = {}
+
+
+def get_lookup_version():
+    """
+    Return the current version of the lookup table, creating it when missing.
+    Versions are timestamps so a flushed cache never brings an old one back.
+    """
+    version = cache.get(LOOKUP_VERSION_KEY)
+    if version is None:
+        cache.add(LOOKUP_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(LOOKUP_VERSION_KEY)
+    return version
+
+
+def invalidate_lookups():
+    """Mark every process's lookup index (and cached lookups) as stale."""
+    cache.set(LOOKUP_VERSION_KEY, time.time_ns(), None)
+
+
+class LookupIndex:
+    """
+    Cities and their areas by name, as stored under the `city` lookup type.
+
+    :param city_type_id: Id of the `city` lookup type.
+    :param cities: City id by city name.
+    :param areas: Area id by area name, by city id.
+    """
+
+    def __init__(self, version, city_type_id, cities, areas):
+        self.version = version
+        self.city_type_id = city_type_id
+        self.cities = cities
+        self.areas = areas
+
+    @classmethod
+    def load(cls, version):
+        city_type_id = Lookup.objects.values_list("id", flat=True).get(
+            name=CITY_TYPE_NAME, type=None
+        )
+        cities, areas = {}, {}
+        rows = Lookup.objects.filter(
+            Q(type_id=city_type_id) | Q(type__type_id=city_type_id)
+        ).values_list("id", "name", "type_id")
+        for lookup_id, name, type_id in rows:
+            if type_id == city_type_id:
+                cities[name] = lookup_id
+                areas.setdefault(lookup_id, {})
+            else:
+                areas.setdefault(type_id, {})[name] = lookup_id
+        return cls(version, city_type_id, cities, areas)
+
+    def has(self, city, area):
+        city_id = self.cities.get(city)
+        return city_id is not None and area in self.areas.get(city_id, {})
+
+
+def get_lookup_index():
+    """Return this process's lookup index, reloaded when another process changed lookups."""
+    global _index
+    version = get_lookup_version()
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = LookupIndex.load(version)
+        return _index
+
+
+def bulk_get_or_create_city_areas(pairs):
+    """
+    Make sure every (city, area) pair exists as a city lookup with an area under
+    it. Names must already be normalized; known pairs cost no queries and the
+    missing ones are created with one insert per level.
+    """
+    index = get_lookup_index()
+    missing = {pair for pair in pairs if not index.has(*pair)}
+    if not missing:
+        return
+
+    with transaction.atomic():
+        new_cities = {city for city, _ in missing if city not in index.cities}
+        Lookup.objects.bulk_create(
+            bulk_assign_uids(
+                [Lookup(name=city, type_id=index.city_type_id) for city in new_cities]
+            ),
+            ignore_conflicts=True,
+        )
+        city_ids = dict(
+            Lookup.objects.filter(
+                type_id=index.city_type_id, name__in={city for city, _ in missing}
+            ).values_list("name", "id")
+        )
+        Lookup.objects.bulk_create(
+            bulk_assign_uids(
+                [Lookup(name=area, type_id=city_ids[city]) for city, area in missing]
+            ),
+            ignore_conflicts=True,
+        )
+    # bulk_create() skips the model signals, indexes reload once this commits
+    transaction.on_commit(invalidate_lookups)
+
+
+def get_or_create_city_area(city, area):
+    """Make sure a normalized (city, area) pair exists, see `bulk_get_or_create_city_areas`."""
+    bulk_get_or_create_city_areas([(city, area)])
+
+
+def get_lookup_response(flag, render):
+    """
+    Return the rendered lookup list of a flag and its ETag. Lists are rendered
+    once per lookup version and kept in this process and the shared cache.
+
+    :param render: Callable returning the response body of the flag as bytes.
+    :return: A tuple (content, etag).
+    """
+    version = get_lookup_version()
+    cached = _responses.get(flag)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    key = f"lookup-response:{version}:{flag}"
+    payload = cache.get(key)
+    if payload is None:
+        content = render()
+        payload = (content, get_content_etag(content))
+        # Flags come from the URL, keep unknown (empty) ones out of the caches
+        if content == b"[]":
+            return payload
+        cache.set(key, payload, LOOKUP_RESPONSE_CACHE_TIMEOUT)
+    _responses[flag] = (version, *payload)
+    return payload
@@ -0,0 +1,286 @@
+import logging
+import math
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from apis.factories import OTPSenderFactory
+from apis.models.merchant import Merchant
+from apis.models.outbound_message import OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# Doubled after every failed attempt: 30s, 1m, 2m, 4m
+RETRY_DELAY = timedelta(seconds=30)
+# Messages claimed longer ago belong to a worker that died while sending
+CLAIM_TIMEOUT = timedelta(minutes=5)
+# Messages of one merchant being sent at the same time, across workers
+MERCHANT_CONCURRENCY = 5
+# Someone is waiting for their OTP, it goes ahead of queued reminders
+OTP_PRIORITY = 10
+
+
+def enqueue_message(member, channel, kind, payload, priority=0):
+    """Queue a message for the worker, it is visible once the caller's transaction commits."""
+    return OutboundMessage.objects.create(
+        member=member,
+        channel=channel,
+        kind=kind,
+        payload=payload,
+        priority=priority,
+        available_at=timezone.now(),
+    )
+
+
+def enqueue_otp(member, otp, channel):
+    """
+    Queue an OTP for the member, dropping their OTPs still waiting to be sent
+    or retried: those codes are replaced and must not arrive after this one.
+    """
+    OutboundMessage.objects.filter(
+        member=member,
+        kind=OutboundMessage.KIND.OTP,
+        status=OutboundMessage.STATUS.PENDING,
+    ).update(
+        status=OutboundMessage.STATUS.FAILED,
+        payload={},
+        error="Superseded by a newer OTP.",
+        updated_at=timezone.now(),
+    )
+    return enqueue_message(
+        member, channel, OutboundMessage.KIND.OTP, {"otp": otp}, OTP_PRIORITY
+    )
+
+
+def claim_messages(limit, channels=None, merchant_concurrency=MERCHANT_CONCURRENCY):
+    """
+    Mark up to `limit` due messages as `sending` and return them. Rows locked by
+    another worker are skipped, so several workers can run side by side, and a
+    merchant never has more than `merchant_concurrency` messages in flight.
+
+    Candidates are taken merchant by merchant, at most `merchant_concurrency`
+    each and none from merchants already at their cap, so one merchant's
+    backlog cannot crowd the others out. The in-flight counts are read with the
+    candidates' merchant rows locked, which serializes the cap check of
+    concurrent workers per merchant.
+    """
+    now = timezone.now()
+    STATUS = OutboundMessage.STATUS
+    due = Q(status=STATUS.PENDING, available_at__lte=now) | Q(
+        status=STATUS.SENDING, claimed_at__lt=now - CLAIM_TIMEOUT
+    )
+    in_flight = OutboundMessage.objects.filter(
+        status=STATUS.SENDING, claimed_at__gte=now - CLAIM_TIMEOUT
+    )
+    queryset = OutboundMessage.objects.filter(due)
+    if channels:
+        queryset = queryset.filter(channel__in=channels)
+    ordering = ["-priority", "available_at"]
+
+    at_cap = (
+        in_flight.filter(merchant__isnull=False)
+        .values("merchant_id")
+        .annotate(count=Count("id"))
+        .filter(count__gte=merchant_concurrency)
+        .values("merchant_id")
+    )
+    ranked = (
+        queryset.exclude(merchant_id__in=at_cap)
+        .annotate(
+            rank=Window(RowNumber(), partition_by=F("merchant_id"), order_by=ordering)
+        )
+        .filter(Q(rank__lte=merchant_concurrency) | Q(merchant__isnull=True))
+        .order_by(*ordering)
+        .values_list("id", flat=True)
+    )
+    # A few extra candidates make up for the ones claimed by another worker
+    candidate_ids = list(ranked[: limit * 2])
+
+    with transaction.atomic():
+        candidates = list(
+            queryset.filter(id__in=candidate_ids)
+            .select_for_update(skip_locked=True)
+            .order_by(*ordering)
+            .values_list("id", "merchant_id")
+        )
+        merchant_ids = {merchant_id for _, merchant_id in candidates} - {None}
+        # Held until commit, a worker claiming for the same merchants waits
+        # here and then counts the messages claimed by this one
+        list(
+            Merchant.objects.select_for_update()
+            .filter(id__in=merchant_ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        sending = Counter(
+            dict(
+                in_flight.filter(merchant_id__in=merchant_ids)
+                .values("merchant_id")
+                .annotate(count=Count("id"))
+                .values_list("merchant_id", "count")
+            )
+        )
+        message_ids = []
+        for message_id, merchant_id in candidates:
+            if merchant_id is not None:
+                if sending[merchant_id] >= merchant_concurrency:
+                    continue
+                sending[merchant_id] += 1
+            message_ids.append(message_id)
+            if len(message_ids) == limit:
+                break
+        OutboundMessage.objects.filter(id__in=message_ids).update(
+            status=OutboundMessage.STATUS.SENDING,
+            claimed_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        OutboundMessage.objects.filter(id__in=message_ids)
+        .select_related("member__user", "member__merchant")
+        .order_by(*ordering)
+    )
+
+
+def send_otp_message(message):
+    sender = OTPSenderFactory.get_sender(message.channel)
+    sender.send_otp(message.member, message.payload["otp"])
+
+
+def send_text_message(message):
+    """Send a message rendered when it was queued, see `ReminderCampaign`."""
+    sender = OTPSenderFactory.get_sender(message.channel)
+    sender.send_message(
+        message.member, message.payload["subject"], message.payload["body"]
+    )
+
+
+MESSAGE_HANDLERS = {
+    OutboundMessage.KIND.OTP: send_otp_message,
+    OutboundMessage.KIND.REMINDER: send_text_message,
+}
+
+
+def clear_secrets(message):
+    """Drop the code of an OTP message once it is sent or given up on."""
+    if message.kind == OutboundMessage.KIND.OTP:
+        message.payload.pop("otp", None)
+
+
+def is_superseded(message):
+    """Whether a newer OTP was queued for the member since this one."""
+    return OutboundMessage.objects.filter(
+        member_id=message.member_id,
+        kind=OutboundMessage.KIND.OTP,
+        created_at__gt=message.created_at,
+    ).exists()
+
+
+def deliver_message(message):
+    """Send a claimed message and record the outcome, scheduling a retry on failure."""
+    # A retried or reclaimed OTP can outlive the code it carries
+    retried_otp = message.kind == OutboundMessage.KIND.OTP and message.attempts > 1
+    if retried_otp and is_superseded(message):
+        message.status = OutboundMessage.STATUS.FAILED
+        message.error = "Superseded by a newer OTP."
+        clear_secrets(message)
+        message.save(update_fields=["status", "error", "payload", "updated_at"])
+        return False
+
+    try:
+        MESSAGE_HANDLERS[message.kind](message)
+    except Exception as error:
+        logger.warning("Delivery of message %s failed: %s", message.id, error)
+        message.error = f"{type(error).__name__}: {error}"
+        if message.attempts >= MAX_ATTEMPTS:
+            message.status = OutboundMessage.STATUS.FAILED
+            clear_secrets(message)
+        else:
+            message.status = OutboundMessage.STATUS.PENDING
+            message.available_at = timezone.now() + RETRY_DELAY * 2 ** (
+                message.attempts - 1
+            )
+        message.save(
+            update_fields=["status", "available_at", "error", "payload", "updated_at"]
+        )
+        return False
+
+    message.status = OutboundMessage.STATUS.SENT
+    message.sent_at = timezone.now()
+    message.latency_ms = (message.sent_at - message.created_at) // timedelta(
+        milliseconds=1
+    )
+    message.error = None
+    clear_secrets(message)
+    message.save(
+        update_fields=[
+            "status",
+            "sent_at",
+            "latency_ms",
+            "error",
+            "payload",
+            "updated_at",
+        ]
+    )
+    return True
+
+
+def process_outbound_messages(limit, channels=None, rate=None, **claim_options):
+    """
+    Claim and deliver one batch of due messages.
+
+    :param rate: Maximum number of messages sent per second, None for no limit.
+    :return: A tuple (sent, failed) of the numbers of messages of the batch.
+    """
+    messages = claim_messages(limit, channels, **claim_options)
+    sent = 0
+    next_send = time.monotonic()
+    for message in messages:
+        if rate:
+            time.sleep(max(0, next_send - time.monotonic()))
+            next_send = max(next_send, time.monotonic()) + 1 / rate
+        sent += deliver_message(message)
+    return sent, len(messages) - sent
+
+
+def get_delivery_stats(since):
+    """
+    Delivery figures of the messages enqueued since a datetime, by channel and
+    kind: counts by outcome and the average, 95th percentile and maximum latency
+    (enqueue to delivery, in ms) of the sent ones. Campaign reminders are queued
+    spread out in time, their latency includes that wait.
+    """
+    STATUS = OutboundMessage.STATUS
+    messages = OutboundMessage.objects.filter(created_at__gte=since)
+    rows = (
+        messages.values("channel", "kind")
+        .annotate(
+            total=Count("id"),
+            sent=Count("id", filter=Q(status=STATUS.SENT)),
+            failed=Count("id", filter=Q(status=STATUS.FAILED)),
+            queued=Count("id", filter=Q(status__in=[STATUS.PENDING, STATUS.SENDING])),
+            retried=Count("id", filter=Q(attempts__gt=1)),
+            avg_latency_ms=Avg("latency_ms"),
+            max_latency_ms=Max("latency_ms"),
+        )
+        .order_by("channel", "kind")
+    )
+    stats = {}
+    for row in rows:
+        channel, kind = row.pop("channel"), row.pop("kind")
+        row["p95_latency_ms"] = None
+        if row["sent"]:
+            # Nearest-rank percentile, read straight from the sorted latencies
+            rank = math.ceil(row["sent"] * 0.95) - 1
+            row["p95_latency_ms"] = (
+                messages.filter(channel=channel, kind=kind, status=STATUS.SENT)
+                .order_by("latency_ms")
+                .values_list("latency_ms", flat=True)[rank]
+            )
+        stats[channel, kind] = row
+    return stats
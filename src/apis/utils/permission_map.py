@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import time
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+# Maps never go stale by themselves, they are replaced by bumping the version
+PERMISSION_MAP_CACHE_TIMEOUT = 60 * 60 * 24
+PERMISSION_MAP_VERSION_KEY = "permission-map-version"
+
+# Compiled maps of this process, keyed by permission signature
+_local_maps = {}
+_local_version = None
+_local_lock = threading.Lock()
+
+
+def get_permission_map_version():
+    """
+    Return the current permission map version, creating it when missing.
+    Versions are timestamps so a flushed cache never brings an old one back.
+    """
+    version = cache.get(PERMISSION_MAP_VERSION_KEY)
+    if version is None:
+        cache.add(PERMISSION_MAP_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(PERMISSION_MAP_VERSION_KEY)
+    return version
+
+
+def bump_permission_map_version():
+    """
+    Drop every compiled permission map, in all processes, once the current
+    transaction commits so a concurrent request can't cache the old groups
+    and permissions again under the new version.
+    """
+    transaction.on_commit(
+        lambda: cache.set(PERMISSION_MAP_VERSION_KEY, time.time_ns(), None)
+    )
+
+
+def get_user_signature_cache_key(version, user_id):
+    return f"user-permission-signature:{version}:{user_id}"
+
+
+def invalidate_user_permission_signature(*user_ids):
+    """
+    Drop the cached group set and direct permissions of the given users once
+    the current transaction commits.
+    """
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if not user_ids:
+        return
+
+    def invalidate():
+        version = get_permission_map_version()
+        cache.delete_many(
+            [get_user_signature_cache_key(version, user_id) for user_id in user_ids]
+        )
+
+    transaction.on_commit(invalidate)
+
+
+def get_user_signature(user_id, version):
+    """Return the (group ids, direct permission ids) of a user, from the cache when possible."""
+    key = get_user_signature_cache_key(version, user_id)
+    signature = cache.get(key)
+    if signature is None:
+        groups, permissions = set(), set()
+        rows = User.objects.filter(id=user_id).values_list(
+            "groups__id", "user_permissions__id"
+        )
+        for group_id, permission_id in rows:
+            if group_id:
+                groups.add(group_id)
+            if permission_id:
+                permissions.add(permission_id)
+        signature = (tuple(sorted(groups)), tuple(sorted(permissions)))
+        cache.set(key, signature, PERMISSION_MAP_CACHE_TIMEOUT)
+    return signature
+
+
+def build_permission_map(group_ids, permission_ids):
+    """Group the codenames granted by the groups and direct permissions by model name."""
+    permission_map = {}
+    rows = (
+        Permission.objects.filter(Q(group__id__in=group_ids) | Q(id__in=permission_ids))
+        .values_list("content_type__model", "codename")
+        .distinct()
+    )
+    for model_name, codename in rows:
+        permission_map.setdefault(model_name, set()).add(codename)
+    return {
+        model_name: sorted(codenames)
+        for model_name, codenames in permission_map.items()
+    }
+
+
+def get_permission_map(user):
+    """
+    Return the permissions of a user grouped by model name.
+
+    Maps are compiled once per (group set, direct permissions) and kept in this
+    process and in the shared cache until `update_permissions` runs or a group's
+    permissions change.
+    """
+    global _local_version
+    version = get_permission_map_version()
+    signature = get_user_signature(user.id, version)
+    with _local_lock:
+        if _local_version != version:
+            _local_maps.clear()
+            _local_version = version
+        permission_map = _local_maps.get(signature)
+    if permission_map is not None:
+        return permission_map
+
+    digest = hashlib.sha1(repr(signature).encode()).hexdigest()
+    key = f"permission-map:{version}:{digest}"
+    permission_map = cache.get(key)
+    if permission_map is None:
+        permission_map = build_permission_map(*signature)
+        cache.set(key, permission_map, PERMISSION_MAP_CACHE_TIMEOUT)
+    with _local_lock:
+        if _local_version == version:
+            _local_maps[signature] = permission_map
+    return permission_map
@@ -0,0 +1,145 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apis.models.invoice import Invoice
+from apis.models.mixins.uid import bulk_create_with_uids
+from apis.models.outbound_message import OutboundMessage
+from apis.models.reminder_campaign import ReminderCampaign
+
+logger = logging.getLogger(__name__)
+
+REMINDER_TEMPLATES = {
+    OutboundMessage.CHANNEL.EMAIL: "emails/invoice_reminder.html",
+    OutboundMessage.CHANNEL.SMS: "messages/invoice_reminder.txt",
+}
+
+# Compiled templates by name, loaded once per process
+_templates = {}
+
+
+def get_reminder_template(channel):
+    name = REMINDER_TEMPLATES[channel]
+    template = _templates.get(name)
+    if template is None:
+        template = _templates[name] = get_template(name)
+    return template
+
+
+def get_due_memberships(campaign):
+    """
+    Memberships of the campaign's merchant with unpaid invoices due at least
+    `overdue_days` ago, with the count, total and oldest due date of those
+    invoices, in one grouped query.
+    """
+    cutoff = timezone.localdate() - timedelta(days=campaign.overdue_days)
+    memberships = campaign.merchant.members.filter(
+        invoices__status=Invoice.STATUS.UNPAID,
+        invoices__due_date__lte=cutoff,
+        invoices__due_amount__gt=0,
+    )
+    # Customers the channel can not reach would only pile up failed messages
+    if campaign.channel == OutboundMessage.CHANNEL.EMAIL:
+        memberships = memberships.exclude(member__user__email="")
+    elif campaign.channel == OutboundMessage.CHANNEL.SMS:
+        memberships = memberships.exclude(member__primary_phone="")
+    return (
+        memberships.values("id", "member_id", "member__user__first_name")
+        .annotate(
+            unpaid_invoices=Count("invoices"),
+            unpaid_amount=Sum("invoices__due_amount"),
+            oldest_due_date=Min("invoices__due_date"),
+        )
+        .filter(unpaid_amount__gte=campaign.min_due_amount)
+        .order_by("id")
+    )
+
+
+def enqueue_chunk_reminders(campaign, memberships):
+    """
+    Render the reminders of one chunk, queue them spread `rate_per_minute` apart
+    from the campaign start and move the campaign cursor.
+    """
+    merchant = campaign.merchant
+    template = get_reminder_template(campaign.channel)
+    subject = f"Payment reminder from {merchant.name}"
+    interval = timedelta(minutes=1) / campaign.rate_per_minute
+    now = timezone.now()
+    messages = []
+    for position, membership in enumerate(
+        memberships, start=campaign.processed_memberships
+    ):
+        body = template.render(
+            {
+                "merchant_name": merchant.name,
+                "recipient_name": membership["member__user__first_name"],
+                "unpaid_invoices": membership["unpaid_invoices"],
+                "unpaid_amount": membership["unpaid_amount"],
+                "oldest_due_date": membership["oldest_due_date"],
+            }
+        )
+        messages.append(
+            OutboundMessage(
+                member_id=membership["member_id"],
+                merchant=merchant,
+                campaign=campaign,
+                channel=campaign.channel,
+                kind=OutboundMessage.KIND.REMINDER,
+                payload={"subject": subject, "body": body.strip()},
+                available_at=max(now, campaign.started_at + interval * position),
+                created_at=now,
+            )
+        )
+
+    with transaction.atomic():
+        bulk_create_with_uids(OutboundMessage, messages)
+        campaign.cursor = memberships[-1]["id"]
+        campaign.processed_memberships += len(memberships)
+        campaign.save(update_fields=["cursor", "processed_memberships", "updated_at"])
+
+
+def run_reminder_campaign(campaign):
+    """
+    Queue the reminders of a campaign, or resume a failed one from its cursor,
+    until every due membership of the merchant has one.
+    """
+    campaign.status = ReminderCampaign.STATUS.RUNNING
+    campaign.started_at = campaign.started_at or timezone.now()
+    campaign.error = None
+    campaign.save(update_fields=["status", "started_at", "error", "updated_at"])
+    try:
+        due = get_due_memberships(campaign)
+        campaign.total_memberships = (
+            campaign.processed_memberships + due.filter(id__gt=campaign.cursor).count()
+        )
+        campaign.save(update_fields=["total_memberships", "updated_at"])
+        while True:
+            memberships = list(
+                due.filter(id__gt=campaign.cursor)[: campaign.chunk_size]
+            )
+            if not memberships:
+                break
+            enqueue_chunk_reminders(campaign, memberships)
+    except Exception as e:
+        logger.exception("Reminder campaign %s failed", campaign.id)
+        campaign.status = ReminderCampaign.STATUS.FAILED
+        campaign.error = str(e)
+    else:
+        campaign.status = ReminderCampaign.STATUS.COMPLETED
+    campaign.finished_at = timezone.now()
+    campaign.save(update_fields=["status", "error", "finished_at", "updated_at"])
+    return campaign
+
+
+def get_campaign_results(campaign):
+    """Numbers of the campaign's reminders sent, failed and still queued."""
+    STATUS = OutboundMessage.STATUS
+    return campaign.messages.aggregate(
+        sent=Count("id", filter=Q(status=STATUS.SENT)),
+        failed=Count("id", filter=Q(status=STATUS.FAILED)),
+        queued=Count("id", filter=Q(status__in=[STATUS.PENDING, STATUS.SENDING])),
+    )
@@ -0,0 +1,140 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F
+
+from apis.models.member_role import RoleChoices
+from apis.models.merchant_member import MerchantMember
+
+# Entries are dropped whenever a merchant, member or role of the user changes, the
+# timeout only bounds staleness when several workers keep their own in-memory cache.
+USER_ACCESS_CACHE_TIMEOUT = 60
+
+# Access context embedded in the JWTs issued at login and refresh
+ACCESS_CLAIMS = ["merchant_id", "staff_merchant_id", "member_id", "roles"]
+ACCESS_VERSION_CLAIM = "access_version"
+
+
+def get_user_access_cache_key(user_id):
+    return f"user-access:{user_id}"
+
+
+def get_access_version_cache_key(user_id):
+    return f"user-access-version:{user_id}"
+
+
+def invalidate_user_access(*user_ids):
+    """Drop the cached access context and access version of the given users."""
+    keys = []
+    for user_id in user_ids:
+        if user_id:
+            keys.append(get_user_access_cache_key(user_id))
+            keys.append(get_access_version_cache_key(user_id))
+    if keys:
+        cache.delete_many(keys)
+
+
+def bump_access_version(*user_ids):
+    """
+    Revoke the access claims of tokens already issued to the given users, their
+    next requests fall back to resolving the access from the database.
+    """
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if user_ids:
+        MerchantMember.objects.filter(user_id__in=user_ids).update(
+            access_version=F("access_version") + 1
+        )
+        invalidate_user_access(*user_ids)
+
+
+def load_user_access(user_id):
+    """
+    Resolve the merchant, profile and roles of a user with one joined query.
+
+    :return: A dict with `merchant_id` (owned merchant, or the merchant the user
+        is staff of), `staff_merchant_id`, `member_id`, `roles`, `is_staff` and
+        `access_version`.
+    """
+    rows = list(
+        User.objects.filter(id=user_id).values_list(
+            "merchant__id",
+            "profile__id",
+            "profile__merchant_id",
+            "profile__access_version",
+            "profile__roles__role",
+        )
+    )
+    owned_merchant_id, member_id, staff_merchant_id, access_version = (
+        rows[0][:4] if rows else (None, None, None, None)
+    )
+    roles = sorted({row[4] for row in rows if row[4]})
+    is_staff = RoleChoices.STAFF in roles
+    return {
+        "merchant_id": owned_merchant_id or (staff_merchant_id if is_staff else None),
+        "staff_merchant_id": staff_merchant_id,
+        "member_id": member_id,
+        "roles": roles,
+        "is_staff": is_staff,
+        "access_version": access_version or 0,
+    }
+
+
+def get_user_access(user):
+    """Return the access context of a user, from the cache when possible."""
+    key = get_user_access_cache_key(user.id)
+    access = cache.get(key)
+    if access is None:
+        access = load_user_access(user.id)
+        cache.set(key, access, USER_ACCESS_CACHE_TIMEOUT)
+    return access
+
+
+def get_access_version(user_id):
+    """Return the current access version of a user, from the cache when possible."""
+    key = get_access_version_cache_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            MerchantMember.objects.filter(user_id=user_id)
+            .values_list("access_version", flat=True)
+            .first()
+        ) or 0
+        cache.set(key, version, USER_ACCESS_CACHE_TIMEOUT)
+    return version
+
+
+def set_access_claims(token, user_id):
+    """Embed the current access context of a user in a token."""
+    access = load_user_access(user_id)
+    for claim in ACCESS_CLAIMS:
+        token[claim] = access[claim]
+    token[ACCESS_VERSION_CLAIM] = access["access_version"]
+    return token
+
+
+def get_token_access(request):
+    """
+    Return the access context carried by the request's token, or None when the
+    token has no access claims or they were revoked by a newer access version.
+    """
+    token = request.auth
+    if token is None or ACCESS_VERSION_CLAIM not in token:
+        return None
+    if token[ACCESS_VERSION_CLAIM] != get_access_version(request.user.id):
+        return None
+    access = {claim: token.get(claim) for claim in ACCESS_CLAIMS}
+    access["roles"] = access["roles"] or []
+    access["is_staff"] = RoleChoices.STAFF in access["roles"]
+    access["access_version"] = token[ACCESS_VERSION_CLAIM]
+    return access
+
+
+def get_request_access(request):
+    """
+    Return the access context of the request's user, resolved once per request:
+    from the token claims when they are current, otherwise from the cache.
+    """
+    access = getattr(request, "access", None)
+    if access is None:
+        access = get_token_access(request) or get_user_access(request.user)
+        request.access = access
+    return access
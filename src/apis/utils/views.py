@@ -1,62 +1,70 @@
+import hashlib
 from decimal import Decimal
+from django.http import HttpResponse, HttpResponseNotModified
 
-from django.db.models import Sum
-from django.utils import timezone
+from apis.models.membership_balance import MembershipBalance
+from apis.models.merchant_membership import MerchantMembership
 
-from django.db.models.functions import Coalesce
-from apis.models.supply_record import SupplyRecord
-from apis.models.transaction_history import TransactionHistory
 
+def has_supply_stats(membership):
+    return not (membership.merchant.is_fixed_fee_merchant or membership.is_monthly)
 
-def get_customer_stats(membership):
-    today = timezone.now().date()
-    first_of_this_month = today.replace(day=1)
-    transaction_summary = membership.membership_transactions.filter(
-        type=TransactionHistory.TYPES.BILLING,
-    )
-    # Calculate total credit amount for transactions of type 'credit'
-    total_credit = transaction_summary.filter(
-        transaction_type=TransactionHistory.TRANSACTION_TYPE.CREDIT
-    ).aggregate(total_credit=Sum("value", default=Decimal(0)))["total_credit"]
-
-    total_adjustment = transaction_summary.filter(
-        transaction_type=TransactionHistory.TRANSACTION_TYPE.ADJUSTMENT
-    ).aggregate(credit_adjustment=Sum("value", default=Decimal(0)))["credit_adjustment"]
-
-    # Calculate total debit amount
-    total_debit = (
-        transaction_summary.filter(
-            transaction_type=TransactionHistory.TRANSACTION_TYPE.DEBIT
-        ).aggregate(total_debit=Sum("value", default=0))["total_debit"]
-        or 0
-    )
-
-    # Calculate the remaining debit amount (total debit - total credit)
-    user_amounts_balance = total_credit - (total_debit - total_adjustment)
-    response = {
-        "total_spend": {"value": total_credit, "name": "Total Spend"},
-        "user_amounts_balance": {"value": user_amounts_balance, "name": "Balance"},
-        "total_saved": {"value": membership.total_saved, "name": "Total Saved"},
-    }
-    if not membership.merchant.is_fixed_fee_merchant:
-        if not membership.is_monthly:
-            supply_totals = SupplyRecord.objects.filter(
-                merchant_membership=membership
-            ).aggregate(
-                total_given=Coalesce(Sum("given"), 0),
-                total_taken=Coalesce(Sum("taken"), 0),
-            )
-
-            # If no supply records exist, set defaults to 0
-            total_given = supply_totals.get("total_given", 0)
-            total_taken = supply_totals.get("total_taken", 0)
-
-            # Calculate the balance
-            supply_balance = total_taken - total_given
+
+def get_customers_stats(memberships):
+    """
+    Profile card figures of many memberships, read from their stored ledger
+    totals in one query. The totals are only re-summed from the history by the
+    `reconcile_balances` command.
+
+    :return: The stats of each membership, by membership id.
+    """
+    memberships = MerchantMembership.objects.filter(
+        id__in=[membership.id for membership in memberships]
+    ).select_related("merchant", "ledger")
+
+    stats = {}
+    for membership in memberships:
+        try:
+            ledger = membership.ledger
+        except MembershipBalance.DoesNotExist:
+            # No ledger row yet, nothing was ever billed or supplied
+            ledger = MembershipBalance(total_credit=Decimal(0), balance=Decimal(0))
+
+        response = {
+            "total_spend": {"value": ledger.total_credit, "name": "Total Spend"},
+            "user_amounts_balance": {"value": ledger.balance, "name": "Balance"},
+            "total_saved": {"value": membership.total_saved, "name": "Total Saved"},
+        }
+        if has_supply_stats(membership):
             response["supply_balance"] = {
-                "value": supply_balance,
+                "value": ledger.supply_balance,
                 "name": "Supply Balance",
             }
             if membership.merchant.is_water_supply:
                 response["supply_balance"]["name"] = "Bottles Balance"
+        stats[membership.id] = response
+    return stats
+
+
+def get_customer_stats(membership):
+    return get_customers_stats([membership])[membership.id]
+
+
+def get_content_etag(content):
+    """Strong ETag of a rendered response body."""
+    return f'"{hashlib.sha1(content).hexdigest()}"'
+
+
+def get_etag_response(request, content, etag):
+    """
+    Return a rendered JSON body with its ETag, or an empty 304 when the client
+    already holds it (If-None-Match).
+    """
+    if_none_match = request.headers.get("If-None-Match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in client_etags or "*" in client_etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type="application/json")
+    response["ETag"] = etag
     return response
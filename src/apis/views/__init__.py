@@ -7,6 +7,10 @@ from apis.views.merchant import (
     MerchantDashboardRetrieveAPIView,
     MerchantFooterRetrieveUpdateAPIView,
     MerchantMonthlyMembershipInvoiceCreateAPIView,
+    MerchantMonthlyMembershipInvoiceRetrieveAPIView,
+    MerchantReminderCampaignCreateAPIView,
+    MerchantReminderCampaignRetrieveAPIView,
+    MerchantSupplyRecordBulkCreateAPIView,
 )
 
 from apis.views.member import (
@@ -56,4 +60,8 @@ __all__ = [
     "PublicCustomerProfileRetrieveAPIView",
     "MemberTransactionHistoryListCreateAPIView",
     "MerchantMonthlyMembershipInvoiceCreateAPIView",
+    "MerchantMonthlyMembershipInvoiceRetrieveAPIView",
+    "MerchantReminderCampaignCreateAPIView",
+    "MerchantReminderCampaignRetrieveAPIView",
+    "MerchantSupplyRecordBulkCreateAPIView",
 ]
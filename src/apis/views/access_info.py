@@ -2,9 +2,10 @@ from rest_framework import generics
 from rest_framework.response import Response
 
 from apis.permissions import IsMerchantOrStaff
-from django.contrib.auth.models import Permission
 from apis.serializers.access_info import AccessInfoSerializer
 from apis.models.member_role import RoleChoices
+from apis.utils.permission_map import get_permission_map
+from apis.utils.request_context import get_request_access
 
 
 class AccessInfoRetrieveAPIView(generics.RetrieveAPIView):
@@ -23,31 +24,18 @@ class AccessInfoRetrieveAPIView(generics.RetrieveAPIView):
     serializer_class = AccessInfoSerializer
 
     def retrieve(self, request, *args, **kwargs):
-        direct_permissions = request.user.user_permissions.all()
-        group_permissions = Permission.objects.filter(group__user=request.user)
-        all_permissions = direct_permissions | group_permissions
-        grouped_permissions = {}
-
-        for perm in all_permissions.distinct():
-            model_name = perm.content_type.model
-            grouped_permissions.setdefault(model_name, []).append(perm.codename)
-
-        for model, actions in grouped_permissions.items():
-            grouped_permissions[model] = sorted(set(actions))
-
-        # Using prefetch_related for optimizing the roles query
-        is_merchant = (
-            request.user.profile.roles.filter(role=RoleChoices.MERCHANT)
-            .prefetch_related("roles")
-            .exists()
-        )
+        grouped_permissions = get_permission_map(request.user)
+
+        # Roles were already resolved (and cached) by the permission check
+        access = get_request_access(request)
+        is_merchant = RoleChoices.MERCHANT in access["roles"]
 
         return Response(
             {
                 "is_merchant": is_merchant,
                 "permissions": grouped_permissions,
                 "merchant_id": request.merchant.id,
-                "member_id": request.user.profile.id,
+                "member_id": access["member_id"],
                 "merchant_name": request.merchant.name,
                 "merchant_type": request.merchant.type,
                 "is_fixed_fee_merchant": request.merchant.is_fixed_fee_merchant,
@@ -13,6 +13,12 @@ class InvoiceRetrieveUpdateAPIView(generics.RetrieveUpdateAPIView):
     def get_queryset(self):
         return self.request.membership.member.invoices.all().order_by("-created_at")
 
+    def get_object(self):
+        # Loaded together with its membership and merchant by the permission check
+        invoice = self.request.invoice
+        self.check_object_permissions(self.request, invoice)
+        return invoice
+
     @extend_schema(
         description="""
 ### **Handles Invoice Retrieval**
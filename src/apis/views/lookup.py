@@ -1,7 +1,10 @@
 from rest_framework import generics
+from rest_framework.renderers import JSONRenderer
 
 from apis.models.lookup import Lookup
 from apis.serializers.lookup import LookupSerializer
+from apis.utils import get_etag_response
+from apis.utils.lookup_index import get_lookup_response
 from drf_spectacular.utils import extend_schema
 
 
@@ -14,6 +17,14 @@ class LookupListAPIView(generics.ListAPIView):
         flag = self.kwargs["flag"]
         return Lookup.objects.filter(type__name=flag).prefetch_related("sub_types")
 
+    def render_lookups(self):
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return JSONRenderer().render(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        content, etag = get_lookup_response(self.kwargs["flag"], self.render_lookups)
+        return get_etag_response(request, content, etag)
+
     @extend_schema(
         description="""
 ### **Handles Lookup Information Retrieval**
@@ -2,6 +2,8 @@ from datetime import datetime
 from rest_framework import generics, filters
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.pagination import OptInCursorPagination
+
 from apis.models.invoice import Invoice
 from apis.permissions import IsMerchantOrStaff
 from apis.filters.invoice import InvoiceFilter
@@ -13,7 +15,7 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 
 
 class MemberInvoiceListCreateAPIView(generics.ListCreateAPIView):
-    pagination_class = None
+    pagination_class = OptInCursorPagination
     filterset_class = InvoiceFilter
     serializer_class = InvoiceSerializer
     permission_classes = [IsMerchantOrStaff]
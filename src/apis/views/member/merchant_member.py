@@ -44,9 +44,10 @@ class MemberRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
                 merchant=merchant
             )  # For STAFF, use `merchant=merchant`
         else:
-            queryset = queryset.filter(
-                memberships__merchant=merchant
-            )  # For CUSTOMER, use `memberships__merchant=merchant`
+            # For CUSTOMER, use `memberships__merchant=merchant`
+            queryset = queryset.filter(memberships__merchant=merchant).prefetch_related(
+                MerchantMemberSerializer.get_membership_prefetch(merchant)
+            )
             # Subquery to calculate total given and total taken separately
             membership_supply_balances = (
                 SupplyRecord.objects.filter(
@@ -68,7 +69,7 @@ class MemberRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
                     Value(0),
                 )
             )
-        queryset = queryset.distinct()
+        queryset = queryset.select_related("user", "otp").distinct()
 
         return queryset
 
@@ -1,6 +1,8 @@
 from rest_framework import generics
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.pagination import OptInCursorPagination
+
 from apis.permissions import IsMerchantOrStaff
 from apis.models.supply_record import SupplyRecord
 from apis.filters.supply_record import SupplyRecordFilter
@@ -14,7 +16,7 @@ class MemberSupplyRecordListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = SupplyRecordSerializer
     permission_classes = [IsMerchantOrStaff]
     filter_backends = (DjangoFilterBackend,)
-    pagination_class = None
+    pagination_class = OptInCursorPagination
     filterset_class = SupplyRecordFilter
     queryset = SupplyRecord.objects.none()
 
@@ -55,6 +57,7 @@ class MemberSupplyRecordListCreateAPIView(generics.ListCreateAPIView):
         description="""
         \nCreates a new supply record for the customer or updates the existing one for the given day.
         \n- **Only one record per day can be created**. If a record already exists for the day, it will be updated with the new values.
+        \n- `day` (optional): Day the supply is recorded for, defaults to today. Future days are rejected.
         \nFor example:
             \n- Merchant added 1 "given" and 2 "taken", then added 2 "given" and 1 "taken". 
             \n- The record will be updated to reflect 2 "given" and 1 "taken" for that day.
@@ -1,6 +1,8 @@
 from rest_framework import generics
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.pagination import OptInCursorPagination
+
 from apis.permissions import IsMerchantOrStaff
 from apis.models.transaction_history import TransactionHistory
 from apis.serializers.transaction_history import TransactionHistorySerializer
@@ -12,7 +14,7 @@ class MemberTransactionHistoryListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = TransactionHistorySerializer
     permission_classes = [IsMerchantOrStaff]
     filter_backends = (DjangoFilterBackend,)
-    pagination_class = None
+    pagination_class = OptInCursorPagination
     queryset = TransactionHistory.objects.none()
 
     def get_queryset(self):
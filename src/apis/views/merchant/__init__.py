@@ -6,6 +6,12 @@ from apis.views.merchant.merchant import (
 )
 from apis.views.merchant.monthly_membership_invoice import (
     MerchantMonthlyMembershipInvoiceCreateAPIView,
+    MerchantMonthlyMembershipInvoiceRetrieveAPIView,
+)
+from apis.views.merchant.supply_record import MerchantSupplyRecordBulkCreateAPIView
+from apis.views.merchant.reminder_campaign import (
+    MerchantReminderCampaignCreateAPIView,
+    MerchantReminderCampaignRetrieveAPIView,
 )
 
 __all__ = [
@@ -14,4 +20,8 @@ __all__ = [
     "MerchantDashboardRetrieveAPIView",
     "MerchantFooterRetrieveUpdateAPIView",
     "MerchantMonthlyMembershipInvoiceCreateAPIView",
+    "MerchantMonthlyMembershipInvoiceRetrieveAPIView",
+    "MerchantReminderCampaignCreateAPIView",
+    "MerchantReminderCampaignRetrieveAPIView",
+    "MerchantSupplyRecordBulkCreateAPIView",
 ]
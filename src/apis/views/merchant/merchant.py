@@ -2,23 +2,13 @@ from django.utils import timezone
 from rest_framework import generics, filters
 from rest_framework.exceptions import NotFound
 from django.db.models.functions import Coalesce
-from django.db.models import (
-    F,
-    Sum,
-    Case,
-    When,
-    Value,
-    Subquery,
-    OuterRef,
-    IntegerField,
-    DecimalField,
-)
+from django.db.models import F, Value, Exists, OuterRef
 
 from apis.models.merchant import Merchant
-from apis.models.member_role import RoleChoices
-from apis.models.supply_record import SupplyRecord
+from apis.models.member_role import MemberRole, RoleChoices
 from apis.models.merchant_member import MerchantMember
-from apis.models.transaction_history import TransactionHistory
+
+from core.pagination import CodeCursorPagination
 
 from apis.permissions import IsMerchantOrStaff
 from apis.serializers.merchant_member import MerchantMemberSerializer
@@ -34,6 +24,22 @@ class MerchantMemberListCreateAPIView(generics.ListCreateAPIView):
     filter_backends = [filters.SearchFilter]
     search_fields = ["cnic", "code", "primary_phone", "user__first_name"]
 
+    @property
+    def paginator(self):
+        """
+        Page by `code` keyset when the client sends `cursor` (empty for the first
+        page) and keeps the default `-code` ordering, page numbers otherwise.
+        """
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if "cursor" in params and not (
+                "balance" in params or "supply_balance" in params
+            ):
+                self._paginator = CodeCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
     def get_queryset(self):
         role = self.request.query_params.get("role", RoleChoices.CUSTOMER)
         is_paid = self.request.query_params.get("is_paid", None)
@@ -43,113 +49,39 @@ class MerchantMemberListCreateAPIView(generics.ListCreateAPIView):
         is_paid_today = self.request.query_params.get("is_paid_today", None)
         merchant = self.request.merchant
 
-        merchant_member_queryset = MerchantMember.objects.filter(
-            roles__role__in=[
+        has_role = MemberRole.objects.filter(
+            member=OuterRef("pk"),
+            role__in=[
                 RoleChoices.STAFF,
                 RoleChoices.CUSTOMER,
                 RoleChoices.MERCHANT,
-            ]
+            ],
         )
+        merchant_member_queryset = MerchantMember.objects.filter(Exists(has_role))
 
         # Conditionally add the filter based on the role
         if role == RoleChoices.STAFF:
             merchant_member_queryset = merchant.staff_members.select_related(
-                "otp"
+                "user", "otp"
             ).exclude(
                 user=self.request.user
             )  # For STAFF, use `merchant=merchant`
         else:
-            # For CUSTOMER, use memberships filtering
-            merchant_member_queryset = merchant_member_queryset.filter(
-                memberships__merchant=merchant
-            ).distinct()
-
-            # Annotate total_credit, total_debit, and total_adjustment for memberships
-            transaction_history_queryset = TransactionHistory.objects.filter(
-                merchant_membership__merchant=merchant,
-                type=TransactionHistory.TYPES.BILLING,
-            )
-
-            today = timezone.now().date()
-            transaction_history_queryset_today = transaction_history_queryset.filter(
-                created_at__date=today,
-                transaction_type=TransactionHistory.TRANSACTION_TYPE.CREDIT,
-            )
-
-            # Now annotate balances directly on the membership
-            # For each membership, calculate balance by summing debits, credits, and adjustments
-
-            # Subquery to calculate total given and total taken separately
-            membership_supply_balances = (
-                SupplyRecord.objects.filter(
-                    merchant_membership=OuterRef("memberships__id")
-                )
-                .values("merchant_membership")
-                .annotate(
-                    total_given=Sum("given"),
-                    total_taken=Sum("taken"),
-                )
-                .annotate(
-                    total_supply_balance=F("total_taken") - F("total_given"),
-                )
-                .values("total_supply_balance")
-            )
-
-            membership_balance_subquery = (
-                TransactionHistory.objects.filter(
-                    merchant_membership=OuterRef("memberships__id"),
-                    type=TransactionHistory.TYPES.BILLING,
-                )
-                .values("merchant_membership")
-                .annotate(
-                    total_credit=Sum(
-                        Case(
-                            When(
-                                transaction_type=TransactionHistory.TRANSACTION_TYPE.CREDIT,
-                                then=F("value"),
-                            ),
-                            default=Value(0),
-                            output_field=DecimalField(),
-                        )
-                    ),
-                    total_debit=Sum(
-                        Case(
-                            When(
-                                transaction_type=TransactionHistory.TRANSACTION_TYPE.DEBIT,
-                                then=F("value"),
-                            ),
-                            default=Value(0),
-                            output_field=DecimalField(),
-                        )
-                    ),
-                    total_adjustment=Sum(
-                        Case(
-                            When(
-                                transaction_type=TransactionHistory.TRANSACTION_TYPE.ADJUSTMENT,
-                                then=F("value"),
-                            ),
-                            default=Value(0),
-                            output_field=DecimalField(),
-                        )
-                    ),
+            # For CUSTOMER, use memberships filtering. A member has at most one
+            # membership per merchant, so the join needs no distinct() and the
+            # ledger columns below come from that same membership row.
+            merchant_member_queryset = (
+                merchant_member_queryset.filter(memberships__merchant=merchant)
+                .select_related("user", "otp")
+                .prefetch_related(
+                    MerchantMemberSerializer.get_membership_prefetch(merchant)
                 )
-                .annotate(
-                    balance=F("total_credit")
-                    - (F("total_debit") - F("total_adjustment"))
-                )
-                .values("balance")
-            )
-
-            merchant_member_queryset = merchant_member_queryset.annotate(
+            ).annotate(
+                balance=F("memberships__ledger__balance"),
                 supply_balance=Coalesce(
-                    Subquery(membership_supply_balances, output_field=IntegerField()),
-                    Value(0),
-                )
-            )
-            merchant_member_queryset = merchant_member_queryset.annotate(
-                balance=Subquery(
-                    membership_balance_subquery, output_field=DecimalField()
-                )
+                    F("memberships__ledger__supply_balance"), Value(0)
+                ),
+                last_payment_date=F("memberships__ledger__last_payment_date"),
             )
 
             # Filter by paid/unpaid balances
@@ -164,7 +96,7 @@ class MerchantMemberListCreateAPIView(generics.ListCreateAPIView):
 
             if is_paid_today == "true":
                 merchant_member_queryset = merchant_member_queryset.filter(
-                    memberships__membership_transactions__in=transaction_history_queryset_today
+                    last_payment_date=timezone.localdate()
                 )
 
             if balance is not None:
@@ -211,6 +143,12 @@ class MerchantMemberListCreateAPIView(generics.ListCreateAPIView):
                 type=OpenApiTypes.BOOL,
                 enum=[True, False],
             ),
+            OpenApiParameter(
+                name="cursor",
+                description="Page by member code instead of page numbers, send it empty for the first page.",
+                required=False,
+                type=OpenApiTypes.STR,
+            ),
         ],
         description="""
 ### **Retrieve List of Merchant Members**
@@ -254,7 +192,15 @@ class MemberRetrieveByPhoneAPIView(generics.RetrieveAPIView):
     def get_object(self):
         phone = self.kwargs.get("phone")
         try:
-            member = MerchantMember.objects.get(primary_phone=phone)
+            member = (
+                MerchantMember.objects.select_related("user", "otp")
+                .prefetch_related(
+                    MerchantMemberSerializer.get_membership_prefetch(
+                        self.request.merchant
+                    )
+                )
+                .get(primary_phone=phone)
+            )
         except MerchantMember.DoesNotExist:
             raise NotFound(detail="Member with this phone number does not exist.")
         return member
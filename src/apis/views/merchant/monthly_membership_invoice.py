@@ -1,9 +1,14 @@
-from rest_framework.generics import CreateAPIView
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.generics import CreateAPIView, RetrieveAPIView
 from apis.serializers.monthly_membership_invoice import (
     MonthlyMembershipInvoiceSerializer,
 )
 
 from apis.permissions import IsMerchantOrStaff
+from apis.models.invoice_batch import InvoiceBatch
+
+from drf_spectacular.utils import extend_schema
 
 
 class MerchantMonthlyMembershipInvoiceCreateAPIView(CreateAPIView):
@@ -13,3 +18,39 @@ class MerchantMonthlyMembershipInvoiceCreateAPIView(CreateAPIView):
 
     serializer_class = MonthlyMembershipInvoiceSerializer
     permission_classes = [IsMerchantOrStaff]
+
+    @extend_schema(
+        description="""
+### **Generate Monthly Invoices**
+
+Starts generating the monthly invoices of every customer of the merchant in the background
+and returns the batch right away with `202 Accepted`.
+
+- `month`: Month to invoice (defaults to the current month).\n
+- `chunk_size`: Customers invoiced per database transaction (default 500).\n
+
+Poll `merchants/<merchant_id>/monthly-invoices/<batch_id>/` for the progress of the batch.
+""",
+        responses={202: MonthlyMembershipInvoiceSerializer},
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # The process_background_runs worker picks the pending batch up
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class MerchantMonthlyMembershipInvoiceRetrieveAPIView(RetrieveAPIView):
+    """
+    Returns the status and progress of a monthly invoice batch of the merchant.
+    """
+
+    lookup_url_kwarg = "batch_id"
+    serializer_class = MonthlyMembershipInvoiceSerializer
+    permission_classes = [IsMerchantOrStaff]
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return InvoiceBatch.objects.none()
+        return self.request.merchant.invoice_batches.all()
@@ -0,0 +1,57 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.generics import CreateAPIView, RetrieveAPIView
+from apis.serializers.reminder_campaign import ReminderCampaignSerializer
+
+from apis.permissions import IsMerchantOrStaff
+from apis.models.reminder_campaign import ReminderCampaign
+
+from drf_spectacular.utils import extend_schema
+
+
+class MerchantReminderCampaignCreateAPIView(CreateAPIView):
+    """
+    Sends payment reminders to every customer of the merchant with overdue unpaid invoices
+    """
+
+    serializer_class = ReminderCampaignSerializer
+    permission_classes = [IsMerchantOrStaff]
+
+    @extend_schema(
+        description="""
+### **Send Payment Reminders**
+
+Starts queueing a payment reminder for every customer of the merchant with unpaid invoices
+in the background and returns the campaign right away with `202 Accepted`.
+
+- `channel`: `email` or `sms`.\n
+- `overdue_days`: Only invoices due at least this many days ago count (default 0).\n
+- `min_due_amount`: Skip customers owing less than this amount (default 0).\n
+- `rate_per_minute`: Reminders sent per minute for the merchant (default 600).\n
+
+Poll `merchants/<merchant_id>/reminder-campaigns/<campaign_id>/` for the progress of the
+campaign and the numbers of reminders sent and failed.
+""",
+        responses={202: ReminderCampaignSerializer},
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # The process_background_runs worker picks the pending campaign up
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class MerchantReminderCampaignRetrieveAPIView(RetrieveAPIView):
+    """
+    Returns the status, progress and delivery results of a reminder campaign of the merchant.
+    """
+
+    lookup_url_kwarg = "campaign_id"
+    serializer_class = ReminderCampaignSerializer
+    permission_classes = [IsMerchantOrStaff]
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return ReminderCampaign.objects.none()
+        return self.request.merchant.reminder_campaigns.all()
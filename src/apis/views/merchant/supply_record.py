@@ -0,0 +1,42 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.generics import CreateAPIView
+from apis.serializers.supply_record import BulkSupplyRecordSerializer
+
+from apis.permissions import IsMerchantOrStaff
+
+from drf_spectacular.utils import extend_schema
+
+
+class MerchantSupplyRecordBulkCreateAPIView(CreateAPIView):
+    """
+    Records the supply of a whole delivery route of the merchant in one request
+    """
+
+    serializer_class = BulkSupplyRecordSerializer
+    permission_classes = [IsMerchantOrStaff]
+
+    @extend_schema(
+        description=f"""
+### **Record Route Supply**
+
+Records the units given to and taken from many customers of the merchant at once, e.g. a
+whole milk or water delivery route synced from the delivery app.
+
+- `entries`: Up to {BulkSupplyRecordSerializer.MAX_ENTRIES} entries of:\n
+    - `account`: Membership account of the customer.\n
+    - `given`, `taken`: Units given and taken (default 0).\n
+    - `day` (optional): Day of the delivery, defaults to today. Future days are rejected.\n
+
+Like the customer supply endpoint, an entry overwrites the customer's record of that day.
+Entries are saved or rejected one by one: `results` holds, in the order of `entries`, the
+saved record or the reason the entry was rejected (unknown account, or replaced by a later
+entry for the same account and day).
+""",
+        responses={200: BulkSupplyRecordSerializer},
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -2,7 +2,10 @@ from datetime import datetime
 from rest_framework import generics
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.pagination import OptInCursorPagination
+
 from apis.permissions import IsCustomer
+from apis.views.public.mixins import PublicCustomerCacheMixin
 from apis.models.invoice import Invoice
 from apis.filters.invoice import InvoiceFilter
 from apis.serializers.invoice import InvoiceSerializer
@@ -11,8 +14,8 @@ from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
 
-class PublicMemberInvoiceListAPIView(generics.ListAPIView):
-    pagination_class = None
+class PublicMemberInvoiceListAPIView(PublicCustomerCacheMixin, generics.ListAPIView):
+    pagination_class = OptInCursorPagination
     permission_classes = [IsCustomer]
     serializer_class = InvoiceSerializer
     filter_backends = [DjangoFilterBackend]
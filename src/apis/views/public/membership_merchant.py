@@ -1,6 +1,8 @@
 from rest_framework import generics
 
 from apis.permissions import IsCustomer
+from apis.utils.customer_cache import get_versions
+from apis.views.public.mixins import PublicCustomerCacheMixin
 from apis.models.merchant import Merchant
 from apis.models.merchant_membership import MerchantMembership
 from apis.serializers.membership_merchant import MembershipMerchantSerializer
@@ -8,16 +10,23 @@ from apis.serializers.membership_merchant import MembershipMerchantSerializer
 from drf_spectacular.utils import extend_schema
 
 
-class PublicMembershipMerchantsListAPIView(generics.ListAPIView):
+class PublicMembershipMerchantsListAPIView(
+    PublicCustomerCacheMixin, generics.ListAPIView
+):
     pagination_class = None
     permission_classes = [IsCustomer]
     serializer_class = MembershipMerchantSerializer
 
+    def get_cache_scope(self):
+        member_id = self.request.customer["member_id"]
+        (member_version,) = get_versions("member", member_id)
+        return f"member:{member_id}:{member_version}"
+
     def get_queryset(self):
-        member = self.request.member
-        merchant_ids = MerchantMembership.objects.filter(member=member).values_list(
-            "merchant", flat=True
-        )
+        member_id = self.request.customer["member_id"]
+        merchant_ids = MerchantMembership.objects.filter(
+            member_id=member_id
+        ).values_list("merchant", flat=True)
         return Merchant.objects.filter(id__in=merchant_ids)
 
     @extend_schema(
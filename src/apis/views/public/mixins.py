@@ -0,0 +1,46 @@
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from apis.utils import get_content_etag, get_etag_response
+from apis.utils.customer_cache import (
+    PUBLIC_CACHE_TIMEOUT,
+    get_query_digest,
+    get_versions,
+    is_shared_cache,
+)
+
+
+class PublicCustomerCacheMixin:
+    """
+    Serve GET responses of a public customer endpoint from the cache, keyed on
+    the membership's and merchant's versions and the query parameters, with
+    ETag support. Writes bump the versions after they commit, making the old
+    entries unreachable. Responses are only cached in a cache shared by every
+    worker, the other workers would never see the bumps of a per-process one,
+    without it they are rendered on every request and keep their ETag.
+    """
+
+    def get_cache_scope(self):
+        """Key part identifying the data behind the response, None to skip the cache."""
+        membership_id = self.request.customer["membership_id"]
+        if membership_id is None:
+            return None
+        (membership_version,) = get_versions("membership", membership_id)
+        (merchant_version,) = get_versions("merchant", self.kwargs["merchant_id"])
+        return f"{membership_id}:{membership_version}:{merchant_version}"
+
+    def get(self, request, *args, **kwargs):
+        scope = self.get_cache_scope() if is_shared_cache() else None
+        key = scope and (
+            f"public-response:{type(self).__name__}:{scope}:{get_query_digest(request)}"
+        )
+        payload = cache.get(key) if key else None
+        if payload is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = JSONRenderer().render(response.data)
+            payload = (content, get_content_etag(content))
+            if key:
+                cache.set(key, payload, PUBLIC_CACHE_TIMEOUT)
+        return get_etag_response(request, *payload)
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
 
 from apis.permissions import IsCustomer
+from apis.views.public.mixins import PublicCustomerCacheMixin
 from apis.utils import get_customer_stats
 from apis.models.merchant_membership import MerchantMembership
 from apis.serializers.member_profile import MemberProfileSerializer
@@ -10,7 +11,9 @@ from apis.serializers.member_profile import MemberProfileSerializer
 from drf_spectacular.utils import extend_schema
 
 
-class PublicCustomerProfileRetrieveAPIView(generics.RetrieveAPIView):
+class PublicCustomerProfileRetrieveAPIView(
+    PublicCustomerCacheMixin, generics.RetrieveAPIView
+):
     """
     This endpoint provides all the information for members profile cards.
     """
@@ -2,6 +2,7 @@ from rest_framework import generics
 from django_filters.rest_framework import DjangoFilterBackend
 
 from apis.permissions import IsCustomer
+from apis.views.public.mixins import PublicCustomerCacheMixin
 from apis.models.supply_record import SupplyRecord
 from apis.filters.supply_record import SupplyRecordFilter
 from apis.models.merchant_membership import MerchantMembership
@@ -11,7 +12,9 @@ from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
 
-class PublicMemberSupplyRecordListAPIView(generics.ListAPIView):
+class PublicMemberSupplyRecordListAPIView(
+    PublicCustomerCacheMixin, generics.ListAPIView
+):
     serializer_class = SupplyRecordSerializer
     permission_classes = [IsCustomer]
     filter_backends = (DjangoFilterBackend,)
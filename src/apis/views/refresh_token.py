@@ -1,8 +1,10 @@
 from rest_framework import generics
 from rest_framework.response import Response
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.exceptions import AuthenticationFailed
 from apis.serializers.refresh_token import RefreshTokenSerializer
+from apis.utils.request_context import set_access_claims
 
 
 class RefreshTokenAPIView(generics.RetrieveAPIView):
@@ -34,8 +36,11 @@ class RefreshTokenAPIView(generics.RetrieveAPIView):
 
         try:
             refresh = RefreshToken(refresh_token)
-            access_token = str(refresh.access_token)
-            return Response({"access": access_token})
+            # Re-stamp the current access claims, the refresh token's may be stale
+            access_token = set_access_claims(
+                refresh.access_token, refresh[api_settings.USER_ID_CLAIM]
+            )
+            return Response({"access": str(access_token)})
         except Exception as e:
             print(e)
             raise AuthenticationFailed({"detail": "Invalid Refresh Token."})
@@ -17,22 +17,24 @@ class TransactionHistoryUpdateAPIView(generics.UpdateAPIView):
         """
         from apis.models.transaction_history import TransactionHistory
 
-        # Use the `latest()` method to get the most recent credit transaction
-        try:
-            latest_credit_transaction = (
-                self.request.membership.membership_transactions.filter(
-                    transaction_type=TransactionHistory.TRANSACTION_TYPE.CREDIT
-                ).latest()
+        latest_credit_transaction_id = (
+            self.request.membership.membership_transactions.filter(
+                transaction_type=TransactionHistory.TRANSACTION_TYPE.CREDIT
             )
-        except TransactionHistory.DoesNotExist:
+            .order_by("-created_at")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if latest_credit_transaction_id is None:
             raise NotFound({"detail": "No credit transactions found."})
 
         # Check if the requested transaction is the most recent credit transaction
-        if self.kwargs.get("pk") != latest_credit_transaction.id:
+        if self.kwargs.get("pk") != latest_credit_transaction_id:
             raise NotFound(
                 {"detail": "You can only update the most recent credit transaction."}
             )
-        return latest_credit_transaction
+        # Loaded together with its membership and merchant by the permission check
+        return self.request.transaction
 
     @extend_schema(
         description="""
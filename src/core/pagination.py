@@ -1,7 +1,73 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class CustomCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id): a page is located with a WHERE on the
+    ordering key instead of an OFFSET, so deep pages cost the same as the first.
+    The total count is only computed when the client sends `count=true`.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+    count_query_param = "count"
+    # When True the list stays unpaginated unless the client sends `cursor` or
+    # `page_size`, for views that used to return every row.
+    opt_in = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.opt_in and not (
+            self.cursor_query_param in params or self.page_size_query_param in params
+        ):
+            return None
+        self.count = None
+        if params.get(self.count_query_param) == "true":
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {"count": self.count, **response.data}
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {
+            "type": "integer",
+            "example": 123,
+            "description": f"Only present when `{self.count_query_param}=true`.",
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include the total number of results.",
+                "schema": {"type": "string", "enum": ["true"]},
+            }
+        )
+        return parameters
+
+
+class OptInCursorPagination(CustomCursorPagination):
+    opt_in = True
+
+
+class CodeCursorPagination(CustomCursorPagination):
+    """Keyset pagination on the unique, increasing `code`."""
+
+    ordering = ("-code",)
@@ -1,5 +1,4 @@
 import os
-import boto3
 import environ
 from pathlib import Path
 from datetime import timedelta
@@ -31,14 +30,6 @@ OBJECT_STORAGE_URL = os.getenv("OBJECT_STORAGE_URL")
 OBJECT_STORAGE_ACCESS_KEY = os.getenv("OBJECT_STORAGE_ACCESS_KEY")
 OBJECT_STORAGE_SECRET_KEY = os.getenv("OBJECT_STORAGE_SECRET_KEY")
 
-S3_CLIENT = boto3.client(
-    "s3",
-    region_name=AWS_S3_REGION_NAME,
-    endpoint_url=OBJECT_STORAGE_URL,
-    aws_access_key_id=OBJECT_STORAGE_ACCESS_KEY,
-    aws_secret_access_key=OBJECT_STORAGE_SECRET_KEY,
-)
-
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -97,6 +88,17 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
     "SCHEMA_PATH_PREFIX": "/api/",
+    # Choice sets shared by several serializers
+    "ENUM_NAME_OVERRIDES": {
+        "ChannelEnum": "apis.models.outbound_message.OutboundMessage.CHANNEL",
+        "ReminderChannelEnum": "apis.models.reminder_campaign.ReminderCampaign.CHANNEL",
+        "BatchStatusEnum": "apis.models.reminder_campaign.ReminderCampaign.STATUS",
+    },
+}
+
+CACHES = {
+    # e.g. CACHE_URL=rediscache://127.0.0.1:6379/1 to share caches between workers
+    "default": env.cache_url("CACHE_URL", default="locmemcache://"),
 }
 
 DATABASES = {
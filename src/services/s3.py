@@ -1,18 +1,46 @@
 import logging
+import threading
 from django.conf import settings
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Return the process-wide S3 client, built on first use. Importing boto3 and
+    building a client is slow, so processes that never touch storage skip it.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                import boto3
+
+                _s3_client = boto3.client(
+                    "s3",
+                    region_name=settings.AWS_S3_REGION_NAME,
+                    endpoint_url=settings.OBJECT_STORAGE_URL,
+                    aws_access_key_id=settings.OBJECT_STORAGE_ACCESS_KEY,
+                    aws_secret_access_key=settings.OBJECT_STORAGE_SECRET_KEY,
+                )
+    return _s3_client
+
 
 class S3Service:
     def __init__(
         self,
         bucket="Wasooli",
     ):
-        self.s3_client = settings.S3_CLIENT
         self.bucket = bucket
 
+    @property
+    def s3_client(self):
+        return get_s3_client()
+
     def get_bucket_and_s3_key(self, s3_url):
         parsed_url = urlparse(s3_url)
         bucket = parsed_url.netloc